@@ -0,0 +1,143 @@
+"""
+Description:
+    The actuation stage between the fusion logic and pynput. During a drag the loop asks for a move on every
+    iteration, but most of these moves are below a pixel or come faster than the display can show them. The
+    PointerActuator only writes mouse.position when the target moved more than a deadband and at most max_rate times
+    per second, always with the newest target, and keeps track of the button so it is pressed once per drag instead
+    of on every iteration. It counts the OS input events it did not send. A move can carry a tag, e.g. the capture times
+    of the data the target was made from, which stays with the target while it is held back and is in written_tag
+    once the target is written.
+    An example of how to use it:
+            actuator = PointerActuator(mouse, Button.left, deadband=1.0, max_rate=60.0)
+            actuator.move(current_gaze_mean)   # every loop iteration while dragging
+            actuator.flush()                   # when there is no new target, writes the one held back once due
+            actuator.release()                 # when the fist is opened
+            print(actuator.report())
+"""
+
+import time
+
+
+class PointerActuator(object):
+    """
+        Rate limited, deadband filtered writes to a pynput mouse controller.
+    """
+
+    def __init__(self, mouse, button, deadband=1.0, max_rate=60.0, clock=time.time):
+        """
+            input:
+                mouse - pynput.mouse.Controller, or anything with a position attribute and press/release methods
+                button - Button held during a drag, e.g. pynput.mouse.Button.left
+                deadband - Moves shorter than this many pixels from the last written position are dropped
+                max_rate - Maximum number of position writes per second, e.g. the display refresh rate
+                clock - Function returning the time in seconds
+        """
+        self.mouse = mouse
+        self.button = button
+        self.deadband_squared = float(deadband) ** 2
+        self.period = 1.0 / max_rate if max_rate else 0.0
+        self.clock = clock
+        self.pressed = False
+        self.position = None  # Last position written to the mouse
+        self.pending = None  # Newest position that was held back by the rate limit
+        self.pending_tag = None
+        self.written_tag = None  # Tag of the position last written to the mouse
+        self.last_write = None
+        self.stats = {'requested': 0, 'written': 0, 'deadband': 0, 'coalesced': 0, 'presses': 0,
+                      'presses_saved': 0, 'releases': 0, 'releases_saved': 0}
+
+    def press(self):
+        if self.pressed:
+            self.stats['presses_saved'] += 1
+            return
+        self.mouse.press(self.button)
+        self.pressed = True
+        self.stats['presses'] += 1
+
+    def move(self, pos, tag=None):
+        """
+            Requests the pointer to move to pos and makes sure the button is held. Returns True if mouse.position was
+            written. tag is kept with the position, see written_tag.
+        """
+        self.stats['requested'] += 1
+        pos = (int(round(pos[0])), int(round(pos[1])))
+        if self.position is not None:
+            dx = pos[0] - self.position[0]
+            dy = pos[1] - self.position[1]
+            if dx * dx + dy * dy < self.deadband_squared:
+                self.pending = None
+                self.pending_tag = None
+                self.stats['deadband'] += 1
+                self.press()
+                return False
+        now = self.clock()
+        if self.last_write is not None and now - self.last_write < self.period:
+            if self.pending is not None:
+                self.stats['coalesced'] += 1
+            self.pending = pos
+            self.pending_tag = tag
+            self.press()
+            return False
+        self.write(pos, now, tag)
+        self.press()
+        return True
+
+    def flush(self):
+        """
+            Writes the position held back by the rate limit once it is due. Returns True if it was written.
+        """
+        if self.pending is None:
+            return False
+        now = self.clock()
+        if now - self.last_write < self.period:
+            return False
+        self.write(self.pending, now, self.pending_tag)
+        return True
+
+    def pendingDelay(self):
+        """
+            Returns the seconds until the position held back by the rate limit is due, 0 if it is due now, or None if
+            no position is held back.
+        """
+        if self.pending is None:
+            return None
+        return max(0.0, self.period - (self.clock() - self.last_write))
+
+    def write(self, pos, now, tag=None):
+        self.mouse.position = pos
+        self.position = pos
+        self.pending = None
+        self.pending_tag = None
+        self.written_tag = tag
+        self.last_write = now
+        self.stats['written'] += 1
+
+    def release(self):
+        """
+            Releases the button if it is held. The position held back by the rate limit is written first, so the
+            window ends up where the gaze was. The rate limit starts again with the next drag, so its first position is
+            written before the button is pressed.
+        """
+        if not self.pressed:
+            self.stats['releases_saved'] += 1
+            return
+        if self.pending is not None:
+            self.write(self.pending, self.clock(), self.pending_tag)
+        self.mouse.release(self.button)
+        self.pressed = False
+        self.position = None
+        self.last_write = None
+        self.stats['releases'] += 1
+
+    def eventsSaved(self):
+        """
+            Returns the number of position, press and release events that were not sent to the OS.
+        """
+        stats = self.stats
+        return stats['requested'] - stats['written'] + stats['presses_saved'] + stats['releases_saved']
+
+    def report(self):
+        stats = self.stats
+        return ("moves requested: %d, written: %d (deadband: %d, coalesced: %d), presses: %d, releases: %d, "
+                "OS events saved: %d" % (stats['requested'], stats['written'], stats['deadband'], stats['coalesced'],
+                                          stats['presses'], stats['releases'], self.eventsSaved()))
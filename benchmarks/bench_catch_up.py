@@ -0,0 +1,95 @@
+"""
+Description:
+    Shows what the catch up of gesture_reader.SampleListener does when on_frame is not called for every frame. The
+    stand-in controller produces frames at its frame rate with the hand switching between open and fist, but the
+    listener only gets on_frame after random stalls of up to --max-stall frames, like a Leap thread that was busy.
+    Without catch up only the frames that reach on_frame vote, so a fist needs 4 calls of on_frame instead of 4 frames
+    and starts late. With catch up the missed frames are read back from the history, so the fists start on the same
+    frame as without stalls. Printed are the frames classified, the dropped frame counter, the mean delay of the fist
+    starts behind the hand closing and the time per on_frame.
+    Run it with:
+            python benchmarks/bench_catch_up.py --frames 20000 --max-stall 20
+"""
+## Finds the relative path to the modules in the project root
+import os, sys, inspect
+src_dir = os.path.dirname(inspect.getfile(inspect.currentframe()))
+sys.path.insert(0, os.path.abspath(os.path.join(src_dir, '..')))
+sys.path.insert(0, os.path.abspath(src_dir))
+
+import standins
+standins.installStandins()
+
+import argparse
+import time
+import numpy as np
+
+import Leap
+import debounce
+import gesture_reader
+
+timer = getattr(time, 'perf_counter', time.time)
+
+
+def run(n_frames, max_stall, catch_up, fist_period, history_size, seed, edges):
+    """
+        Returns the listener after n_frames frames with on_frame called after random stalls, the mean seconds per
+        call of on_frame and the number of calls. The fist edges are appended to edges.
+    """
+    rng = np.random.RandomState(seed)
+    controller = Leap.Controller(fist_period=fist_period, history_size=history_size)
+    listener = gesture_reader.SampleListener(on_fist_start=edges.append, on_fist_end=edges.append, catch_up=catch_up)
+    listener.history_size = history_size
+    elapsed = 0.0
+    calls = 0
+    next_call = 1
+    for _ in range(n_frames):
+        controller.pushFrame(controller.makeFrame())  # No listener is added, on_frame is called below
+        next_call -= 1
+        if next_call == 0:
+            start = timer()
+            listener.on_frame(controller)
+            elapsed += timer() - start
+            calls += 1
+            next_call = rng.randint(1, max_stall + 1)
+    return listener, elapsed / calls, calls
+
+
+def fistStartDelay(edges, controller_rate, fist_period):
+    """
+        Returns the mean delay in milliseconds of the fist starts behind the first fist frame of their period.
+    """
+    delays = []
+    period = int(1e6 * fist_period / controller_rate)
+    for edge in edges:
+        if edge.edge == debounce.START:
+            onset = (edge.timestamp // period) * period
+            delays.append((edge.timestamp - onset) * 1e-3)
+    return np.mean(delays) if delays else float('nan')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=20000, help='Number of frames the controller produces')
+    parser.add_argument('--max-stall', type=int, default=20, help='Most frames between two calls of on_frame')
+    parser.add_argument('--history', type=int, default=60, help='Number of frames in the controller history')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    fist_period = 200
+    rate = Leap.Controller().frame_rate
+
+    print("%d frames at %.0f Hz, on_frame after stalls of 1 to %d frames, history of %d frames" % (
+        args.frames, rate, args.max_stall, args.history))
+    print("%-14s %8s %10s %8s %8s %12s %12s" % ('', 'on_frame', 'classified', 'dropped', 'fists', 'fist delay',
+                                               'on_frame'))
+    for label, max_stall, catch_up in (('every frame', 1, False), ('no catch up', args.max_stall, False),
+                                       ('catch up', args.max_stall, True)):
+        edges = []
+        listener, seconds, calls = run(args.frames, max_stall, catch_up, fist_period, args.history, args.seed, edges)
+        starts = sum(1 for edge in edges if edge.edge == debounce.START)
+        print("%-14s %8d %10d %8d %8d %9.1f ms %9.1f us" % (
+            label, calls, calls + listener.caught_up_frames, listener.dropped_frames, starts,
+            fistStartDelay(edges, rate, fist_period), seconds * 1e6))
+
+
+if __name__ == "__main__":
+    main()
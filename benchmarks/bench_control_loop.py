@@ -0,0 +1,143 @@
+"""
+Description:
+    Hardware free benchmark of the control loop in eye_gaze_gesture_mini_project.py. The Leap controller, eye tracker,
+    win32gui and pynput are replaced by the stand-ins in standins.py and every stage of the drag loop is timed on its
+    own: on_frame (the per frame gesture classification), getFist, sample, updateRollingArray, mean, movePynput,
+    getOffset and moveActuator (the rate limited actuation stage). The latency percentiles of every stage and the
+    throughput of the whole loop are printed, and can be written to a JSON file to compare commits.
+    Run it with:
+            python benchmarks/bench_control_loop.py --iterations 20000 --json results.json
+"""
+## Finds the relative path to the modules in the project root
+import os, sys, inspect
+src_dir = os.path.dirname(inspect.getfile(inspect.currentframe()))
+sys.path.insert(0, os.path.abspath(os.path.join(src_dir, '..')))
+sys.path.insert(0, os.path.abspath(src_dir))
+
+import argparse
+import json
+import time
+import numpy as np
+
+import standins
+standins.installStandins()
+import eye_gaze_gesture_mini_project as app
+import gesture_reader
+
+timer = getattr(time, 'perf_counter', time.time)
+PERCENTILES = [50, 90, 99, 99.9]
+
+
+class NullWriter(object):
+    """
+        Swallows the prints in the loop, so the benchmark measures the code and not the terminal.
+    """
+
+    def write(self, text):
+        pass
+
+    def flush(self):
+        pass
+
+
+def gazeMean(gaze_array):
+    if hasattr(gaze_array, 'mean') and not isinstance(gaze_array, np.ndarray):
+        return gaze_array.mean()
+    return np.mean(gaze_array, axis=0)
+
+
+def runLoop(iterations, frames_per_iteration=1):
+    """
+        Runs the drag part of the __main__ loop with a fist held and returns the time in seconds of every stage in
+        every iteration.
+    """
+    listener = gesture_reader.SampleListener()
+    controller = standins.Controller(fist_period=iterations * frames_per_iteration + 1)
+    controller.add_listener(listener)
+    eyetracker = standins.EyeTracker()
+    gaze_array = app.gaze_buffer.GazeRingBuffer(29)
+    hwnd = app.grabObject()
+
+    stages = ['on_frame', 'getFist', 'sample', 'updateRollingArray', 'mean', 'movePynput', 'getOffset',
+              'moveActuator']
+    times = dict((stage, np.empty(iterations)) for stage in stages)
+    loop_times = np.empty(iterations)
+
+    stdout = sys.stdout
+    sys.stdout = NullWriter()
+    try:
+        for ii in range(iterations):
+            frames = [controller.makeFrame() for _ in range(frames_per_iteration)]
+            t0 = timer()
+            for frame in frames:
+                controller.pushFrame(frame)
+            t1 = timer()
+            listener.getFist(controller)
+            t2 = timer()
+            current_sample = eyetracker.sample()
+            t3 = timer()
+            gaze_array = app.updateRollingArray(gaze_array, current_sample)
+            t4 = timer()
+            current_gaze_mean = gazeMean(gaze_array)
+            t5 = timer()
+            app.movePynput(current_gaze_mean, hwnd)
+            t6 = timer()
+            app.getOffset(current_gaze_mean, hwnd)
+            t7 = timer()
+            app.moveActuator(current_gaze_mean, hwnd)
+            t8 = timer()
+            starts = (t0, t1, t2, t3, t4, t5, t6, t7)
+            stops = (t1, t2, t3, t4, t5, t6, t7, t8)
+            for stage, start, stop in zip(stages, starts, stops):
+                times[stage][ii] = stop - start
+            loop_times[ii] = t8 - t0
+    finally:
+        sys.stdout = stdout
+    print(app.actuator.report())
+    print("window system calls: %d, geometry cache hits: %d, misses: %d" % (
+        sys.modules['win32gui'].fake.calls, app.window_cache.hits, app.window_cache.misses))
+    times['loop'] = loop_times
+    return times
+
+
+def summarize(times):
+    """
+        Returns the latency percentiles in microseconds and the throughput of every stage.
+    """
+    summary = {}
+    for stage, values in times.items():
+        stats = dict(('p%g' % p, float(np.percentile(values, p) * 1e6)) for p in PERCENTILES)
+        stats['mean'] = float(values.mean() * 1e6)
+        stats['max'] = float(values.max() * 1e6)
+        stats['per_second'] = float(len(values) / values.sum()) if values.sum() > 0 else float('inf')
+        summary[stage] = stats
+    return summary
+
+
+def printSummary(summary, stage_order):
+    columns = ['p%g' % p for p in PERCENTILES] + ['mean', 'max']
+    print(("%-20s" + " %10s" * len(columns) + " %12s") % tuple(['stage [us]'] + columns + ['calls/s']))
+    for stage in stage_order:
+        stats = summary[stage]
+        print(("%-20s" + " %10.2f" * len(columns) + " %12.0f") % tuple(
+            [stage] + [stats[c] for c in columns] + [stats['per_second']]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the gaze and gesture control loop without hardware.')
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--frames-per-iteration', type=int, default=1,
+                        help='Leap frames delivered between two loop iterations')
+    parser.add_argument('--json', help='Write the summary to this file')
+    args = parser.parse_args()
+
+    times = runLoop(args.iterations, args.frames_per_iteration)
+    summary = summarize(times)
+    printSummary(summary, list(times.keys()))
+    if args.json:
+        with open(args.json, 'w') as result_file:
+            json.dump({'iterations': args.iterations, 'stages': summary}, result_file, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Description:
+    Runs the fixation detectors in fixation_detector.py over a gaze trace and prints how many window moves the events
+    cause compared with moving on every sample, and how many samples per second every detector classifies with push,
+    sample by sample, and with process, in chunks. The events of process are checked against the push ones. I-VT
+    process runs on numpy, I-DT process pushes the samples one by one, so it is no faster than I-DT push.
+    The trace is a recording in the format of tobii_gaze.ReplayEyeTracker (see bench_gaze_filter.py) or a synthetic
+    trace of noisy fixations joined by saccades.
+    Run it with:
+            python benchmarks/bench_fixation_detector.py [--trace gaze.npy] [--samples 5000000] [--rate 120]
+"""
+## Finds the relative path to the modules in the project root
+import os, sys, inspect
+src_dir = os.path.dirname(inspect.getfile(inspect.currentframe()))
+sys.path.insert(0, os.path.abspath(os.path.join(src_dir, '..')))
+sys.path.insert(0, os.path.abspath(src_dir))
+
+import argparse
+import time
+import numpy as np
+
+import fixation_detector
+from bench_gaze_filter import syntheticTrace, loadTrace
+
+timer = getattr(time, 'perf_counter', time.time)
+CHUNK_SIZE = 65536
+
+
+def pushAll(detector, samples):
+    """
+        Pushes the samples one by one and returns the events and the samples per second.
+    """
+    events = []
+    start = timer()
+    for sample in samples:
+        event = detector.push(sample, sample[2])
+        if event is not None:
+            events.append(event)
+    elapsed = timer() - start
+    return np.array(events, dtype=fixation_detector.EVENT_DTYPE), len(samples) / elapsed
+
+
+def processChunks(detector, samples, chunk_size=CHUNK_SIZE):
+    """
+        Classifies the samples in chunks and returns the events and the samples per second.
+    """
+    events = []
+    start = timer()
+    for ii in range(0, len(samples), chunk_size):
+        events.append(detector.process(samples[ii:ii + chunk_size]))
+    elapsed = timer() - start
+    return np.concatenate(events), len(samples) / elapsed
+
+
+def moves(events):
+    return int(np.count_nonzero(events['kind'] != fixation_detector.SACCADE))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--trace', help='Recorded gaze trace (.npy or .csv), a synthetic trace is used if not given')
+    parser.add_argument('--samples', type=int, default=5000000, help='Length of the synthetic trace')
+    parser.add_argument('--rate', type=float, default=120.0, help='Sample rate of the synthetic trace in Hz')
+    parser.add_argument('--push-samples', type=int, default=200000,
+                        help='Number of samples used for the sample by sample runs')
+    args = parser.parse_args()
+
+    if args.trace:
+        samples = loadTrace(args.trace, 500.0)[0]
+    else:
+        samples = syntheticTrace(args.samples, args.rate)[0]
+    head = samples[:args.push_samples]
+
+    pushed, push_rate = pushAll(fixation_detector.VelocityFixationDetector(), head)
+    processed, process_rate = processChunks(fixation_detector.VelocityFixationDetector(), head)
+    assert len(pushed) == len(processed)
+    for name in pushed.dtype.names:
+        assert np.allclose(pushed[name], processed[name])
+    processed, process_rate = processChunks(fixation_detector.VelocityFixationDetector(), samples)
+    dispersion, dispersion_rate = pushAll(fixation_detector.DispersionFixationDetector(), head)
+    dispersion_processed, dispersion_process_rate = processChunks(fixation_detector.DispersionFixationDetector(), head)
+    for name in dispersion.dtype.names:
+        assert np.allclose(dispersion[name], dispersion_processed[name])
+
+    print("%d samples, %d for the sample by sample runs" % (len(samples), len(head)))
+    print("%-22s %14s %12s %10s" % ('detector', 'samples/s', 'moves', 'moves [%]'))
+    rows = [('I-VT push', push_rate, moves(pushed), len(head)),
+            ('I-VT process', process_rate, moves(processed), len(samples)),
+            ('I-DT push', dispersion_rate, moves(dispersion), len(head)),
+            ('I-DT process', dispersion_process_rate, moves(dispersion_processed), len(head))]
+    for name, rate, n_moves, n_samples in rows:
+        print("%-22s %14.0f %12d %10.2f" % (name, rate, n_moves, 100.0 * n_moves / n_samples))
+
+
+if __name__ == "__main__":
+    main()
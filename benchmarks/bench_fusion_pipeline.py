@@ -0,0 +1,89 @@
+"""
+Description:
+    Runs fusion_pipeline.FusionPipeline with the stand-in Leap controller and eye tracker and a window move that takes
+    --move-time seconds, once with every overflow policy, and prints the report of each run. With DROP_OLDEST the
+    slow actuation stage only drops old targets and the gaze and hand acquisition keep their rates. With BLOCK the
+    actuation queue fills, fusion waits on it, its own queue fills and in the end the acquisition stages wait, which
+    shows up as lower gaze and hand rates and as blocked time.
+    Run it with:
+            python benchmarks/bench_fusion_pipeline.py --seconds 5 --move-time 0.05 --queue-size 16
+"""
+## Finds the relative path to the modules in the project root
+import os, sys, inspect
+src_dir = os.path.dirname(inspect.getfile(inspect.currentframe()))
+sys.path.insert(0, os.path.abspath(os.path.join(src_dir, '..')))
+sys.path.insert(0, os.path.abspath(src_dir))
+
+import argparse
+import functools
+import threading
+import time
+
+import fusion_pipeline
+
+
+def makeStandinController(frame_rate=115.0):
+    """
+        Returns a stand-in Leap controller that produces frames at frame_rate on its own thread, like the service.
+    """
+    import standins
+    standins.installStandins()
+    import Leap
+    controller = Leap.Controller(frame_rate=frame_rate, fist_period=int(frame_rate))
+
+    def produce():
+        next_time = time.time()
+        while True:
+            controller.advance()
+            next_time += 1.0 / frame_rate
+            time.sleep(max(0.0, next_time - time.time()))
+
+    thread = threading.Thread(target=produce)
+    thread.daemon = True
+    thread.start()
+    return controller
+
+
+def makeStandinEyeTracker():
+    import standins
+    return standins.EyeTracker()
+
+
+def grab(pos):
+    return 1
+
+
+def slowMove(move_time, pos, hwnd):
+    time.sleep(move_time)
+
+
+def release():
+    pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=5.0, help='Run time of every policy')
+    parser.add_argument('--move-time', type=float, default=0.05, help='Seconds a window move takes')
+    parser.add_argument('--queue-size', type=int, default=16, help='Number of messages every queue holds')
+    parser.add_argument('--gaze-rate', type=float, default=60.0)
+    args = parser.parse_args()
+
+    print("stand-in hand at 115 Hz, gaze at %.0f Hz, window moves of %.0f ms, queues of %d messages" % (
+        args.gaze_rate, args.move_time * 1e3, args.queue_size))
+    for overflow in (fusion_pipeline.DROP_OLDEST, fusion_pipeline.BLOCK):
+        pipeline = fusion_pipeline.FusionPipeline(make_controller=makeStandinController,
+                                                  make_eyetracker=makeStandinEyeTracker, grab=grab,
+                                                  move=functools.partial(slowMove, args.move_time), release=release,
+                                                  gaze_rate=args.gaze_rate, queue_size=args.queue_size,
+                                                  overflow=overflow)
+        pipeline.start()
+        time.sleep(args.seconds)
+        report = pipeline.report()
+        pipeline.stop()
+        print("\n%s:" % overflow)
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
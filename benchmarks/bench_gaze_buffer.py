@@ -0,0 +1,87 @@
+"""
+Description:
+    Compares the per sample cost of the old rolling array (updateRollingArray -> shift1 followed by np.mean over the
+    whole window) with gaze_buffer.GazeRingBuffer for window sizes from 5 to 1000.
+    Run it with:
+            python benchmarks/bench_gaze_buffer.py
+"""
+## Finds the relative path to the modules in the project root
+import os, sys, inspect
+src_dir = os.path.dirname(inspect.getfile(inspect.currentframe()))
+sys.path.insert(0, os.path.abspath(os.path.join(src_dir, '..')))
+
+import timeit
+import numpy as np
+import pandas as pd
+
+from gaze_buffer import GazeRingBuffer
+
+WINDOW_SIZES = [5, 10, 29, 50, 100, 250, 500, 1000]
+
+
+def shift1(arr,num = 1):
+    """
+    Copy of eye_gaze_gesture_mini_project.shift1, which cannot be imported without the Windows only dependencies.
+    """
+    data = pd.Series(arr)
+    data = data.shift(num)
+    return data.tolist()
+
+
+def updateRollingArray(arr,new_value):
+    """
+    Copy of eye_gaze_gesture_mini_project.updateRollingArray for lists.
+    """
+    shifted_arr = shift1(arr)
+    shifted_arr[0] = new_value
+    return shifted_arr
+
+
+def timeRollingArray(window, samples):
+    """
+        Returns the mean time in seconds to push a sample and compute the mean with the old rolling array.
+    """
+    state = {'arr': [(0.0, 0.0)] * window, 'i': 0}
+
+    def step():
+        sample = samples[state['i'] % len(samples)]
+        state['i'] += 1
+        state['arr'] = updateRollingArray(state['arr'], sample)
+        np.mean(state['arr'], axis=0)
+
+    number = max(200, 20000 // window)
+    return min(timeit.repeat(step, number=number, repeat=3)) / number
+
+
+def timeRingBuffer(window, samples):
+    """
+        Returns the mean time in seconds to push a sample and compute the mean with GazeRingBuffer.
+    """
+    buf = GazeRingBuffer(window)
+    for sample in samples[:window]:
+        buf.push(sample, 0.0)
+    state = {'i': 0}
+
+    def step():
+        sample = samples[state['i'] % len(samples)]
+        state['i'] += 1
+        buf.push(sample, 0.0)
+        buf.mean()
+
+    number = 20000
+    return min(timeit.repeat(step, number=number, repeat=3)) / number
+
+
+def main():
+    rng = np.random.RandomState(0)
+    samples = [tuple(s) for s in rng.uniform(0, 1600, size=(2000, 2))]
+
+    print("%8s %18s %18s %10s" % ('window', 'rolling array [us]', 'ring buffer [us]', 'speedup'))
+    for window in WINDOW_SIZES:
+        old = timeRollingArray(window, samples)
+        new = timeRingBuffer(window, samples)
+        print("%8d %18.2f %18.2f %9.1fx" % (window, old * 1e6, new * 1e6, old / new))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Description:
+    Replays a gaze trace through the 29 sample mean window and the filters in gaze_filter.py and compares them on:
+        lag    - Time shift in ms that best aligns the filtered gaze with the gaze it should follow
+        settle - Mean time in ms after the end of a saccade until the filtered gaze is within 30 pixels of the new
+                 fixation (synthetic traces only, where the fixations are known)
+        jitter - RMS movement in pixels of the filtered gaze from one sample to the next during fixations, from
+                 half a second after the fixation started, once every filter has settled
+        cost   - Time in us to push a sample and read the filtered position
+    The trace is either a recording in the format of tobii_gaze.ReplayEyeTracker, an (n, 3) array of normalized x, y
+    and device time stamps in microseconds saved with np.save or as CSV, or a synthetic trace of noisy fixations
+    joined by saccades. On a recording the lag is measured against the raw gaze and fixations are the samples where the
+    raw gaze moves slower than --fixation-speed.
+    Run it with:
+            python benchmarks/bench_gaze_filter.py [--trace gaze.npy] [--rate 60]
+"""
+## Finds the relative path to the modules in the project root
+import os, sys, inspect
+src_dir = os.path.dirname(inspect.getfile(inspect.currentframe()))
+sys.path.insert(0, os.path.abspath(os.path.join(src_dir, '..')))
+
+import argparse
+import time
+import numpy as np
+
+import gaze_filter
+
+timer = getattr(time, 'perf_counter', time.time)
+RESOLUTION = (1600, 900)
+
+
+def syntheticTrace(n, rate, noise=10.0, seed=0):
+    """
+        Returns the (n, 3) noisy x, y, t samples, the (n, 2) true gaze and a mask of the fixation samples. Fixations
+        last 300 to 1500 ms and saccades 30 to 60 ms with a minimum jerk profile.
+    """
+    rng = np.random.RandomState(seed)
+    truth = np.empty((n, 2))
+    fixation = np.zeros(n, dtype=bool)
+    position = np.array(RESOLUTION) / 2.0
+    ii = 0
+    while ii < n:
+        length = int(rng.uniform(0.3, 1.5) * rate)
+        truth[ii:ii + length] = position
+        fixation[ii:ii + length] = True
+        ii += length
+        target = rng.uniform((0, 0), RESOLUTION)
+        length = max(int(rng.uniform(0.03, 0.06) * rate), 1)
+        s = np.arange(1, length + 1) / float(length)
+        profile = 10 * s ** 3 - 15 * s ** 4 + 6 * s ** 5
+        truth[ii:ii + length] = (position + profile[:, None] * (target - position))[:n - ii]
+        ii += length
+        position = target
+    samples = np.empty((n, 3))
+    samples[:, :2] = truth + rng.normal(0.0, noise, (n, 2))
+    samples[:, 2] = np.arange(n) / float(rate)
+    return samples, truth, fixation
+
+
+def loadTrace(path, fixation_speed):
+    """
+        Loads a recorded trace and returns the samples in pixels and seconds, and a velocity based fixation mask.
+    """
+    if path.endswith('.npy'):
+        trace = np.load(path)
+    else:
+        trace = np.loadtxt(path, delimiter=',')
+    trace = trace[~np.isnan(trace[:, :2]).any(axis=1)]
+    samples = np.empty((len(trace), 3))
+    samples[:, 0] = trace[:, 0] * RESOLUTION[0]
+    samples[:, 1] = trace[:, 1] * RESOLUTION[1]
+    samples[:, 2] = (trace[:, 2] - trace[0, 2]) * 1e-6
+    # Speed of the raw gaze smoothed over 5 samples, so the noise does not count as movement
+    kernel = np.ones(5) / 5.0
+    smooth = np.column_stack([np.convolve(samples[:, axis], kernel, mode='same') for axis in (0, 1)])
+    dt = np.maximum(np.gradient(samples[:, 2]), 1e-6)
+    speed = np.hypot(*np.gradient(smooth, axis=0).T) / dt
+    return samples, samples[:, :2].copy(), speed < fixation_speed
+
+
+def runFilter(gaze_array, samples):
+    """
+        Pushes every sample and returns the filtered positions and the time per sample in seconds.
+    """
+    output = np.empty((len(samples), 2))
+    start = timer()
+    for ii in range(len(samples)):
+        sample = samples[ii]
+        gaze_array.push(sample, sample[2])
+        output[ii] = gaze_array.mean()
+    return output, (timer() - start) / len(samples)
+
+
+def bestLag(output, reference, max_shift):
+    """
+        Returns the shift in samples that minimizes the squared distance between output[t] and reference[t - shift].
+    """
+    errors = [np.mean(np.sum((output[shift:] - reference[:len(reference) - shift]) ** 2, axis=1))
+              for shift in range(max_shift)]
+    return int(np.argmin(errors))
+
+
+def settleTimes(output, truth, fixation, rate, radius=30.0):
+    """
+        Returns the mean time in seconds from the start of every fixation until the output is within radius pixels.
+    """
+    starts = np.flatnonzero(fixation[1:] & ~fixation[:-1]) + 1
+    times = []
+    for start in starts:
+        stop = start
+        while stop < len(fixation) and fixation[stop]:
+            stop += 1
+        distance = np.hypot(*(output[start:stop] - truth[start:stop]).T)
+        inside = np.flatnonzero(distance < radius)
+        if len(inside):
+            times.append(inside[0] / float(rate))
+    return np.mean(times) if times else float('nan')
+
+
+def steadyFixation(fixation, settle_samples):
+    """
+        Returns a mask of the fixation samples that come at least settle_samples after the start of their fixation.
+    """
+    run_length = np.zeros(len(fixation), dtype=np.int64)
+    count = 0
+    for ii in range(len(fixation)):
+        count = count + 1 if fixation[ii] else 0
+        run_length[ii] = count
+    return run_length > settle_samples
+
+
+def jitter(output, steady):
+    steps = np.hypot(*np.diff(output, axis=0).T)
+    return np.sqrt(np.mean(steps[steady[1:]] ** 2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--trace', help='Recorded gaze trace (.npy or .csv), a synthetic trace is used if not given')
+    parser.add_argument('--samples', type=int, default=20000, help='Length of the synthetic trace')
+    parser.add_argument('--rate', type=float, default=60.0, help='Sample rate of the synthetic trace in Hz')
+    parser.add_argument('--fixation-speed', type=float, default=500.0,
+                        help='Gaze speed in pixels/s below which a recorded sample is part of a fixation')
+    args = parser.parse_args()
+
+    if args.trace:
+        samples, reference, fixation = loadTrace(args.trace, args.fixation_speed)
+        rate = 1.0 / np.median(np.diff(samples[:, 2]))
+    else:
+        samples, reference, fixation = syntheticTrace(args.samples, args.rate)
+        rate = args.rate
+
+    filters = [
+        ('mean (29)', gaze_filter.makeGazeFilter('mean')),
+        ('oneeuro', gaze_filter.makeGazeFilter('oneeuro', rate=rate)),
+        ('kalman', gaze_filter.makeGazeFilter('kalman', rate=rate)),
+    ]
+    steady = steadyFixation(fixation, int(0.5 * rate))
+    print("%d samples at %.0f Hz, raw jitter %.2f px" % (len(samples), rate, jitter(samples[:, :2], steady)))
+    print("%-12s %9s %11s %11s %10s" % ('filter', 'lag [ms]', 'settle [ms]', 'jitter [px]', 'cost [us]'))
+    for name, gaze_array in filters:
+        output, cost = runFilter(gaze_array, samples)
+        lag = bestLag(output, reference, int(rate)) / rate
+        settle = float('nan') if args.trace else settleTimes(output, reference, fixation, rate)
+        print("%-12s %9.1f %11.1f %11.2f %10.2f" % (name, lag * 1e3, settle * 1e3, jitter(output, steady),
+                                                   cost * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Description:
+    Measures what gestures cost on the hot path of gesture_classifiers.GestureRegistry. Synthetic two handed frames
+    are classified one frame at a time, like on_frame does, with only the fist registered, with the four built in
+    gestures, and with the built in gestures plus extra copies. The per frame time is compared with computing the
+    joint angles again for every gesture, which is what a separate loop per gesture amounts to. The fist of the
+    registry is checked against gesture_kernel.classifyFist and the mean time of every classifier is printed.
+    Run it with:
+            python benchmarks/bench_gesture_classifiers.py --frames 20000 --extra 12
+"""
+## Finds the relative path to the modules in the project root
+import os, sys, inspect
+src_dir = os.path.dirname(inspect.getfile(inspect.currentframe()))
+sys.path.insert(0, os.path.abspath(os.path.join(src_dir, '..')))
+sys.path.insert(0, os.path.abspath(src_dir))
+
+import argparse
+import time
+import numpy as np
+
+import gesture_classifiers
+import gesture_kernel
+import hand_snapshot
+from bench_gesture_kernel import syntheticDirections
+
+timer = getattr(time, 'perf_counter', time.time)
+
+
+def syntheticRecording(n_frames, seed=0):
+    """
+        Returns n_frames hand_snapshot records with two hands and random grab and pinch strengths.
+    """
+    rng = np.random.RandomState(seed)
+    frames = hand_snapshot.emptySnapshot(n_frames)
+    frames['frame_id'] = np.arange(n_frames)
+    frames['hand_count'] = 2
+    hands = frames['hands']
+    hands['id'] = (1, 2)
+    hands['is_left'] = (True, False)
+    hands['palm_normal'] = (0.0, -1.0, 0.0)
+    hands['grab_strength'] = rng.rand(n_frames, 2)
+    hands['pinch_strength'] = rng.rand(n_frames, 2)
+    hands['bone_directions'] = syntheticDirections(n_frames, 2, seed)
+    return frames
+
+
+def perFrame(registry, frames):
+    """
+        Returns the mean seconds per frame of classifying the frames one at a time, and the fist of every hand.
+    """
+    fist = np.empty((len(frames), 2), dtype=bool)
+    start = timer()
+    for ii in range(len(frames)):
+        frame = frames[ii]
+        features, results = registry.classify(frame['hands'][:frame['hand_count']])
+        fist[ii] = results['fist']
+    return (timer() - start) / len(frames), fist
+
+
+def separateFeatures(classifier):
+    """
+        Wraps a classifier so it computes its own features, like a gesture with its own loop over the fingers.
+    """
+    def classify(features, records):
+        return classifier(gesture_classifiers.handFeatures(records))
+    return classify
+
+
+def perFrameSeparate(classifiers, frames):
+    start = timer()
+    for ii in range(len(frames)):
+        frame = frames[ii]
+        records = frame['hands'][:frame['hand_count']]
+        for classifier in classifiers:
+            classifier(None, records)
+    return (timer() - start) / len(frames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=20000, help='Number of frames classified one at a time')
+    parser.add_argument('--extra', type=int, default=12, help='Extra copies of the built in gestures registered')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    frames = syntheticRecording(args.frames, args.seed)
+    expected = gesture_kernel.classifyFist(frames['hands']['bone_directions'])[1]
+
+    fist_only = gesture_classifiers.GestureRegistry()
+    fist_only.register('fist', gesture_classifiers.fistGesture)
+    builtin = gesture_classifiers.defaultRegistry()
+    many = gesture_classifiers.defaultRegistry()
+    builtin_classifiers = [many.classifiers[name] for name in many.names()]
+    for ii in range(args.extra):
+        many.register('extra_%d' % ii, builtin_classifiers[ii % len(builtin_classifiers)])
+
+    print("%d frames with 2 hands, classified one frame at a time" % args.frames)
+    for label, registry in (('fist only', fist_only), ('built in', builtin), ('built in + extra', many)):
+        seconds, fist = perFrame(registry, frames)
+        assert (fist == expected).all(), "The fist of the registry differs from gesture_kernel.classifyFist"
+        print("%-18s %2d gestures: %7.2f us per frame" % (label, len(registry), seconds * 1e6))
+    separate = [separateFeatures(many.classifiers[name]) for name in many.names()]
+    seconds = perFrameSeparate(separate, frames)
+    print("%-18s %2d gestures: %7.2f us per frame (features computed per gesture)" % ('separate', len(many),
+                                                                                     seconds * 1e6))
+
+    print("mean time per call of the built in registry:")
+    timings = builtin.timings()
+    for name in ['features'] + builtin.names():
+        print("    %-10s %6.2f us" % (name, timings[name] * 1e6))
+    print("built in gestures on the whole recording: %s" % ', '.join(
+        '%s %d' % (name, result.sum()) for name, result in sorted(builtin.classify(frames['hands'])[1].items())))
+
+
+if __name__ == "__main__":
+    main()
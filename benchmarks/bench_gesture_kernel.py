@@ -0,0 +1,77 @@
+"""
+Description:
+    Measures how long gesture_kernel.classifyFist takes to reprocess a recording of synthetic two handed frames, and
+    compares it with the old per finger loop (one unit_vector/angle_between call per finger) on a subset of frames.
+    Run it with:
+            python benchmarks/bench_gesture_kernel.py [number of frames]
+"""
+## Finds the relative path to the modules in the project root
+import os, sys, inspect
+src_dir = os.path.dirname(inspect.getfile(inspect.currentframe()))
+sys.path.insert(0, os.path.abspath(os.path.join(src_dir, '..')))
+
+import time
+import numpy as np
+
+import gesture_kernel
+
+
+def syntheticDirections(n_frames, n_hands=2, seed=0):
+    """
+        Returns random bone directions shaped (n_frames, n_hands, 5, 4, 3) where about half of the hands are fists.
+    """
+    rng = np.random.RandomState(seed)
+    directions = np.empty((n_frames, n_hands, 5, 4, 3), dtype=np.float32)
+    directions[..., 0, :] = (0.0, 0.0, -1.0)
+    bend = np.where(rng.rand(n_frames, n_hands, 1) > 0.5, 1.6, 0.3) + rng.normal(0, 0.1, (n_frames, n_hands, 5))
+    for bone in range(1, 4):
+        angle = bend * bone
+        directions[..., bone, 0] = 0.0
+        directions[..., bone, 1] = -np.sin(angle)
+        directions[..., bone, 2] = -np.cos(angle)
+    return directions
+
+
+def loopClassify(directions):
+    """
+        The old per hand, per finger computation from gesture_reader, applied to numpy input.
+    """
+    def unit_vector(vector):
+        return vector / np.linalg.norm(vector)
+
+    def angle_between(v1, v2):
+        v1_u = unit_vector(v1)
+        v2_u = unit_vector(v2)
+        return np.arccos(np.clip(np.dot(v1_u, v2_u), -1.0, 1.0))
+
+    fist = np.empty(directions.shape[:2], dtype=bool)
+    for ff in range(directions.shape[0]):
+        for hh in range(directions.shape[1]):
+            angle_array = np.zeros(5)
+            for ii in range(5):
+                angle_array[ii] = angle_between(directions[ff, hh, ii, 0], directions[ff, hh, ii, 1])
+            fist[ff, hh] = np.mean(angle_array[1:-1]) > 1.3
+    return fist
+
+
+def main():
+    n_frames = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    directions = syntheticDirections(n_frames)
+
+    start = time.time()
+    angles, fist = gesture_kernel.classifyFist(directions)
+    batch_time = time.time() - start
+
+    n_loop = min(n_frames, 5000)
+    start = time.time()
+    loop_fist = loopClassify(directions[:n_loop])
+    loop_time = (time.time() - start) * n_frames / float(n_loop)
+
+    assert (loop_fist == fist[:n_loop]).all()
+    print("frames: %d, hands per frame: %d, fists: %d" % (n_frames, directions.shape[1], fist.sum()))
+    print("batch kernel:     %8.2f s (%.0f frames/s)" % (batch_time, n_frames / batch_time))
+    print("per finger loop:  %8.2f s (extrapolated from %d frames)" % (loop_time, n_loop))
+
+
+if __name__ == "__main__":
+    main()
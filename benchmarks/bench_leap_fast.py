@@ -0,0 +1,86 @@
+"""
+Description:
+    Compares the SWIG proxy properties in Leap.py with the direct getters in leap_fast.py on a real Leap frame with
+    at least one hand. The frame is taken from a recording made with leap_recorder.py, or from a connected device if
+    no recording is given. This needs the LeapPython library, it cannot run with the stand-ins.
+    Run it with:
+            python benchmarks/bench_leap_fast.py [session.leap]
+"""
+## Finds the relative path to the modules in the project root
+import os, sys, inspect
+src_dir = os.path.dirname(inspect.getfile(inspect.currentframe()))
+sys.path.insert(0, os.path.abspath(os.path.join(src_dir, '..')))
+
+import time
+import timeit
+import numpy as np
+
+import hand_snapshot
+import leap_fast
+Leap = leap_fast.Leap  # Imported through leap_fast, which adds the LeapPython library path
+
+
+def frameWithHand(path=None, timeout=10.0):
+    """
+        Returns the first frame with a hand from a recording or from a connected device.
+    """
+    if path is not None:
+        import leap_recorder
+        controller = leap_recorder.ReplayController(path, realtime=False)
+        while controller.step():
+            frame = controller.frame()
+            if not frame.hands.is_empty:
+                return frame
+        raise RuntimeError("No frame with a hand in %s" % path)
+    controller = Leap.Controller()
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        frame = controller.frame()
+        if frame.is_valid and not frame.hands.is_empty:
+            return frame
+        time.sleep(0.05)
+    raise RuntimeError("No hand seen on the device within %g s" % timeout)
+
+
+def proxyBoneDirections(hand):
+    directions = np.empty((5, 4, 3), dtype=np.float32)
+    ii = 0
+    for finger in hand.fingers:
+        for jj in range(4):
+            directions[ii, jj] = finger.bone(jj).direction.to_tuple()
+        ii = ii + 1
+    return directions
+
+
+def timeCall(function, number):
+    return min(timeit.repeat(function, number=number, repeat=5)) / number
+
+
+def main():
+    if not leap_fast.AVAILABLE:
+        raise RuntimeError("LeapPython is not available")
+    frame = frameWithHand(sys.argv[1] if len(sys.argv) > 1 else None)
+    hand = frame.hands[0]
+    vector = hand.palm_position
+    bone = hand.fingers[1].bone(1)
+    assert np.allclose(proxyBoneDirections(hand), leap_fast.handBoneDirections(hand))
+
+    cases = [
+        ('Vector.x', lambda: vector.x, lambda: leap_fast.vectorX(vector), 200000),
+        ('Vector.to_tuple()', vector.to_tuple, lambda: leap_fast.vectorTuple(vector), 100000),
+        ('Bone.direction', lambda: bone.direction, lambda: leap_fast.boneDirection(bone), 100000),
+        ('Hand.palm_position', lambda: hand.palm_position, lambda: leap_fast.handPalmPosition(hand), 100000),
+        ('bone directions (5,4,3)', lambda: proxyBoneDirections(hand),
+         lambda: leap_fast.handBoneDirections(hand), 2000),
+        ('frame snapshot', lambda: hand_snapshot.snapshotFrame(frame),
+         lambda: leap_fast.snapshotFrame(frame), 2000),
+    ]
+    print("%-26s %12s %12s %9s" % ('access', 'proxy [us]', 'direct [us]', 'speedup'))
+    for name, proxy, direct, number in cases:
+        proxy_time = timeCall(proxy, number)
+        direct_time = timeCall(direct, number)
+        print("%-26s %12.3f %12.3f %8.1fx" % (name, proxy_time * 1e6, direct_time * 1e6, proxy_time / direct_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Description:
+    Checks leap_gestures.GestureDispatcher on a scripted stream of native Leap gestures from the stand-in controller
+    and times it. Swipes and circles last several frames (START, UPDATE..., STOP) and overlap each other, taps are a
+    single STOP. The dispatcher is polled with random stalls of up to --max-stall frames in between, like a main loop
+    that is busy, and must still deliver every gesture exactly once with START, at most one UPDATE per poll and STOP,
+    in that order and with nothing after the STOP.
+    Run it with:
+            python benchmarks/bench_leap_gestures.py --frames 20000 --max-stall 20
+"""
+## Finds the relative path to the modules in the project root
+import os, sys, inspect
+src_dir = os.path.dirname(inspect.getfile(inspect.currentframe()))
+sys.path.insert(0, os.path.abspath(os.path.join(src_dir, '..')))
+sys.path.insert(0, os.path.abspath(src_dir))
+
+import standins
+standins.installStandins()
+
+import argparse
+import collections
+import time
+import numpy as np
+
+import Leap
+import leap_gestures
+
+timer = getattr(time, 'perf_counter', time.time)
+
+
+class GestureScript(object):
+    """
+        Random overlapping gestures, returned frame by frame as stand-in Leap.Gestures.
+    """
+
+    def __init__(self, rng, start_probability=0.05, min_frames=5, max_frames=60):
+        self.rng = rng
+        self.start_probability = start_probability
+        self.min_frames = min_frames
+        self.max_frames = max_frames
+        self.running = {}  # id -> [type, frames left, duration]
+        self.next_id = 1
+        self.types = {}  # id -> type of every gesture that was made
+
+    def gesture(self, gesture_type, state, gesture_id, duration):
+        return Leap.Gesture(gesture_type, state, gesture_id, duration, position=Leap.Vector(),
+                            start_position=Leap.Vector(), direction=Leap.Vector(0.0, 0.0, -1.0), speed=500.0,
+                            center=Leap.Vector(), normal=Leap.Vector(0.0, 0.0, 1.0), progress=duration * 1e-6,
+                            radius=30.0, pointable=Leap.Pointable())
+
+    def frameGestures(self, frame_duration, stop=False):
+        rng = self.rng
+        gestures = []
+        for gesture_id in sorted(self.running):
+            gesture_type, frames_left, duration = self.running[gesture_id]
+            duration += frame_duration
+            if frames_left == 1:
+                gestures.append(self.gesture(gesture_type, Leap.Gesture.STATE_STOP, gesture_id, duration))
+                del self.running[gesture_id]
+            else:
+                gestures.append(self.gesture(gesture_type, Leap.Gesture.STATE_UPDATE, gesture_id, duration))
+                self.running[gesture_id] = [gesture_type, frames_left - 1, duration]
+        if not stop and rng.rand() < self.start_probability:
+            gesture_type = leap_gestures.GESTURE_TYPES[rng.randint(len(leap_gestures.GESTURE_TYPES))]
+            gesture_id = self.next_id
+            self.next_id += 1
+            self.types[gesture_id] = gesture_type
+            if gesture_type in (leap_gestures.SWIPE, leap_gestures.CIRCLE):
+                gestures.append(self.gesture(gesture_type, Leap.Gesture.STATE_START, gesture_id, 0))
+                self.running[gesture_id] = [gesture_type, rng.randint(self.min_frames, self.max_frames), 0]
+            else:
+                gestures.append(self.gesture(gesture_type, Leap.Gesture.STATE_STOP, gesture_id, 0))
+        return gestures
+
+
+def checkEvents(events, types):
+    """
+        Asserts that the events of every gesture are START, UPDATEs, STOP for swipes and circles and a single STOP for
+        taps, and returns the number of UPDATEs.
+    """
+    states = collections.defaultdict(list)
+    for event in events:
+        assert leap_gestures.EVENT_TYPES[type(event)] == types[event.id], event
+        states[event.id].append(event.state)
+    assert sorted(states) == sorted(types), "Gestures were lost or invented"
+    updates = 0
+    for gesture_id, gesture_states in states.items():
+        if types[gesture_id] in (leap_gestures.SWIPE, leap_gestures.CIRCLE):
+            assert gesture_states[0] == leap_gestures.STATE_START, (gesture_id, gesture_states)
+            assert all(state == leap_gestures.STATE_UPDATE for state in gesture_states[1:-1]), gesture_states
+            updates += len(gesture_states) - 2
+        else:
+            assert len(gesture_states) == 1, (gesture_id, gesture_states)
+        assert gesture_states[-1] == leap_gestures.STATE_STOP, (gesture_id, gesture_states)
+    return updates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=20000, help='Number of frames')
+    parser.add_argument('--max-stall', type=int, default=20, help='Most frames that pass between two polls')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.RandomState(args.seed)
+    controller = Leap.Controller(n_hands=0, history_size=max(60, 2 * args.max_stall))
+    script = GestureScript(rng)
+    dispatcher = leap_gestures.GestureDispatcher()
+    events = []
+    for gesture_type in leap_gestures.GESTURE_TYPES:
+        dispatcher.addHandler(gesture_type, events.append)
+    dispatcher.enable(controller)
+    frame_duration = int(1e6 / controller.frame_rate)
+
+    poll_time = 0.0
+    polls = 0
+    entries = 0
+    next_poll = 1
+    frame_count = 0
+    while frame_count < args.frames or script.running:
+        frame = controller.makeFrame(script.frameGestures(frame_duration, frame_count >= args.frames))
+        entries += len(frame.gesture_list)
+        controller.pushFrame(frame)
+        frame_count += 1
+        next_poll -= 1
+        if next_poll == 0 or not script.running and frame_count >= args.frames:
+            start = timer()
+            dispatcher.dispatch(controller.frame())
+            poll_time += timer() - start
+            polls += 1
+            next_poll = rng.randint(1, args.max_stall + 1)
+
+    updates = checkEvents(events, script.types)
+    print("%d frames, %d polls with up to %d frames in between, %d gestures" % (frame_count, polls, args.max_stall,
+                                                                                len(script.types)))
+    print("gesture entries in the frames: %d, events delivered: %d (%d updates), duplicates dropped: %d" % (
+        entries, dispatcher.delivered, updates, dispatcher.duplicates))
+    print("dispatch: %8.2f us per poll" % (poll_time / polls * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Description:
+    Compares reading the Leap infrared images through Image.data, which allocates a buffer and copies the image on
+    every access, with the zero-copy views of leap_images. It checks that the views share the memory of the image,
+    are read-only and keep their frame alive after every other reference to it is gone, then times the per frame cost
+    of both cameras and of a simple image statistic on them. By default it runs on the stand-in controller. With
+    --device it uses a connected Leap, which needs the LeapPython library.
+    Run it with:
+            python benchmarks/bench_leap_images.py --frames 2000
+            python benchmarks/bench_leap_images.py --device
+"""
+## Finds the relative path to the modules in the project root
+import os, sys, inspect
+src_dir = os.path.dirname(inspect.getfile(inspect.currentframe()))
+sys.path.insert(0, os.path.abspath(os.path.join(src_dir, '..')))
+sys.path.insert(0, os.path.abspath(src_dir))
+
+if '--device' not in sys.argv:
+    import standins
+    standins.installStandins()
+
+import argparse
+import gc
+import time
+import weakref
+import numpy as np
+
+import leap_images
+Leap = leap_images.Leap
+
+timer = getattr(time, 'perf_counter', time.time)
+
+
+def nextFrame(controller, device, last_id):
+    """
+        Returns the next frame with images, advancing the stand-in controller or waiting for the device.
+    """
+    while True:
+        if not device:
+            controller.advance()
+        frame = controller.frame()
+        if frame.id != last_id and len(frame.images) >= 2:
+            return frame
+        time.sleep(0.001)
+
+
+def copyImage(image, device):
+    """
+        Reads the pixels of an image through Image.data into a numpy array. The byte_array of Leap.py is not a buffer,
+        so on the device it has to be read one element at a time.
+    """
+    data = image.data
+    shape = (image.height, image.width)
+    if not device:
+        return np.frombuffer(bytes(data), dtype=np.uint8).reshape(shape)
+    size = shape[0] * shape[1]
+    return np.fromiter((data[ii] for ii in range(size)), dtype=np.uint8, count=size).reshape(shape)
+
+
+def checkViews(controller, device):
+    """
+        Asserts that the views are zero-copy, read-only and keep their frame alive.
+    """
+    frame = nextFrame(controller, device, None)
+    left, right = leap_images.stereoArrays(frame)
+    assert left.shape == (frame.images[0].height, frame.images[0].width), left.shape
+    assert not left.flags.writeable
+    try:
+        left[0, 0] = 1
+        raise AssertionError("The view is writeable")
+    except ValueError:
+        pass
+    copy = copyImage(frame.images[0], device)
+    assert (copy == left).all(), "The view differs from Image.data"
+    if not device:
+        # Writes to the native buffer show up in the view, so it is the same memory
+        buffer = np.ctypeslib.as_array(frame.images[0].buffer)
+        buffer[:10] = 255 - buffer[:10]
+        assert (left.reshape(-1)[:10] == buffer[:10]).all(), "The view is a copy"
+        frame_ref = weakref.ref(frame)
+        expected = left.copy()
+        del frame, buffer, copy, right
+        for _ in range(3):
+            controller.advance()
+        # Drops the history of the controller, so only the view refers to the frame
+        controller.frames = controller.frames[-1:]
+        controller.frames[0].previous = None
+        gc.collect()
+        assert frame_ref() is not None, "The frame was freed while a view of its image exists"
+        assert (left == expected).all()
+        view = left[10:20]
+        del left
+        gc.collect()
+        assert frame_ref() is not None, "The frame was freed while a slice of the view exists"
+        del view
+        gc.collect()
+        assert frame_ref() is None, "The frame is kept alive after all views are gone"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=2000, help='Number of frames timed')
+    parser.add_argument('--device', action='store_true', help='Use a connected Leap instead of the stand-in')
+    args = parser.parse_args()
+
+    controller = Leap.Controller()
+    leap_images.enableImages(controller)
+    checkViews(controller, args.device)
+
+    copy_time = view_time = stack_time = copy_stat_time = view_stat_time = 0.0
+    stereo = None
+    frame_id = None
+    for _ in range(args.frames):
+        frame = nextFrame(controller, args.device, frame_id)
+        frame_id = frame.id
+        images = frame.images
+        width, height = images[0].width, images[0].height  # For the printout
+
+        start = timer()
+        copies = [copyImage(images[ii], args.device) for ii in range(2)]
+        copy_time += timer() - start
+        start = timer()
+        copies[0].mean() + copies[1].mean()
+        copy_stat_time += timer() - start
+
+        start = timer()
+        views = leap_images.stereoArrays(frame)
+        view_time += timer() - start
+        start = timer()
+        views[0].mean() + views[1].mean()
+        view_stat_time += timer() - start
+
+        start = timer()
+        stereo = leap_images.stereoStack(frame, out=stereo)
+        stack_time += timer() - start
+
+    n = float(args.frames)
+    print("%d frames with two %dx%d images (%s)" % (args.frames, width, height,
+                                                    'device' if args.device else 'stand-in'))
+    print("Image.data copies of both images: %8.2f us per frame" % (copy_time / n * 1e6))
+    print("zero-copy views of both images:   %8.2f us per frame" % (view_time / n * 1e6))
+    print("stereoStack into a reused array:  %8.2f us per frame" % (stack_time / n * 1e6))
+    print("mean brightness, copies:          %8.2f us per frame (total %.0f frames/s)" % (
+        copy_stat_time / n * 1e6, n / (copy_time + copy_stat_time)))
+    print("mean brightness, views:           %8.2f us per frame (total %.0f frames/s)" % (
+        view_stat_time / n * 1e6, n / (view_time + view_stat_time)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Description:
+    Measures the throughput of snapshot_ring.SnapshotRing and the lag of its readers across processes. A producer
+    process runs the stand-in Leap controller with a SampleListener that writes every classified frame to the ring,
+    as fast as it can or at --rate frames per second, and several reader processes follow it with RingReader. Every
+    reader checks that it gets the frames in order, touches the hand data of every frame through the zero-copy view
+    and records how long after publishing it saw each frame and how many frames it was behind. Readers that are slower
+    than the producer, see --reader-work, lose the frames that were overwritten and count them, also the frames that
+    were overwritten while they were read, which RingReader.confirm finds after reading them.
+    Run it with:
+            python benchmarks/bench_snapshot_ring.py --frames 100000 --readers 3
+            python benchmarks/bench_snapshot_ring.py --frames 20000 --rate 115 --readers 2
+"""
+## Finds the relative path to the modules in the project root
+import os, sys, inspect
+src_dir = os.path.dirname(inspect.getfile(inspect.currentframe()))
+sys.path.insert(0, os.path.abspath(os.path.join(src_dir, '..')))
+sys.path.insert(0, os.path.abspath(src_dir))
+
+import argparse
+import multiprocessing
+import time
+import numpy as np
+
+import snapshot_ring
+
+timer = getattr(time, 'perf_counter', time.time)
+
+
+def standinProducer(name, n_frames, rate, start_event, results):
+    """
+        Stand-in acquisition process: drives the stand-in controller and writes through a ring listener.
+    """
+    import standins
+    standins.installStandins()
+    import Leap
+    import gesture_reader
+    ring = snapshot_ring.SnapshotRing(name)
+    controller = Leap.Controller(n_hands=2)
+    listener = snapshot_ring.ringListenerClass(gesture_reader.SampleListener)(ring=ring)
+    controller.add_listener(listener)
+    period = 1.0 / rate if rate else 0.0
+    start_event.wait()
+    start = timer()
+    for ii in range(n_frames):
+        if period:
+            delay = start + ii * period - timer()
+            if delay > 0:
+                time.sleep(delay)
+        controller.advance()
+    elapsed = timer() - start
+    controller.remove_listener(listener)
+    del listener
+    ring.close()
+    results.put(('producer', n_frames / elapsed))
+
+
+def reader(index, name, n_frames, poll_interval, work, start_event, results):
+    """
+        Reader process: follows the ring until the producer wrote n_frames and reports its lag.
+    """
+    ring = snapshot_ring.SnapshotRing(name)
+    ring_reader = snapshot_ring.RingReader(ring, from_start=True)
+    delays = []
+    behind = []
+    fists = 0
+    previous = -1
+    start_event.wait()
+    while ring_reader.next_sequence < n_frames:
+        frames = ring_reader.poll()
+        if not frames:
+            time.sleep(poll_interval)
+            continue
+        now = time.time()
+        written = ring.written()
+        for sequence, slot in frames:
+            assert sequence > previous, "Frames out of order"
+            previous = sequence
+            snapshot = slot['snapshot']
+            hand_count = snapshot['hand_count']
+            hand_fists = int(slot['hand_fists'][:hand_count].sum())
+            snapshot['hands']['bone_directions'][:hand_count].mean()
+            published = float(slot['published'])
+            if work:
+                end = timer() + work
+                while timer() < end:
+                    pass
+            if not ring_reader.confirm(sequence):
+                continue
+            fists += hand_fists
+            delays.append(now - published)
+            behind.append(written - 1 - sequence)
+        del frames, slot, snapshot
+    if not delays:
+        delays = behind = [float('nan')]
+    results.put(('reader', index, ring_reader.read, ring_reader.lost, fists, np.percentile(delays, [50, 99]),
+                 np.percentile(behind, [50, 99])))
+    ring.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=100000, help='Number of frames the producer writes')
+    parser.add_argument('--rate', type=float, default=0.0, help='Frames per second, 0 for as fast as possible')
+    parser.add_argument('--readers', type=int, default=3, help='Number of reader processes')
+    parser.add_argument('--capacity', type=int, default=1024, help='Number of slots in the ring')
+    parser.add_argument('--poll-interval', type=float, default=0.0005, help='Seconds a reader sleeps when idle')
+    parser.add_argument('--reader-work', type=float, default=0.0, help='Seconds a reader spends on every frame')
+    args = parser.parse_args()
+
+    ring = snapshot_ring.SnapshotRing(capacity=args.capacity, create=True)
+    start_event = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=standinProducer,
+                                         args=(ring.name, args.frames, args.rate, start_event, results))]
+    processes += [multiprocessing.Process(target=reader, args=(ii, ring.name, args.frames, args.poll_interval,
+                                                               args.reader_work, start_event, results))
+                  for ii in range(args.readers)]
+    for process in processes:
+        process.start()
+    time.sleep(1.0)  # Lets the processes import and attach before the first frame
+    start_event.set()
+    reports = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    ring.close()
+
+    print("%d frames, ring of %d slots of %d bytes, %d readers" % (args.frames, args.capacity,
+                                                                    snapshot_ring.SLOT_DTYPE.itemsize, args.readers))
+    for report in reports:
+        if report[0] == 'producer':
+            print("producer: %.0f frames/s" % report[1])
+    print("%-8s %8s %8s %8s %20s %16s" % ('reader', 'read', 'lost', 'fists', 'delay p50/p99 us', 'behind p50/p99'))
+    for report in sorted(report for report in reports if report[0] == 'reader'):
+        _, index, read, lost, fists, delays, behind = report
+        print("%-8d %8d %8d %8d %9.1f / %8.1f %7d / %6d" % (index, read, lost, fists, delays[0] * 1e6,
+                                                          delays[1] * 1e6, behind[0], behind[1]))
+
+
+if __name__ == "__main__":
+    main()
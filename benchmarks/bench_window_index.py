@@ -0,0 +1,94 @@
+"""
+Description:
+    Checks window_index.WindowIndex against the fake window manager in window_backend.FakeWindowBackend and times it.
+    A desktop of random windows is created, then random window manager events (windows opened, closed, raised and
+    moved) are applied while the index follows them through its event callback. After every event the index has to
+    give the same window under random points as a linear search through the stacking order of the fake window
+    manager. The time of a hit test and of an event update is printed next to the linear search.
+    Run it with:
+            python benchmarks/bench_window_index.py --windows 50 --events 5000
+"""
+## Finds the relative path to the modules in the project root
+import os, sys, inspect
+src_dir = os.path.dirname(inspect.getfile(inspect.currentframe()))
+sys.path.insert(0, os.path.abspath(os.path.join(src_dir, '..')))
+
+import argparse
+import time
+import numpy as np
+
+import window_backend
+import window_index
+
+timer = getattr(time, 'perf_counter', time.time)
+SCREEN = (2560, 1440)
+
+
+def randomRect(rng):
+    width = rng.randint(200, SCREEN[0] // 2)
+    height = rng.randint(150, SCREEN[1] // 2)
+    left = rng.randint(-width // 4, SCREEN[0] - width // 2)
+    top = rng.randint(0, SCREEN[1] - height // 2)
+    return (left, top, left + width, top + height)
+
+
+def randomEvent(rng, backend, next_hwnd):
+    """
+        Applies a random window manager event to the fake backend and returns the next free window handle.
+    """
+    hwnds = backend.stacking
+    action = rng.randint(4) if len(hwnds) > 1 else 0
+    if action == 0:
+        backend.createWindow(next_hwnd, randomRect(rng))
+        return next_hwnd + 1
+    hwnd = hwnds[rng.randint(len(hwnds))]
+    if action == 1:
+        backend.destroyWindow(hwnd)
+    elif action == 2:
+        backend.raiseWindow(hwnd)
+    else:
+        backend.externalMove(hwnd, randomRect(rng))
+    return next_hwnd
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--windows', type=int, default=50, help='Number of windows on the desktop at the start')
+    parser.add_argument('--events', type=int, default=5000, help='Number of window manager events')
+    parser.add_argument('--queries', type=int, default=20, help='Hit tests checked after every event')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.RandomState(args.seed)
+    backend = window_backend.FakeWindowBackend(dict((hwnd, randomRect(rng)) for hwnd in range(1, args.windows + 1)))
+    index = window_index.WindowIndex(backend)
+    next_hwnd = args.windows + 1
+
+    event_time = 0.0
+    index_time = 0.0
+    linear_time = 0.0
+    n_queries = 0
+    for _ in range(args.events):
+        start = timer()
+        next_hwnd = randomEvent(rng, backend, next_hwnd)
+        event_time += timer() - start
+        points = rng.uniform((0, 0), SCREEN, (args.queries, 2))
+        for x, y in points:
+            start = timer()
+            found = index.windowAt(x, y)
+            index_time += timer() - start
+            start = timer()
+            expected = backend.windowAt(x, y)
+            linear_time += timer() - start
+            assert found == expected, (x, y, found, expected)
+        n_queries += len(points)
+    assert backend.calls['stackingOrder'] == 1, "The index was rebuilt instead of updated from the events"
+
+    print("%d events, %d hit tests checked, %d windows at the end" % (args.events, n_queries, len(index)))
+    print("event incl. index update: %8.2f us" % (event_time / args.events * 1e6))
+    print("hit test, index:          %8.2f us" % (index_time / n_queries * 1e6))
+    print("hit test, linear search:  %8.2f us" % (linear_time / n_queries * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Description:
+    Checks and times the X11 window backend against a real X server, e.g. a virtual one started by xvfb-run. Two
+    overlapping windows are created, the bottom one is dragged along a path with moveWindow, and the benchmark checks
+    that windowRect reads back the last position, that windowAt finds the window on top, and that the dragged window
+    was not raised above the other one. The move rate is printed with and without batching, it has to be well above
+    240 Hz to keep up with the eye tracker.
+    Run it with:
+            xvfb-run -a python benchmarks/bench_x11_backend.py --moves 5000
+"""
+## Finds the relative path to the modules in the project root
+import os, sys, inspect
+src_dir = os.path.dirname(inspect.getfile(inspect.currentframe()))
+sys.path.insert(0, os.path.abspath(os.path.join(src_dir, '..')))
+
+import argparse
+import time
+
+import window_backend
+
+timer = getattr(time, 'perf_counter', time.time)
+
+
+def createWindow(backend, x, y, width, height):
+    """
+        Creates and maps a plain top level window and returns its X window id.
+    """
+    window = backend.root.create_window(x, y, width, height, 0, backend.display.screen().root_depth,
+                                        override_redirect=True)
+    window.map()
+    backend.display.sync()
+    return window.id
+
+
+def dragWindow(backend, hwnd, moves, width, height):
+    """
+        Moves a window along a diagonal path and returns the number of moves per second.
+    """
+    start = timer()
+    for ii in range(moves):
+        offset = ii % 200
+        backend.moveWindow(hwnd, 100 + offset, 100 + offset, width, height)
+        backend.flush()
+    backend.display.sync()
+    return moves / (timer() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--moves', type=int, default=5000)
+    args = parser.parse_args()
+
+    results = {}
+    for batch in (False, True):
+        backend = window_backend.X11Backend(batch=batch)
+        dragged = createWindow(backend, 100, 100, 400, 300)
+        on_top = createWindow(backend, 600, 100, 400, 300)
+        results[batch] = dragWindow(backend, dragged, args.moves, 400, 300)
+
+        last = (args.moves - 1) % 200
+        assert backend.windowRect(dragged) == (100 + last, 100 + last, 500 + last, 400 + last)
+        assert backend.windowAt(150 + last, 150 + last) == dragged
+        # Moving the dragged window under the other one must leave the other one on top
+        backend.moveWindow(dragged, 600, 100, 400, 300)
+        backend.flush()
+        backend.display.sync()
+        assert backend.windowAt(700, 200) == on_top
+        backend.display.close()
+
+    print("moves per second without batching: %.0f, with batching: %.0f" % (results[False], results[True]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,423 @@
+"""
+Description:
+    Synthetic stand-ins for the hardware and OS dependencies of the project, so the control loop can be benchmarked
+    on any machine. installStandins() puts fake versions of Leap, tobii_research, pygaze, win32gui, pynput, pyautogui
+    and keyboard into sys.modules, after which eye_gaze_gesture_mini_project and gesture_reader can be imported.
+    The fakes only implement the parts of the real APIs that this project uses.
+    An example of how to use it:
+            import standins
+            standins.installStandins()
+            import eye_gaze_gesture_mini_project as app
+"""
+
+import ctypes
+import sys
+import time
+import types
+import numpy as np
+
+
+class Vector(object):
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x = x
+        self.y = y
+        self.z = z
+
+    def to_tuple(self):
+        return (self.x, self.y, self.z)
+
+    def to_float_array(self):
+        return [self.x, self.y, self.z]
+
+
+class Bone(object):
+    def __init__(self, bone_type, direction):
+        self.type = bone_type
+        self.direction = Vector(*direction)
+
+
+class Finger(object):
+    def __init__(self, finger_type, directions):
+        self.type = finger_type
+        self.id = finger_type
+        self.bones = [Bone(jj, directions[jj]) for jj in range(4)]
+
+    def bone(self, index):
+        return self.bones[index]
+
+
+class Hand(object):
+    def __init__(self, hand_id, directions, is_left=False, palm_position=(0.0, 200.0, 0.0),
+                 palm_normal=(0.0, -1.0, 0.0), palm_velocity=(0.0, 0.0, 0.0), grab_strength=0.0,
+                 pinch_strength=0.0):
+        self.id = hand_id
+        self.is_left = is_left
+        self.is_right = not is_left
+        self.is_valid = True
+        self.fingers = ItemList([Finger(ii, directions[ii]) for ii in range(5)])
+        self.palm_position = Vector(*palm_position)
+        self.palm_normal = Vector(*palm_normal)
+        self.palm_velocity = Vector(*palm_velocity)
+        self.grab_strength = grab_strength
+        self.pinch_strength = pinch_strength
+
+
+class ItemList(list):
+    @property
+    def is_empty(self):
+        return len(self) == 0
+
+
+class Pointable(object):
+    def __init__(self, direction=(0.0, 0.0, -1.0)):
+        self.direction = Vector(*direction)
+
+
+class Gesture(object):
+    """
+        Fake Leap.Gesture. The attributes of the typed gestures, like speed of a swipe, are given as keyword
+        arguments, and the typed gesture classes below return the gesture itself.
+    """
+    TYPE_INVALID, TYPE_SWIPE, TYPE_CIRCLE, TYPE_SCREEN_TAP, TYPE_KEY_TAP = -1, 1, 4, 5, 6
+    STATE_INVALID, STATE_START, STATE_UPDATE, STATE_STOP = -1, 1, 2, 3
+
+    def __init__(self, gesture_type, state, gesture_id, duration=0, hands=(), **attributes):
+        self.type = gesture_type
+        self.state = state
+        self.id = gesture_id
+        self.duration = duration
+        self.duration_seconds = duration * 1e-6
+        self.hands = ItemList(hands)
+        self.frame = None  # Set when the gesture is added to a frame
+        self.is_valid = True
+        self.__dict__.update(attributes)
+
+
+def typedGesture(gesture):
+    return gesture
+
+
+class Image(object):
+    """
+        Fake Leap.Image of an infrared camera, with its pixels and distortion map in ctypes buffers like the native
+        images. data copies the pixels into a new buffer on every access, like the byte_array of Leap.py.
+    """
+
+    def __init__(self, image_id, width=640, height=240, bytes_per_pixel=1, distortion_size=64, fill=0):
+        self.id = image_id
+        self.sequence_id = 0
+        self.width = width
+        self.height = height
+        self.bytes_per_pixel = bytes_per_pixel
+        self.distortion_width = 2 * distortion_size
+        self.distortion_height = distortion_size
+        self.is_valid = True
+        self.buffer = (ctypes.c_ubyte * (width * height * bytes_per_pixel))()
+        ctypes.memset(self.buffer, fill, ctypes.sizeof(self.buffer))
+        self.distortion_buffer = (ctypes.c_float * (self.distortion_width * self.distortion_height))()
+        self.data_pointer = ctypes.addressof(self.buffer)
+        self.distortion_pointer = ctypes.addressof(self.distortion_buffer)
+
+    @property
+    def data(self):
+        return bytearray(self.buffer)
+
+    @property
+    def distortion(self):
+        return (ctypes.c_float * len(self.distortion_buffer)).from_buffer_copy(self.distortion_buffer)
+
+
+class Frame(object):
+    def __init__(self, frame_id=-1, timestamp=0, hands=(), gestures=(), images=()):
+        self.id = frame_id
+        self.timestamp = timestamp
+        self.hands = ItemList(hands)
+        self.is_valid = frame_id >= 0
+        self.gesture_list = ItemList(gestures)
+        self.images = ItemList(images)
+        for gesture in gestures:
+            gesture.frame = self
+        self.previous = None  # The frame before it while it is in the history of the controller
+
+    def gestures(self, sinceFrame=None):
+        """
+            The gestures of this frame, or of all frames after sinceFrame up to this frame that are still in the
+            history, the newest frame first like the Leap service.
+        """
+        if sinceFrame is None:
+            return ItemList(self.gesture_list)
+        gestures = ItemList()
+        frame = self
+        while frame is not None and frame.id > sinceFrame.id:
+            gestures.extend(frame.gesture_list)
+            frame = frame.previous
+        return gestures
+
+
+class Listener(object):
+    def __init__(self):
+        pass
+
+    def on_init(self, controller):
+        pass
+
+    def on_connect(self, controller):
+        pass
+
+    def on_disconnect(self, controller):
+        pass
+
+    def on_exit(self, controller):
+        pass
+
+    def on_frame(self, controller):
+        pass
+
+
+def handDirections(bend):
+    """
+        Returns (5,4,3) bone directions of a hand whose fingers are bent by the given angle in radians per joint.
+    """
+    directions = np.zeros((5, 4, 3))
+    for bone in range(4):
+        directions[:, bone] = (0.0, -np.sin(bend * bone), -np.cos(bend * bone))
+    return directions
+
+
+class Controller(object):
+    """
+        Fake Leap.Controller producing synthetic frames. Every call to advance creates a new frame and dispatches
+        on_frame to the listeners, like the Leap service does. Benchmarks can call makeFrame and pushFrame separately
+        to leave the cost of building the fake objects out of the measurement. The hand alternates between open and
+        fist every fist_period frames.
+    """
+
+    POLICY_DEFAULT, POLICY_BACKGROUND_FRAMES, POLICY_IMAGES = 0, 1, 2
+
+    def __init__(self, frame_rate=115.0, fist_period=200, n_hands=1, history_size=60):
+        self.frame_rate = frame_rate
+        self.fist_period = fist_period
+        self.n_hands = n_hands
+        self.history_size = history_size
+        self.listeners = []
+        self.frames = [Frame()]
+        self.frame_id = 0
+        self.open_directions = handDirections(0.2)
+        self.fist_directions = handDirections(1.6)
+        self.enabled_gestures = set()
+        self.policy = 0
+
+    def makeFrame(self, gestures=()):
+        """
+            Creates the next synthetic frame without delivering it, with the given stand-in Gestures.
+        """
+        self.frame_id += 1
+        is_fist = (self.frame_id // self.fist_period) % 2 == 1
+        directions = self.fist_directions if is_fist else self.open_directions
+        hands = [Hand(hh + 1, directions, is_left=(hh == 1)) for hh in range(self.n_hands)]
+        images = ()
+        if self.policy & self.POLICY_IMAGES:
+            images = [Image(ii, fill=self.frame_id % 256) for ii in range(2)]
+        return Frame(self.frame_id, int(self.frame_id * 1e6 / self.frame_rate), hands, gestures, images)
+
+    def pushFrame(self, frame):
+        """
+            Makes frame the current frame and dispatches on_frame to the listeners.
+        """
+        frame.gesture_list = ItemList(gesture for gesture in frame.gesture_list
+                                      if gesture.type in self.enabled_gestures)
+        frame.previous = self.frames[-1] if self.frames[-1].is_valid else None
+        self.frames.append(frame)
+        if len(self.frames) > self.history_size:
+            del self.frames[0]
+            self.frames[0].previous = None
+        for listener in self.listeners:
+            listener.on_frame(self)
+
+    def advance(self):
+        self.pushFrame(self.makeFrame())
+
+    def frame(self, history=0):
+        if history < len(self.frames):
+            return self.frames[-1 - history]
+        return Frame()
+
+    def now(self):
+        return self.frames[-1].timestamp
+
+    def set_policy(self, policy):
+        self.policy |= policy
+
+    def clear_policy(self, policy):
+        self.policy &= ~policy
+
+    def is_policy_set(self, policy):
+        return bool(self.policy & policy)
+
+    def enable_gesture(self, type, enable=True):
+        if enable:
+            self.enabled_gestures.add(type)
+        else:
+            self.enabled_gestures.discard(type)
+
+    def is_gesture_enabled(self, type):
+        return type in self.enabled_gestures
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+        listener.on_init(self)
+        listener.on_connect(self)
+        return True
+
+    def remove_listener(self, listener):
+        self.listeners.remove(listener)
+        listener.on_exit(self)
+        return True
+
+
+class EyeTracker(object):
+    """
+        Fake PyGaze EyeTracker. sample() returns a gaze position that holds a fixation with some noise and jumps to a
+        new random fixation every fixation_length samples.
+    """
+
+    def __init__(self, display=None, resolution=(1600, 900), fixation_length=60, noise=15.0, seed=0, **kwargs):
+        self.resolution = resolution
+        self.fixation_length = fixation_length
+        self.noise = noise
+        self.rng = np.random.RandomState(seed)
+        self.n_samples = 0
+        self.fixation = (resolution[0] / 2.0, resolution[1] / 2.0)
+
+    def calibrate(self):
+        pass
+
+    def start_recording(self):
+        pass
+
+    def stop_recording(self):
+        pass
+
+    def close(self):
+        pass
+
+    def sample(self):
+        if self.n_samples % self.fixation_length == 0:
+            self.fixation = (self.rng.uniform(0, self.resolution[0]), self.rng.uniform(0, self.resolution[1]))
+        self.n_samples += 1
+        noise = self.rng.normal(0.0, self.noise, 2)
+        return (self.fixation[0] + noise[0], self.fixation[1] + noise[1])
+
+
+class Display(object):
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def close(self):
+        pass
+
+
+class Button(object):
+    left = 'left'
+    right = 'right'
+
+
+class MouseController(object):
+    """
+        Fake pynput.mouse.Controller, which counts the events it would have sent.
+    """
+
+    def __init__(self):
+        self.position = (0, 0)
+        self.presses = 0
+        self.releases = 0
+
+    def press(self, button):
+        self.presses += 1
+
+    def release(self, button):
+        self.releases += 1
+
+
+class Win32Gui(object):
+    """
+        Fake win32gui with a single window that can be moved.
+    """
+
+    def __init__(self):
+        self.rects = {1: (100, 100, 900, 700)}
+        self.foreground = 1
+        self.calls = 0
+
+    def GetForegroundWindow(self):
+        self.calls += 1
+        return self.foreground
+
+    def GetWindowRect(self, hwnd):
+        self.calls += 1
+        return self.rects[hwnd]
+
+    def MoveWindow(self, hwnd, x, y, width, height, repaint):
+        self.calls += 1
+        self.rects[hwnd] = (x, y, x + width, y + height)
+
+    def WindowFromPoint(self, point):
+        self.calls += 1
+        for hwnd, (left, top, right, bottom) in self.rects.items():
+            if left <= point[0] < right and top <= point[1] < bottom:
+                return hwnd
+        return 0
+
+    def GetAncestor(self, hwnd, flags):
+        return hwnd
+
+    def EnumWindows(self, callback, extra):
+        self.calls += 1
+        for hwnd in sorted(self.rects, reverse=True):
+            callback(hwnd, extra)
+
+    def IsWindowVisible(self, hwnd):
+        return hwnd in self.rects
+
+
+def makeModule(name, **attributes):
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    return module
+
+
+def installStandins():
+    """
+        Replaces the hardware and OS dependent modules in sys.modules with the fakes above and returns them by name.
+    """
+    win32gui = Win32Gui()
+    leap = makeModule('Leap', Listener=Listener, Controller=Controller, Frame=Frame, Hand=Hand, Finger=Finger,
+                      Bone=Bone, Vector=Vector, Pointable=Pointable, Image=Image, Gesture=Gesture,
+                      SwipeGesture=typedGesture, CircleGesture=typedGesture, ScreenTapGesture=typedGesture,
+                      KeyTapGesture=typedGesture)
+    pygaze = makeModule('pygaze')
+    pygaze.display = makeModule('pygaze.display', Display=Display)
+    pygaze.eyetracker = makeModule('pygaze.eyetracker', EyeTracker=EyeTracker)
+    pynput = makeModule('pynput')
+    pynput.mouse = makeModule('pynput.mouse', Button=Button, Controller=MouseController)
+    modules = {
+        'Leap': leap,
+        'tobii_research': makeModule('tobii_research', find_all_eyetrackers=lambda: [],
+                                     EYETRACKER_GAZE_DATA='gaze_data',
+                                     get_system_time_stamp=lambda: int(time.time() * 1e6)),
+        'pygaze': pygaze,
+        'pygaze.display': pygaze.display,
+        'pygaze.eyetracker': pygaze.eyetracker,
+        'pynput': pynput,
+        'pynput.mouse': pynput.mouse,
+        'win32gui': makeModule('win32gui', GetForegroundWindow=win32gui.GetForegroundWindow,
+                               GetWindowRect=win32gui.GetWindowRect, MoveWindow=win32gui.MoveWindow,
+                               WindowFromPoint=win32gui.WindowFromPoint, GetAncestor=win32gui.GetAncestor,
+                               EnumWindows=win32gui.EnumWindows, IsWindowVisible=win32gui.IsWindowVisible,
+                               fake=win32gui),
+        'pyautogui': makeModule('pyautogui', FAILSAFE=True, moveTo=lambda *args, **kwargs: None,
+                                mouseDown=lambda *args, **kwargs: None, position=lambda: (0, 0)),
+        'keyboard': makeModule('keyboard', is_pressed=lambda key: False),
+    }
+    sys.modules.update(modules)
+    return modules
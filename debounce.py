@@ -0,0 +1,98 @@
+"""
+Description:
+    A debounced on/off state machine for noisy per frame decisions, like the fist of a hand. getMajorityBool summed
+    the whole vote array and called math.ceil on every frame, and the vote array itself was rebuilt with np.roll and
+    np.put. Debouncer keeps the votes of the last window frames in a ring with a running count, so an update is a
+    constant amount of work. It enters the active state when at least enter_votes of the votes are True and leaves it
+    when at most exit_votes are True, so a value between the two keeps the current state (hysteresis). Minimum dwell
+    times keep it from toggling faster than a gesture can be made. Instead of only a level that has to be polled,
+    update returns START or END on the frame the state changes and calls the transition callbacks.
+    An example of how to use it:
+            fist = Debouncer(window=5, enter_votes=4, exit_votes=1, on_enter=grab, on_exit=release)
+            edge = fist.update(raw_fist, frame.timestamp * 1e-6)   # START, END or None
+            if fist.active:
+                ...
+"""
+
+START, END = 1, -1  # Edges returned by Debouncer.update
+
+
+class Debouncer(object):
+    """
+        Hysteresis and dwell time filter of a boolean signal with a running vote count.
+    """
+
+    def __init__(self, window=5, enter_votes=4, exit_votes=1, min_active=0.0, min_inactive=0.0, on_enter=None,
+                 on_exit=None):
+        """
+            input:
+                window - Number of most recent values that vote
+                enter_votes - Number of True votes at or above which the state becomes active
+                exit_votes - Number of True votes at or below which the state becomes inactive, lower than enter_votes
+                min_active - Minimum time the state stays active once entered, in the units of the timestamps
+                min_inactive - Minimum time the state stays inactive once left, in the units of the timestamps
+                on_enter - Optional function called as on_enter(timestamp) when the state becomes active
+                on_exit - Optional function called as on_exit(timestamp) when the state becomes inactive
+        """
+        if not 0 <= exit_votes < enter_votes <= window:
+            raise ValueError("Need 0 <= exit_votes < enter_votes <= window, got %r, %r, %r" % (
+                exit_votes, enter_votes, window))
+        self.window = int(window)
+        self.enter_votes = int(enter_votes)
+        self.exit_votes = int(exit_votes)
+        self.min_active = min_active
+        self.min_inactive = min_inactive
+        self.on_enter = on_enter
+        self.on_exit = on_exit
+        self.reset()
+
+    def reset(self, timestamp=None):
+        """
+            Clears the votes and makes the state inactive without calling on_exit.
+        """
+        self.votes = [False] * self.window
+        self.index = 0
+        self.count = 0
+        self.active = False
+        self.changed_at = timestamp  # Time of the last transition, None if there was none
+
+    def update(self, value, timestamp=0.0):
+        """
+            Adds a vote and returns START if the state became active, END if it became inactive, otherwise None.
+        """
+        value = bool(value)
+        index = self.index
+        self.count += value - self.votes[index]
+        self.votes[index] = value
+        index += 1
+        self.index = 0 if index == self.window else index
+
+        changed_at = self.changed_at
+        if self.active:
+            if self.count > self.exit_votes:
+                return None
+            if changed_at is not None and timestamp - changed_at < self.min_active:
+                return None
+            return self.exit(timestamp)
+        if self.count < self.enter_votes:
+            return None
+        if changed_at is not None and timestamp - changed_at < self.min_inactive:
+            return None
+        self.active = True
+        self.changed_at = timestamp
+        if self.on_enter is not None:
+            self.on_enter(timestamp)
+        return START
+
+    def exit(self, timestamp=0.0):
+        """
+            Leaves the active state right away, e.g. when the signal is lost, and returns END, or None if the state
+            was not active.
+        """
+        if not self.active:
+            return None
+        self.active = False
+        self.changed_at = timestamp
+        if self.on_exit is not None:
+            self.on_exit(timestamp)
+        return END
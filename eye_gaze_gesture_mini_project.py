@@ -11,8 +11,16 @@ Authors:
 import pyautogui
 import keyboard  
 pyautogui.FAILSAFE = True # Drag mouse to upper left corner to trigger failsafe
-import win32gui
+import window_backend
+import window_index
 import gesture_reader 
+import gaze_buffer
+import gaze_filter
+import fixation_detector
+import tobii_gaze
+import latency
+import actuation
+import fusion_pipeline
 import tobii_research as tr
 
 from pygaze.display import Display
@@ -26,6 +34,14 @@ import pandas as pd
 
 global mouse
 mouse = Controller()
+global actuator
+actuator = actuation.PointerActuator(mouse, Button.left, deadband=1.0, max_rate=60.0)
+global windows, window_cache
+windows = window_backend.defaultBackend()
+window_cache = window_backend.WindowGeometryCache(windows, ttl=1.0)
+global window_layout
+# win32gui has no layout events, WindowFromPoint asks the window manager and is cheaper than reading every window
+window_layout = window_index.WindowIndex(windows) if windows.has_events else windows
 
 
 def calibrateEyeTrackerPyGaze():
@@ -44,6 +60,15 @@ def calibrateEyeTrackerPyGaze():
 
 
 
+def startEyeTracker():
+    """
+        Calibrates the eye tracker with PyGaze and starts recording. Used by the gaze process of the pipeline.
+    """
+    tracker = calibrateEyeTrackerPyGaze()
+    tracker.start_recording()
+    return tracker
+
+
 def avaliableEyeTrackers():
     """
         Checks for the available eye trackers connected using tobii SDK
@@ -62,23 +87,37 @@ def avaliableEyeTrackers():
 
 def grabObject(xy_pos = None):
     """
-        Clicks on the current position to get the window to be the window in the foreground
-        and returns that windows handle
+        Returns the handle of the window to drag. If xy_pos is given the window under it is looked up in window_layout
+        without sending any input. Otherwise, or if there is no window at xy_pos, it clicks on the current position to
+        get the window to be the window in the foreground and returns that windows handle
     """
+    if xy_pos is not None:
+        current_window = window_layout.windowAt(xy_pos[0], xy_pos[1])
+        if current_window is not None:
+            return current_window
     #pyautogui.moveTo(xy_pos)
     #pyautogui.mouseDown(button='left')
     #pyautogui.click();
     mouse.press(Button.left)
     mouse.release(Button.left)
-    current_window = win32gui.GetForegroundWindow()
+    current_window = windows.foregroundWindow()
     return current_window
 
 
+def releaseObject():
+    """
+        Releases the left mouse button that is held while a window is dragged. It is only sent if the actuator has
+        the button pressed.
+    """
+    actuator.release()
+
+
 def moveWin32Gui(pos, hwnd=None):
     
     """
-        Moves the window by using the Win32Gui. This produces a bug where the window is flashing because it is
-        being put on top of the window stack all the time. Only works with windows.
+        Moves the window by using the window backend, win32gui on Windows or X11 on Linux. With win32gui this
+        produces a bug where the window is flashing because it is being put on top of the window stack all the time,
+        the X11 backend moves the window without raising it.
     
     """
     pos = (int(pos[0]),int(pos[1]))
@@ -89,7 +128,7 @@ def moveWin32Gui(pos, hwnd=None):
     y_offset = offset[1]   
     w_window = size[0]
     h_window = size[1]
-    win32gui.MoveWindow(hwnd,x_pos+x_offset,y_pos+y_offset,w_window,h_window, False)
+    window_cache.moveWindow(hwnd,x_pos+x_offset,y_pos+y_offset,w_window,h_window)
     #print('Moving to',current_position)
         
 def movePyAutoGui(pos, hwnd=None):
@@ -112,9 +151,10 @@ def movePyAutoGui(pos, hwnd=None):
     #mouse.position = ((x_pos,y_pos))
     #mouse.press(Button.left)
         
-def movePynput(pos, hwnd=None):
+def movePynput(pos, hwnd=None, captures=None):
     """
-        Moves the window using Pynput. This is the current implementation as is does not bug when used with PyGaze
+        Moves the window using Pynput. This is the current implementation as is does not bug when used with PyGaze.
+        captures are the latency.captureTimes of the data pos was made from.
     """
     x_pos = pos[0]
     y_pos = pos[1]
@@ -122,8 +162,28 @@ def movePynput(pos, hwnd=None):
     #print('new x and y pos to move to',x_pos-x_offset+size[1]/2,y_pos-y_offset+10)
     #mouse.position = ((x_pos-x_offset+size[1]/2,y_pos-y_offset+10))
     mouse.position = ((x_pos,y_pos))
+    if latency.tracker.enabled:
+        latency.tracker.mark('movePynput', captures)
     mouse.press(Button.left)
 
+def moveActuator(pos, hwnd=None, captures=None):
+    """
+        Moves the window with the actuation stage. Unlike movePynput it does not print, drops moves below a pixel,
+        writes mouse.position at most at the display refresh rate and presses the button only once per drag. captures
+        are the latency.captureTimes of the data pos was made from, they stay with pos while it is held back.
+    """
+    if actuator.move(pos, captures) and latency.tracker.enabled:
+        latency.tracker.mark('moveActuator', actuator.written_tag)
+
+def flushActuator():
+    """
+        Writes the move that the rate limit of the actuator held back once it is due, for when there is no new target
+        to move to. Returns the seconds until the held back move is due, or None if there is none.
+    """
+    if actuator.flush() and latency.tracker.enabled:
+        latency.tracker.mark('moveActuator', actuator.written_tag)
+    return actuator.pendingDelay()
+
 def shift1(arr,num = 1):
     """
     Shifts the array by 1 converting array to panda, shifting and converting to list. 
@@ -143,10 +203,35 @@ def shift2(arr,num = 1):
          np.put(arr,range(num),np.nan)
     return arr
 
-def updateRollingArray(arr,new_value):
+def readGaze(eyetracker, gaze_array, gaze_stream=None):
+    """
+    Reads the newest gaze data into gaze_array and returns the newest gaze position. With a tobii_gaze.TobiiGazeSource
+    every sample that arrived since the last call is used, otherwise only the current sample of the PyGaze eye tracker.
+    """
+    if gaze_stream is not None:
+        # The samples are pushed with their capture times
+        gaze_stream.drainInto(gaze_array)
+        if latency.tracker.enabled:
+            captures = latency.captureTimes(gaze_array=gaze_array)
+            latency.tracker.mark('readGaze', {latency.GAZE: captures.get(latency.GAZE)})
+        return gaze_stream.sample()
+    current_sample = eyetracker.sample()
+    capture_time = tobii_gaze.pygazeCaptureTime(eyetracker) if latency.tracker.enabled else None
+    updateRollingArray(gaze_array,current_sample,capture_time)
+    return current_sample
+
+def updateRollingArray(arr,new_value,capture_time=None):
     """
-    Shifts the array and puts the new value in the first index's place
+    Shifts the array and puts the new value in the first index's place. If arr is a gaze_buffer.GazeRingBuffer, a
+    gaze_filter.GazeFilter or a fixation_detector.FixationDetector the value is pushed into it in place instead, which
+    avoids building a new list for every sample. capture_time is the time the sample was captured on the host clock,
+    if it is not known the time it is pushed is used, and its age is not recorded by the latency tracker.
     """
+    if isinstance(arr, (gaze_buffer.GazeRingBuffer, gaze_filter.GazeFilter, fixation_detector.FixationDetector)):
+        arr.push(new_value, capture_time)
+        if capture_time is not None and latency.tracker.enabled:
+            latency.tracker.mark('updateRollingArray', {latency.GAZE: capture_time})
+        return arr
     shifted_arr = shift1(arr)
     shifted_arr[0] = new_value
     return shifted_arr
@@ -162,12 +247,13 @@ def getOffset(pos,hwnd = None):
         pos = a tuple of x and y coordinates of the current position
         
     return:
-        win_size = top left corner and bottom right corner of a window using Win32Gui
+        win_size = top left corner and bottom right corner of a window. It is read from window_cache, so the window
+                   system is only asked when the window is new, changed externally or the cache entry expired
         offset = The x and y offset from the mouse to the window corner
         size = height and width of the window
         
     """
-    win_size = win32gui.GetWindowRect(hwnd)
+    win_size = window_cache.rect(hwnd)
     #for i in win_size:
     #    print(i)
     x_pos = pos[0]
@@ -201,6 +287,25 @@ def grabGesture(grabBool = False):
     return grabBool
 
 if __name__ == "__main__":
+    if '--pipeline' in sys.argv:
+        # Gaze, hand, fusion and actuation in their own processes joined by bounded queues, see fusion_pipeline.py.
+        # Queues drop their oldest message when full, or make the stage before them wait with --overflow block
+        for flag in ('--fixations', '--tobii-stream'):
+            if flag in sys.argv:
+                # The gaze stage polls the eye tracker and the fusion stage only runs the gaze filters
+                sys.exit("%s can not be combined with --pipeline" % flag)
+        overflow = fusion_pipeline.DROP_OLDEST
+        if '--overflow' in sys.argv:
+            overflow = sys.argv[sys.argv.index('--overflow') + 1]
+        gaze_filter_name = sys.argv[sys.argv.index('--gaze-filter') + 1] if '--gaze-filter' in sys.argv else None
+        pipeline = fusion_pipeline.FusionPipeline(make_controller=gesture_reader.Leap.Controller,
+                                                  make_eyetracker=startEyeTracker, grab=grabObject,
+                                                  move=moveActuator, release=releaseObject, overflow=overflow,
+                                                  gaze_filter_name=gaze_filter_name, flush=flushActuator)
+        print('Press Ctrl-C to quit.')
+        pipeline.run(report_interval=2.0)
+        sys.exit()
+
     ## Initialization
     # Create a sample listener and controller
     listener = gesture_reader.SampleListener()
@@ -212,43 +317,96 @@ if __name__ == "__main__":
     eyetracker = calibrateEyeTrackerPyGaze()
     eyetracker.start_recording()
     #gaze_array = [0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0]
-    gaze_array = range(1,30)
+    #gaze_array = range(1,30)
+    gaze_array = gaze_buffer.GazeRingBuffer(29)
+    if '--gaze-filter' in sys.argv:
+        # Smooth the gaze with 'mean', 'oneeuro' or 'kalman' instead of the 29 sample mean, see gaze_filter.py
+        gaze_array = gaze_filter.makeGazeFilter(sys.argv[sys.argv.index('--gaze-filter') + 1])
+    fixations = '--fixations' in sys.argv
+    if fixations and '--gaze-filter' in sys.argv:
+        # The detectors classify the raw samples, a smoothed gaze would hide the saccades from them
+        sys.exit("--fixations can not be combined with --gaze-filter")
+    if fixations:
+        # Only move the window on fixation events instead of on every gaze sample, see fixation_detector.py
+        gaze_array = fixation_detector.VelocityFixationDetector()
+    gaze_stream = None
+    if '--tobii-stream' in sys.argv:
+        # Use every sample of the tobii gaze stream instead of polling the newest sample through PyGaze
+        gaze_stream = tobii_gaze.TobiiGazeSource(avaliableEyeTrackers()[0], screen_size=(1600,900))
+        gaze_stream.subscribe()
 
     
+    if '--latency' in sys.argv:
+        # Print how old the hand and gaze data are at every stage, see latency.py
+        latency.tracker.enable()
+        latency.tracker.startLiveView(2.0)
+
     ## Loop
     print('Press Ctrl-C to quit.')
 
+    if '--async' in sys.argv:
+        # Event driven loop, see fusion_runtime.py. Needs Python 3.7 or newer.
+        import fusion_runtime
+        runtime = fusion_runtime.FusionRuntime(listener, eyetracker, grab=grabObject, move=moveActuator,
+                                               release=releaseObject, gaze_stream=gaze_stream,
+                                               gaze_array=gaze_array, max_rate=None, flush=flushActuator)
+        try:
+            runtime.run()
+        except KeyboardInterrupt:
+            print('\n Interrupted.')
+            print(runtime.stats)
+            print(actuator.report())
+            if latency.tracker.enabled:
+                print(latency.tracker.dump())
+            if gaze_stream is not None:
+                gaze_stream.unsubscribe()
+            eyetracker.stop_recording()
+            eyetracker.close()
+        sys.exit()
+
     try:
         grab_bool = False;
         while True:
             fistStatus = listener.getFist(controller)
             print('fist status is: ',fistStatus)
             #print('current gaze is at: ',current_gaze_sample)
-            current_sample = eyetracker.sample()
-            gaze_array = updateRollingArray(gaze_array,current_sample)
+            current_sample = readGaze(eyetracker, gaze_array, gaze_stream)
 
             print('Gaze is at:  ',current_sample)          
             #current_position = currentGazePosition()
             if (fistStatus == True):
-               current_window_handle = grabObject()
+               current_window_handle = grabObject(gaze_array.mean() if '--click-grab' not in sys.argv else None)
                while (fistStatus==True):
                    print('fist status is: ',fistStatus)
                    #current_position = currentGazePosition()
-                   current_sample = eyetracker.sample()
-                   gaze_array = updateRollingArray(gaze_array,current_sample)
-                   current_gaze_mean = np.mean(gaze_array,axis=0)
+                   current_sample = readGaze(eyetracker, gaze_array, gaze_stream)
+                   if fixations:
+                       current_gaze_mean = gaze_array.newTarget()
+                   else:
+                       current_gaze_mean = gaze_array.mean()
                    print('Gaze mean is at:  ',current_gaze_mean)
-                   movePynput(current_gaze_mean,current_window_handle)
+                   if current_gaze_mean is not None:
+                       captures = None
+                       if latency.tracker.enabled:
+                           captures = latency.captureTimes(listener.fist_snapshot, gaze_array)
+                       moveActuator(current_gaze_mean,current_window_handle,captures)
+                   else:
+                       flushActuator()
                    fistStatus = listener.getFist(controller) # Update the fistStatus in the while loop
 
             if(fistStatus == False):
                 #pyautogui.mouseUp(button='left')
                 mousePressCheck=False
-                mouse.release(Button.left)
+                releaseObject()
                   
              
     except KeyboardInterrupt:
         print('\n Interrupted.')
+        print(actuator.report())
+        if latency.tracker.enabled:
+            print(latency.tracker.dump())
+        if gaze_stream is not None:
+            gaze_stream.unsubscribe()
         eyetracker.stop_recording()
         eyetracker.close()
     
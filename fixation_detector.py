@@ -0,0 +1,381 @@
+"""
+Description:
+    Streaming fixation and saccade detection on the gaze samples. During a drag every gaze sample used to turn into a
+    window move, although the eyes only hold still during fixations and the samples in between are noise or
+    saccades. The detectors here classify the samples one at a time as they arrive and emit events:
+        FIXATION_START  - A fixation was detected, with the centroid of its samples so far
+        FIXATION_UPDATE - The fixation goes on, sent every update_every samples with the new centroid
+        SACCADE         - The fixation ended because the gaze moved away
+    The drag loop only moves the window on fixation events. Two detectors are available:
+        VelocityFixationDetector   - I-VT, a sample is part of a fixation when the gaze speed is below a threshold
+        DispersionFixationDetector - I-DT, samples are a fixation when they fit in a box of a maximum dispersion
+    Both keep a constant amount of state. VelocityFixationDetector.process also classifies whole chunks of a
+    recording at once with numpy, giving the same events as pushing the samples one by one. The I-DT decision for a
+    sample depends on where the previous fixation ended, so DispersionFixationDetector.process pushes the samples one
+    by one and is about twenty times slower than the I-VT one. A few hundred thousand samples per second is plenty
+    for a live eye tracker but slow for long recordings.
+    The detectors have the same push/mean/latest interface as gaze_buffer.GazeRingBuffer, where mean() is the
+    centroid of the newest fixation, so they can replace the gaze buffer in the drag loop.
+    An example of how to use it:
+            gaze_array = VelocityFixationDetector(velocity_threshold=4000.0)
+            gaze_array.push(eyetracker.sample())
+            target = gaze_array.newTarget()   # None unless there was a fixation event since the last call
+            events = VelocityFixationDetector().process(recording)   # EVENT_DTYPE array
+"""
+
+import collections
+import math
+import time
+import numpy as np
+
+FIXATION_START, FIXATION_UPDATE, SACCADE = range(3)
+EVENT_NAMES = ('fixation_start', 'fixation_update', 'saccade')
+
+# x, y is the fixation centroid, or the gaze sample that left the fixation for a saccade. start_time is the time the
+# fixation started, or the time of its last sample for a saccade. time is the time of the sample causing the event.
+EVENT_DTYPE = np.dtype([
+    ('kind', 'i1'),
+    ('x', '<f8'),
+    ('y', '<f8'),
+    ('start_time', '<f8'),
+    ('time', '<f8'),
+])
+
+GazeEvent = collections.namedtuple('GazeEvent', ['kind', 'x', 'y', 'start_time', 'time'])
+
+
+class FixationDetector(object):
+    """
+        Base class of the detectors. Subclasses implement update, which classifies one sample and returns a GazeEvent
+        or None.
+    """
+
+    def __init__(self, min_samples, update_every, callback=None, clock=time.time):
+        """
+            input:
+                min_samples - Number of samples a fixation needs before FIXATION_START is sent
+                update_every - A FIXATION_UPDATE is sent every this many samples of an ongoing fixation
+                callback - Optional function called with every GazeEvent
+                clock - Function used to timestamp samples that are pushed without a timestamp
+        """
+        self.min_samples = int(min_samples)
+        self.update_every = int(update_every)
+        self.callback = callback
+        self.clock = clock
+        self.clear()
+
+    def __len__(self):
+        return self.count
+
+    def push(self, sample, timestamp=None):
+        """
+            Classifies a new (x, y) sample and returns the GazeEvent it caused, or None. Samples with a NaN
+            coordinate are ignored.
+        """
+        x = float(sample[0])
+        y = float(sample[1])
+        if math.isnan(x) or math.isnan(y):
+            return None
+        if timestamp is None:
+            timestamp = self.clock()
+        event = self.update(x, y, timestamp)
+        self.last_sample[0] = x
+        self.last_sample[1] = y
+        self.last_sample[2] = timestamp
+        self.count += 1
+        if event is not None:
+            self.events[event.kind] += 1
+            if event.kind != SACCADE:
+                self.fixation[0] = event.x
+                self.fixation[1] = event.y
+                self.fixation[2] = event.time
+                self.new_target = True
+            if self.callback is not None:
+                self.callback(event)
+        return event
+
+    def update(self, x, y, t):
+        raise NotImplementedError
+
+    def process(self, samples):
+        """
+            Classifies an (n, 3) array of x, y, timestamp samples and returns the events as an EVENT_DTYPE array.
+        """
+        events = []
+        for sample in samples:
+            event = self.push(sample, sample[2])
+            if event is not None:
+                events.append(event)
+        return np.array(events, dtype=EVENT_DTYPE)
+
+    def newTarget(self):
+        """
+            Returns the centroid of the newest fixation if there was a fixation event since the last call, otherwise
+            None. Used to only move the window when the gaze settled somewhere new.
+        """
+        if not self.new_target:
+            return None
+        self.new_target = False
+        return (self.fixation[0], self.fixation[1])
+
+    def mean(self):
+        """
+            Returns the (x, y) centroid of the newest fixation, or None before the first fixation.
+        """
+        if self.events[FIXATION_START] == 0:
+            return None
+        return (self.fixation[0], self.fixation[1])
+
+    def mean_timestamp(self):
+        """
+            Returns the time of the newest fixation event.
+        """
+        if self.events[FIXATION_START] == 0:
+            return None
+        return self.fixation[2]
+
+    def latest(self):
+        """
+            Returns the most recent raw (x, y, timestamp) sample, or None if no sample was pushed.
+        """
+        if self.count == 0:
+            return None
+        return self.last_sample
+
+    def clear(self):
+        """
+            Forgets all samples and ends the current fixation.
+        """
+        self.last_sample = np.zeros(3)
+        self.fixation = np.zeros(3)  # Centroid and time of the newest fixation event
+        self.new_target = False
+        self.count = 0
+        self.events = [0, 0, 0]  # Number of events sent of every kind
+
+
+class VelocityFixationDetector(FixationDetector):
+    """
+        I-VT detector. The speed of the gaze from the previous sample to a sample decides whether the sample belongs
+        to a fixation. A fixation is reported once it has min_samples consecutive slow samples.
+    """
+
+    def __init__(self, velocity_threshold=4000.0, min_samples=3, update_every=10, callback=None, clock=time.time):
+        """
+            input:
+                velocity_threshold - Gaze speed in pixels per second above which a sample is part of a saccade
+                min_samples - Number of slow samples in a row before FIXATION_START is sent
+                update_every - A FIXATION_UPDATE is sent every this many samples of an ongoing fixation
+                callback - Optional function called with every GazeEvent
+                clock - Function used to timestamp samples that are pushed without a timestamp
+        """
+        self.velocity_threshold = float(velocity_threshold)
+        FixationDetector.__init__(self, min_samples, update_every, callback, clock)
+
+    def clear(self):
+        FixationDetector.clear(self)
+        self.run_length = 0  # Number of fixation samples in a row up to the last sample
+        self.sum_x = 0.0
+        self.sum_y = 0.0
+        self.start_time = 0.0
+
+    def update(self, x, y, t):
+        if self.count:
+            dt = t - self.last_sample[2]
+            distance = math.hypot(x - self.last_sample[0], y - self.last_sample[1])
+            slow = distance < self.velocity_threshold * dt if dt > 0 else distance == 0.0
+        else:
+            slow = True
+        if not slow:
+            run_length = self.run_length
+            self.run_length = 0
+            if run_length >= self.min_samples:
+                return GazeEvent(SACCADE, x, y, self.last_sample[2], t)
+            return None
+        if self.run_length == 0:
+            self.sum_x = 0.0
+            self.sum_y = 0.0
+            self.start_time = t
+        self.run_length += 1
+        self.sum_x += x
+        self.sum_y += y
+        extra = self.run_length - self.min_samples
+        if extra == 0:
+            kind = FIXATION_START
+        elif extra > 0 and extra % self.update_every == 0:
+            kind = FIXATION_UPDATE
+        else:
+            return None
+        return GazeEvent(kind, self.sum_x / self.run_length, self.sum_y / self.run_length, self.start_time, t)
+
+    def process(self, samples):
+        """
+            Classifies an (n, 3) array of x, y, timestamp samples with numpy and returns the events as an EVENT_DTYPE
+            array. The state is carried over between calls, so a recording can be processed in chunks to bound the
+            memory use. Samples with NaN coordinates are skipped. The callback is not called.
+        """
+        samples = np.asarray(samples, dtype=np.float64)
+        samples = samples[~np.isnan(samples[:, :2]).any(axis=1)]
+        n = len(samples)
+        if n == 0:
+            return np.zeros(0, dtype=EVENT_DTYPE)
+        x = samples[:, 0]
+        y = samples[:, 1]
+        t = samples[:, 2]
+
+        # Slow samples, compared with the previous sample, also across the chunk boundary
+        previous = np.empty((n, 3))
+        previous[0] = self.last_sample
+        previous[1:] = samples[:-1, :3]
+        dt = t - previous[:, 2]
+        distance = np.hypot(x - previous[:, 0], y - previous[:, 1])
+        with np.errstate(invalid='ignore'):
+            slow = np.where(dt > 0, distance < self.velocity_threshold * dt, distance == 0.0)
+        if self.count == 0:
+            slow[0] = True
+
+        # Length of the run of slow samples up to every sample, continuing the run of the previous chunk
+        index = np.arange(n)
+        last_fast = np.maximum.accumulate(np.where(slow, -1, index))
+        continued = last_fast < 0
+        run_length = np.where(continued, index + 1 + self.run_length, index - last_fast)
+        run_length[~slow] = 0
+        previous_run_length = np.empty(n, dtype=run_length.dtype)
+        previous_run_length[0] = self.run_length
+        previous_run_length[1:] = run_length[:-1]
+
+        # Centroid of the run up to every sample from cumulative sums
+        cumulative_x = np.cumsum(x)
+        cumulative_y = np.cumsum(y)
+        safe_fast = np.maximum(last_fast, 0)
+        continued_run = continued & (self.run_length > 0)
+        sum_x = np.where(continued, cumulative_x + (self.sum_x if self.run_length else 0.0),
+                         cumulative_x - cumulative_x[safe_fast])
+        sum_y = np.where(continued, cumulative_y + (self.sum_y if self.run_length else 0.0),
+                         cumulative_y - cumulative_y[safe_fast])
+        start_time = np.where(continued_run, self.start_time, t[np.minimum(last_fast + 1, n - 1)])
+
+        extra = run_length - self.min_samples
+        start = slow & (extra == 0)
+        update = slow & (extra > 0) & (extra % self.update_every == 0)
+        saccade = ~slow & (previous_run_length >= self.min_samples)
+        event_index = np.flatnonzero(start | update | saccade)
+
+        events = np.empty(len(event_index), dtype=EVENT_DTYPE)
+        events['kind'] = np.where(saccade[event_index], SACCADE,
+                                  np.where(start[event_index], FIXATION_START, FIXATION_UPDATE))
+        fixation_event = ~saccade[event_index]
+        length = np.maximum(run_length[event_index], 1)
+        events['x'] = np.where(fixation_event, sum_x[event_index] / length, x[event_index])
+        events['y'] = np.where(fixation_event, sum_y[event_index] / length, y[event_index])
+        events['start_time'] = np.where(fixation_event, start_time[event_index], previous[event_index, 2])
+        events['time'] = t[event_index]
+
+        # Carry the state over to the next chunk
+        self.run_length = int(run_length[-1])
+        if self.run_length:
+            self.sum_x = float(sum_x[-1])
+            self.sum_y = float(sum_y[-1])
+            self.start_time = float(start_time[-1])
+        self.last_sample[:] = samples[-1, :3]
+        self.count += n
+        for kind in (FIXATION_START, FIXATION_UPDATE, SACCADE):
+            self.events[kind] += int(np.count_nonzero(events['kind'] == kind))
+        fixation_events = np.flatnonzero(events['kind'] != SACCADE)
+        if len(fixation_events):
+            last = events[fixation_events[-1]]
+            self.fixation[:] = (last['x'], last['y'], last['time'])
+            self.new_target = True
+        return events
+
+
+class DispersionFixationDetector(FixationDetector):
+    """
+        I-DT detector. A fixation starts when the last min_samples samples fit in a box whose width plus height is at
+        most dispersion_threshold, and grows for as long as the new samples keep the whole fixation in such a box.
+        The minimum and maximum of the sliding window are kept in monotonic deques, so a sample costs O(1) on average
+        and the memory is bounded by min_samples. There is no numpy version of process, it classifies the samples one
+        by one.
+    """
+
+    def __init__(self, dispersion_threshold=100.0, min_samples=6, update_every=10, callback=None, clock=time.time):
+        """
+            input:
+                dispersion_threshold - Maximum width + height in pixels of the box around the fixation samples
+                min_samples - Number of samples in the window a fixation is first detected in
+                update_every - A FIXATION_UPDATE is sent every this many samples of an ongoing fixation
+                callback - Optional function called with every GazeEvent
+                clock - Function used to timestamp samples that are pushed without a timestamp
+        """
+        self.dispersion_threshold = float(dispersion_threshold)
+        FixationDetector.__init__(self, min_samples, update_every, callback, clock)
+
+    def clear(self):
+        FixationDetector.clear(self)
+        self.window = collections.deque()  # (index, x, y, t) of the last min_samples samples outside a fixation
+        self.extremes = [collections.deque() for _ in range(4)]  # Monotonic deques of min x, max x, min y, max y
+        self.in_fixation = False
+        self.run_length = 0
+        self.sum_x = 0.0
+        self.sum_y = 0.0
+        self.start_time = 0.0
+        self.box = [0.0, 0.0, 0.0, 0.0]  # min x, max x, min y, max y of the fixation
+
+    def slide(self, x, y, t):
+        """
+            Adds a sample to the window of the last min_samples samples and updates its extremes.
+        """
+        index = self.count
+        self.window.append((index, x, y, t))
+        oldest = index - self.min_samples
+        for deque, value, sign in zip(self.extremes, (x, x, y, y), (1, -1, 1, -1)):
+            while deque and sign * deque[-1][1] >= sign * value:
+                deque.pop()
+            deque.append((index, value))
+            while deque[0][0] <= oldest:
+                deque.popleft()
+        if len(self.window) > self.min_samples:
+            self.window.popleft()
+
+    def update(self, x, y, t):
+        threshold = self.dispersion_threshold
+        if self.in_fixation:
+            box = self.box
+            low_x = min(box[0], x)
+            high_x = max(box[1], x)
+            low_y = min(box[2], y)
+            high_y = max(box[3], y)
+            if (high_x - low_x) + (high_y - low_y) <= threshold:
+                box[:] = (low_x, high_x, low_y, high_y)
+                self.run_length += 1
+                self.sum_x += x
+                self.sum_y += y
+                if (self.run_length - self.min_samples) % self.update_every:
+                    return None
+                return GazeEvent(FIXATION_UPDATE, self.sum_x / self.run_length, self.sum_y / self.run_length,
+                                 self.start_time, t)
+            # The fixation ended, the sample starts a new window
+            self.in_fixation = False
+            self.window.clear()
+            for deque in self.extremes:
+                deque.clear()
+            self.slide(x, y, t)
+            return GazeEvent(SACCADE, x, y, self.last_sample[2], t)
+
+        self.slide(x, y, t)
+        if len(self.window) < self.min_samples:
+            return None
+        extremes = self.extremes
+        low_x = extremes[0][0][1]
+        high_x = extremes[1][0][1]
+        low_y = extremes[2][0][1]
+        high_y = extremes[3][0][1]
+        if (high_x - low_x) + (high_y - low_y) > threshold:
+            return None
+        self.in_fixation = True
+        self.box = [low_x, high_x, low_y, high_y]
+        self.run_length = len(self.window)
+        self.sum_x = sum(sample[1] for sample in self.window)
+        self.sum_y = sum(sample[2] for sample in self.window)
+        self.start_time = self.window[0][3]
+        return GazeEvent(FIXATION_START, self.sum_x / self.run_length, self.sum_y / self.run_length,
+                         self.start_time, t)
@@ -0,0 +1,406 @@
+"""
+Description:
+    A multi process version of the gaze and gesture fusion loop. In eye_gaze_gesture_mini_project the eye tracker is
+    sampled, the fist is read, the gaze is averaged and the window is moved one after the other in one loop, so a slow
+    window move or a print delays the next sensor reading. Here every stage runs in its own process and the stages
+    are joined by bounded queues:
+            gaze acquisition ---\\
+                                 +--> feature extraction and fusion --> actuation
+            hand acquisition ---/
+    The hand acquisition only copies every Leap frame into a hand_snapshot record, the fist votes and the gaze filter
+    run in the fusion stage, and the actuation stage grabs, moves and releases the window. Every queue has an overflow
+    policy: DROP_OLDEST throws the oldest message away when the queue is full, so a slow stage only ever sees the newest
+    data and never slows down the stages before it, BLOCK makes the stage before it wait, so nothing is lost. The
+    queues count the messages put, taken and dropped, their depth and the time producers were blocked, and the stages
+    count what they did, see metrics and report.
+    The messages to the actuation stage hold the whole desired state, the id of the current drag and the newest
+    target, so dropping any of them never loses a grab or a release.
+    An example of how to use it:
+            pipeline = FusionPipeline(make_controller=Leap.Controller, make_eyetracker=startEyeTracker,
+                                      grab=grabObject, move=moveActuator, release=releaseObject, overflow=DROP_OLDEST,
+                                      flush=flushActuator)
+            pipeline.run(report_interval=2.0)   # Until Ctrl-C
+"""
+
+import collections
+import multiprocessing
+import time
+try:
+    import queue
+except ImportError:  # Python 2
+    import Queue as queue
+
+DROP_OLDEST, BLOCK = 'drop_oldest', 'block'  # Overflow policies of a StageQueue
+
+# Counters of a StageQueue
+PUTS, GETS, DROPPED, MAX_DEPTH, DEPTH_SUM, BLOCKED = range(6)
+QUEUE_COUNTERS = ['puts', 'gets', 'dropped', 'max_depth', 'depth_sum', 'blocked_seconds']
+
+# Counters of the stages
+GAZE_SAMPLES, HAND_FRAMES, FUSIONS, TARGETS, MOVES, GRABS, RELEASES, TARGET_AGE_SUM, TARGET_AGE_MAX = range(9)
+STAGE_COUNTERS = ['gaze_samples', 'hand_frames', 'fusions', 'targets', 'moves', 'grabs', 'releases',
+                  'target_age_sum', 'target_age_max']
+
+GAZE, HAND = 0, 1  # Kinds of the messages to the fusion stage
+
+
+class StageQueue(object):
+    """
+        Bounded multiprocessing queue with an overflow policy and counters shared by all processes.
+    """
+
+    def __init__(self, name, maxsize=64, overflow=DROP_OLDEST):
+        """
+            input:
+                name - Name of the stage that reads the queue, used in the metrics
+                maxsize - Number of messages the queue holds
+                overflow - DROP_OLDEST or BLOCK, what put does when the queue is full
+        """
+        if overflow not in (DROP_OLDEST, BLOCK):
+            raise ValueError("overflow must be DROP_OLDEST or BLOCK, got %r" % (overflow,))
+        self.name = name
+        self.maxsize = int(maxsize)
+        self.overflow = overflow
+        self.queue = multiprocessing.Queue(self.maxsize)
+        self.counters = multiprocessing.Array('d', len(QUEUE_COUNTERS))
+
+    def count(self, index, value=1):
+        with self.counters.get_lock():
+            self.counters[index] += value
+
+    def put(self, item):
+        """
+            Adds a message. When the queue is full it drops the oldest message or waits, depending on overflow.
+        """
+        if self.overflow == BLOCK:
+            try:
+                self.queue.put_nowait(item)
+            except queue.Full:
+                start = time.time()
+                self.queue.put(item)
+                self.count(BLOCKED, time.time() - start)
+        else:
+            while True:
+                try:
+                    self.queue.put_nowait(item)
+                    break
+                except queue.Full:
+                    try:
+                        self.queue.get_nowait()
+                        self.count(DROPPED)
+                    except queue.Empty:  # The consumer took it first
+                        pass
+        counters = self.counters
+        with counters.get_lock():
+            counters[PUTS] += 1
+            depth = counters[PUTS] - counters[GETS] - counters[DROPPED]
+            counters[DEPTH_SUM] += depth
+            if depth > counters[MAX_DEPTH]:
+                counters[MAX_DEPTH] = depth
+
+    def get(self, timeout=None):
+        """
+            Returns the next message, or raises queue.Empty after timeout seconds.
+        """
+        item = self.queue.get(timeout=timeout)
+        self.count(GETS)
+        return item
+
+    def getNewest(self, timeout=None):
+        """
+            Waits for a message like get, then takes all messages that are waiting and returns the newest.
+        """
+        item = self.queue.get(timeout=timeout)
+        taken = 1
+        while True:
+            try:
+                item = self.queue.get_nowait()
+                taken += 1
+            except queue.Empty:
+                break
+        self.count(GETS, taken)
+        return item
+
+    def close(self):
+        """
+            Lets the process exit without waiting for messages nobody will read.
+        """
+        self.queue.cancel_join_thread()
+
+    def metrics(self):
+        """
+            Returns the counters as a dictionary, with the current and mean depth.
+        """
+        with self.counters.get_lock():
+            values = list(self.counters)
+        metrics = dict(zip(QUEUE_COUNTERS, values))
+        # The counters change after the queue does, so the depth can be off by the messages in flight
+        metrics['depth'] = min(max(values[PUTS] - values[GETS] - values[DROPPED], 0), self.maxsize)
+        metrics['max_depth'] = min(values[MAX_DEPTH], self.maxsize)
+        metrics['mean_depth'] = values[DEPTH_SUM] / values[PUTS] if values[PUTS] else 0.0
+        del metrics['depth_sum']
+        return metrics
+
+
+def countStage(counters, index, value=1):
+    with counters.get_lock():
+        counters[index] += value
+
+
+def gazeWorker(make_eyetracker, out_queue, counters, stop_event, gaze_rate):
+    """
+        Gaze acquisition stage: samples the eye tracker at its rate and sends every new sample to fusion.
+    """
+    eyetracker = make_eyetracker()
+    period = 1.0 / gaze_rate
+    next_time = time.time()
+    last_sample = None
+    try:
+        while not stop_event.is_set():
+            sample = eyetracker.sample()
+            # Compared by coordinate, eye trackers may return tuples, lists or numpy arrays
+            if sample is not None and (last_sample is None or sample[0] != last_sample[0] or
+                                       sample[1] != last_sample[1]):
+                last_sample = (sample[0], sample[1])
+                out_queue.put((GAZE, time.time(), (sample[0], sample[1])))
+                countStage(counters, GAZE_SAMPLES)
+            next_time += period
+            delay = next_time - time.time()
+            if delay < 0:
+                next_time = time.time()
+                delay = 0
+            time.sleep(delay)
+    finally:
+        out_queue.close()
+        if hasattr(eyetracker, 'stop_recording'):
+            eyetracker.stop_recording()
+
+
+def handWorker(make_controller, out_queue, counters, stop_event, poll_interval=0.1):
+    """
+        Hand acquisition stage: copies every Leap frame into a hand_snapshot record in on_frame and sends it to fusion.
+    """
+    controller = make_controller()
+    # Imported after make_controller, which may put stand-in Leap modules in place
+    import leap_fast
+
+    class AcquisitionListener(leap_fast.Leap.Listener):
+        def on_frame(self, controller):
+            out_queue.put((HAND, time.time(), leap_fast.snapshotFrame(controller.frame())))
+            countStage(counters, HAND_FRAMES)
+
+    listener = AcquisitionListener()
+    controller.add_listener(listener)
+    try:
+        while not stop_event.is_set():
+            time.sleep(poll_interval)
+    finally:
+        controller.remove_listener(listener)
+        out_queue.close()
+
+
+def fusionWorker(in_queue, out_queue, counters, stop_event, gaze_filter_name=None, gaze_rate=60.0, timeout=0.1):
+    """
+        Feature extraction and fusion stage: runs the fist votes of every hand and the gaze filter, and sends the
+        current drag to actuation as (drag id, target, time of the newest data). The drag id is 0 without a fist.
+        The gaze samples are filtered with the time they were taken in the gaze stage, messages arrive in bursts.
+    """
+    import gaze_buffer
+    import gaze_filter
+    import hand_state
+    if gaze_filter_name:
+        gaze_array = gaze_filter.makeGazeFilter(gaze_filter_name, rate=gaze_rate)
+    else:
+        gaze_array = gaze_buffer.GazeRingBuffer(29)
+    hand_states = hand_state.HandStateTable(votes=5, enter_votes=4, exit_votes=1)
+    fist = False
+    drags = 0
+    try:
+        while not stop_event.is_set():
+            try:
+                kind, source_time, data = in_queue.get(timeout)
+            except queue.Empty:
+                continue
+            countStage(counters, FUSIONS)
+            if kind == GAZE:
+                gaze_array.push(data, source_time)
+            else:
+                hand_fists = hand_states.update(data)
+                # The first hand of the frame like getFist, a frame without hands keeps the fist until the hand is
+                # forgotten
+                new_fist = bool(hand_fists[0]) if len(hand_fists) else bool(hand_states.handFist())
+                if new_fist and not fist:
+                    drags += 1
+                fist = new_fist
+            gaze_mean = gaze_array.mean()
+            if fist and gaze_mean is not None:
+                out_queue.put((drags, (gaze_mean[0], gaze_mean[1]), source_time))
+                countStage(counters, TARGETS)
+            elif not fist and kind == HAND:
+                out_queue.put((0, None, source_time))
+    finally:
+        out_queue.close()
+
+
+def actuationWorker(in_queue, counters, stop_event, grab, move, release, flush=None, timeout=0.1):
+    """
+        Actuation stage: grabs, moves or releases the window to match the drag state. With DROP_OLDEST it skips to the
+        newest state, with BLOCK every target is applied in order. When move holds a target back, flush is called
+        once it is due, or when no new state arrived within timeout.
+    """
+    drag = 0
+    window_handle = None
+    wait = timeout
+    get = in_queue.getNewest if in_queue.overflow == DROP_OLDEST else in_queue.get
+    try:
+        while not stop_event.is_set():
+            try:
+                drag_id, target, source_time = get(wait)
+            except queue.Empty:
+                if flush is not None and window_handle is not None:
+                    delay = flush()
+                    wait = timeout if delay is None else min(timeout, delay)
+                continue
+            if drag_id != drag and drag:
+                release()
+                window_handle = None
+                countStage(counters, RELEASES)
+            drag = drag_id
+            if not drag_id:
+                continue
+            if window_handle is None:
+                window_handle = grab(target)
+                countStage(counters, GRABS)
+            move(target, window_handle)
+            if flush is not None:
+                delay = flush()
+                wait = timeout if delay is None else min(timeout, delay)
+            age = time.time() - source_time
+            with counters.get_lock():
+                counters[MOVES] += 1
+                counters[TARGET_AGE_SUM] += age
+                if age > counters[TARGET_AGE_MAX]:
+                    counters[TARGET_AGE_MAX] = age
+    finally:
+        if drag:
+            release()
+
+
+class FusionPipeline(object):
+    """
+        Starts the gaze acquisition, hand acquisition, fusion and actuation stages as processes joined by
+        StageQueues.
+    """
+
+    def __init__(self, make_controller, make_eyetracker, grab, move, release, gaze_rate=60.0, queue_size=64,
+                 overflow=DROP_OLDEST, gaze_filter_name=None, flush=None):
+        """
+            input:
+                make_controller - Function returning a Leap.Controller, called in the hand acquisition process
+                make_eyetracker - Function returning an eye tracker with a sample() method that is recording, called
+                                  in the gaze acquisition process, e.g. after calibrating it
+                grab - Function called as grab(pos) in the actuation process when a fist starts, returning the handle
+                       of the window to drag
+                move - Function called as move(pos, hwnd) in the actuation process to drag the window
+                release - Function called in the actuation process when the fist ends
+                gaze_rate - Rate in Hz the eye tracker is sampled at
+                queue_size - Number of messages each queue holds
+                overflow - DROP_OLDEST or BLOCK for all queues, or a dictionary from queue name ('fusion',
+                           'actuation') to the policy of that queue
+                gaze_filter_name - Optional name of a gaze_filter filter used instead of the 29 sample mean
+                flush - Optional function called as flush() in the actuation process, which writes a move that move
+                        held back, e.g. by a rate limit, and returns the seconds until it is due or None if there is
+                        none
+            The functions have to be defined at module level, so they can be given to other processes.
+        """
+        if not isinstance(overflow, dict):
+            overflow = {'fusion': overflow, 'actuation': overflow}
+        self.queues = collections.OrderedDict([
+            ('fusion', StageQueue('fusion', queue_size, overflow.get('fusion', DROP_OLDEST))),
+            ('actuation', StageQueue('actuation', queue_size, overflow.get('actuation', DROP_OLDEST))),
+        ])
+        self.counters = multiprocessing.Array('d', len(STAGE_COUNTERS))
+        self.stop_event = multiprocessing.Event()
+        fusion_queue = self.queues['fusion']
+        actuation_queue = self.queues['actuation']
+        self.processes = [
+            multiprocessing.Process(target=gazeWorker, name='gaze',
+                                    args=(make_eyetracker, fusion_queue, self.counters, self.stop_event, gaze_rate)),
+            multiprocessing.Process(target=handWorker, name='hand',
+                                    args=(make_controller, fusion_queue, self.counters, self.stop_event)),
+            multiprocessing.Process(target=fusionWorker, name='fusion',
+                                    args=(fusion_queue, actuation_queue, self.counters, self.stop_event,
+                                          gaze_filter_name, gaze_rate)),
+            multiprocessing.Process(target=actuationWorker, name='actuation',
+                                    args=(actuation_queue, self.counters, self.stop_event, grab, move, release,
+                                          flush)),
+        ]
+        self.started = None
+
+    def start(self):
+        self.started = time.time()
+        for process in self.processes:
+            process.daemon = True
+            process.start()
+
+    def stop(self, timeout=2.0):
+        """
+            Asks all stages to finish and waits for them, terminating the ones that do not finish in time.
+        """
+        self.stop_event.set()
+        deadline = time.time() + timeout
+        for process in self.processes:
+            process.join(max(0.0, deadline - time.time()))
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+    def metrics(self):
+        """
+            Returns a dictionary with the counters of the stages under 'stages' and the metrics of every queue under
+            its name.
+        """
+        with self.counters.get_lock():
+            stages = dict(zip(STAGE_COUNTERS, self.counters))
+        stages['target_age_mean'] = stages['target_age_sum'] / stages['moves'] if stages['moves'] else 0.0
+        del stages['target_age_sum']
+        stages['seconds'] = time.time() - self.started if self.started is not None else 0.0
+        metrics = {'stages': stages}
+        for name, stage_queue in self.queues.items():
+            metrics[name] = stage_queue.metrics()
+        return metrics
+
+    def report(self):
+        """
+            Returns the metrics as text, one line for the stages and one per queue.
+        """
+        metrics = self.metrics()
+        stages = metrics['stages']
+        seconds = max(stages['seconds'], 1e-9)
+        lines = ["gaze %.1f/s, hand %.1f/s, targets %d, moves %d, grabs %d, releases %d, target age mean %.1f ms "
+                 "max %.1f ms" % (stages['gaze_samples'] / seconds, stages['hand_frames'] / seconds,
+                                  stages['targets'], stages['moves'], stages['grabs'], stages['releases'],
+                                  stages['target_age_mean'] * 1e3, stages['target_age_max'] * 1e3)]
+        for name, stage_queue in self.queues.items():
+            queue_metrics = metrics[name]
+            lines.append("%-9s %-11s depth %3d (mean %5.1f, max %3d of %d), put %d, dropped %d, blocked %.2f s" % (
+                name, stage_queue.overflow, queue_metrics['depth'], queue_metrics['mean_depth'],
+                queue_metrics['max_depth'], stage_queue.maxsize, queue_metrics['puts'], queue_metrics['dropped'],
+                queue_metrics['blocked_seconds']))
+        return '\n'.join(lines)
+
+    def run(self, report_interval=None):
+        """
+            Starts the stages and waits until Ctrl-C, printing the report every report_interval seconds if given.
+        """
+        self.start()
+        try:
+            while True:
+                time.sleep(report_interval or 1.0)
+                if report_interval:
+                    print(self.report())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+            print(self.report())
@@ -0,0 +1,224 @@
+"""
+Description:
+    An asyncio runtime for the gaze and gesture fusion loop, as an alternative to the busy while True loop in
+    eye_gaze_gesture_mini_project.py. The gaze and the hand are read by their own tasks at their native rates, the
+    fusion step only runs when one of them delivered new data, and the window is moved by an actuation task that is
+    capped at max_rate and always uses the newest target. A move function that limits its own rate, like the
+    PointerActuator behind moveActuator, is run with max_rate=None, and the target it held back is written by flush
+    once it is due. This keeps the CPU use bounded and makes sure the same gaze sample is not sent to the mouse
+    several times. Like the polling loop the window is only released when the hand opens, a frame without a hand
+    keeps it grabbed.
+    It needs Python 3.7 or newer for asyncio.run.
+    An example of how to use it:
+            runtime = FusionRuntime(listener, eyetracker, grab=grabObject, move=movePynput, release=releaseObject)
+            runtime.run()
+            # With the rate limited PointerActuator
+            runtime = FusionRuntime(listener, eyetracker, grab=grabObject, move=moveActuator, release=releaseObject,
+                                    max_rate=None, flush=flushActuator)
+            runtime.run()
+"""
+
+import asyncio
+import fixation_detector
+import gaze_buffer
+import latency
+
+
+class FusionRuntime(object):
+    """
+        Runs the gaze source, hand source, fusion and actuation as asyncio tasks.
+    """
+
+    def __init__(self, listener, eyetracker, grab, move, release, gaze_rate=60.0, max_rate=60.0, gaze_window=29,
+                 frame_timeout=0.1, gaze_stream=None, gaze_array=None, flush=None):
+        """
+            input:
+                listener - gesture_reader.SampleListener added to a controller, used through waitForFrame
+                eyetracker - Object with a sample() method returning an (x, y) gaze position
+                grab - Function called as grab(pos) with the gaze mean when a fist starts, returning the handle of
+                       the window to drag
+                move - Function called as move(pos, hwnd) to drag the window, which may hold moves back to limit
+                       their rate. While latency.tracker is enabled it is called as move(pos, hwnd, captures) with the
+                       latency.captureTimes of the data pos was made from
+                release - Function called when the fist ends
+                gaze_rate - Rate in Hz the eye tracker is sampled at, its native sampling rate
+                max_rate - Maximum rate in Hz of move calls, the targets in between are coalesced. None leaves the
+                           rate to move
+                gaze_window - Number of gaze samples averaged, see gaze_buffer.GazeRingBuffer
+                frame_timeout - Time in seconds a wait for a Leap frame blocks before checking for shutdown
+                gaze_stream - Optional tobii_gaze.TobiiGazeSource. If given it is drained every gaze period instead of
+                              sampling the eye tracker, so no samples are lost
+                gaze_array - Optional gaze_filter.GazeFilter used to smooth the gaze instead of the gaze_window mean,
+                             or a fixation_detector.FixationDetector to only move on fixation events
+                flush - Optional function called as flush() when there is no new target, which writes the move that
+                        move held back and returns the seconds until it is due, or None if there is none
+        """
+        self.listener = listener
+        self.eyetracker = eyetracker
+        self.gaze_stream = gaze_stream
+        self.grab = grab
+        self.move = move
+        self.release = release
+        self.flush = flush
+        self.gaze_period = 1.0 / gaze_rate
+        self.move_period = 1.0 / max_rate if max_rate else 0.0
+        self.frame_timeout = frame_timeout
+        self.gaze_array = gaze_array if gaze_array is not None else gaze_buffer.GazeRingBuffer(gaze_window)
+
+        self.fist = None
+        self.hand_snapshot = None  # Snapshot of the newest frame, the fist was taken from it
+        self.window_handle = None
+        self.target = None
+        self.target_captures = None
+        self.running = False
+        self.loop = None
+        self.new_data = None
+        self.new_target = None
+        self.stats = {'gaze_samples': 0, 'duplicate_samples': 0, 'frames': 0, 'fusions': 0, 'moves': 0,
+                      'coalesced_targets': 0}
+
+    async def gazeSource(self):
+        """
+            Samples the eye tracker once per gaze period. Samples that are the same as the previous one are dropped.
+            With a gaze stream all samples that arrived in the last period are used instead.
+        """
+        loop = asyncio.get_event_loop()
+        next_time = loop.time()
+        last_sample = None
+        while self.running:
+            if self.gaze_stream is not None:
+                n_samples = self.gaze_stream.drainInto(self.gaze_array)
+                if n_samples:
+                    self.stats['gaze_samples'] += n_samples
+                    self.new_data.set()
+            else:
+                sample = self.eyetracker.sample()
+                # Compared by coordinate, eye trackers may return tuples, lists or numpy arrays
+                if sample is not None and (last_sample is None or sample[0] != last_sample[0] or
+                                           sample[1] != last_sample[1]):
+                    last_sample = (sample[0], sample[1])
+                    self.gaze_array.push(sample)
+                    self.stats['gaze_samples'] += 1
+                    self.new_data.set()
+                else:
+                    self.stats['duplicate_samples'] += 1
+            next_time += self.gaze_period
+            delay = next_time - loop.time()
+            if delay < 0:
+                # Fell behind, start the schedule again instead of sampling in a burst
+                next_time = loop.time()
+                delay = 0
+            await asyncio.sleep(delay)
+
+    async def handSource(self):
+        """
+            Waits for every new Leap frame classified by the listener. The wait blocks, so it runs in the default
+            executor and the event loop stays free.
+        """
+        loop = asyncio.get_event_loop()
+        frame_id = self.listener.getSnapshot().frame_id
+        while self.running:
+            snapshot = await loop.run_in_executor(None, self.listener.waitForFrame, frame_id, self.frame_timeout)
+            if snapshot.frame_id == frame_id:
+                continue
+            frame_id = snapshot.frame_id
+            self.hand_snapshot = snapshot
+            self.stats['frames'] += 1
+            if snapshot.fist != self.fist:
+                self.fist = snapshot.fist
+                self.new_data.set()
+
+    async def fusion(self):
+        """
+            Combines the newest fist state and gaze mean whenever new data arrives and hands the target to actuation.
+        """
+        while self.running:
+            await self.new_data.wait()
+            self.new_data.clear()
+            self.stats['fusions'] += 1
+            if self.fist:
+                gaze_mean = self.gaze_array.mean()
+                if self.window_handle is None:
+                    self.window_handle = self.grab(gaze_mean)
+                if isinstance(self.gaze_array, fixation_detector.FixationDetector):
+                    # Only a fixation event since the last fusion step moves the window
+                    gaze_mean = self.gaze_array.newTarget()
+                if gaze_mean is not None:
+                    if self.target is not None:
+                        self.stats['coalesced_targets'] += 1
+                    self.target = (gaze_mean[0], gaze_mean[1])
+                    if latency.tracker.enabled:
+                        self.target_captures = latency.captureTimes(self.hand_snapshot, self.gaze_array)
+                    self.new_target.set()
+            elif self.fist is not None and self.window_handle is not None:
+                self.window_handle = None
+                self.target = None
+                self.target_captures = None
+                self.release()
+
+    async def actuation(self):
+        """
+            Moves the window to the newest target, at most once per move period. While move holds a target back the
+            task wakes up when it is due and calls flush.
+        """
+        loop = asyncio.get_event_loop()
+        delay = None
+        next_move = loop.time()
+        while self.running:
+            try:
+                await asyncio.wait_for(self.new_target.wait(), delay)
+            except asyncio.TimeoutError:
+                delay = self.flush()
+                continue
+            wait = next_move - loop.time()
+            if wait > 0:
+                # The targets that arrive in the meantime replace this one
+                await asyncio.sleep(wait)
+            self.new_target.clear()
+            target, self.target = self.target, None
+            captures, self.target_captures = self.target_captures, None
+            if target is None or self.window_handle is None:
+                continue
+            if captures is not None:
+                self.move(target, self.window_handle, captures)
+            else:
+                self.move(target, self.window_handle)
+            self.stats['moves'] += 1
+            next_move = loop.time() + self.move_period
+            if self.flush is not None:
+                delay = self.flush()
+
+    async def main(self):
+        self.running = True
+        self.loop = asyncio.get_event_loop()
+        self.new_data = asyncio.Event()
+        self.new_target = asyncio.Event()
+        tasks = [asyncio.ensure_future(coroutine) for coroutine in
+                 (self.gazeSource(), self.handSource(), self.fusion(), self.actuation())]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            self.running = False
+            for task in tasks:
+                task.cancel()
+            if self.window_handle is not None:
+                self.window_handle = None
+                self.release()
+
+    def run(self):
+        """
+            Runs the runtime until it is interrupted, e.g. with Ctrl-C.
+        """
+        asyncio.run(self.main())
+
+    def wakeUp(self):
+        self.new_data.set()
+        self.new_target.set()
+
+    def stop(self):
+        """
+            Makes the tasks finish after their current step. Can be called from any thread.
+        """
+        self.running = False
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.wakeUp)
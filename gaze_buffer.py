@@ -0,0 +1,114 @@
+"""
+Description:
+    A fixed size circular buffer for gaze samples. It replaces the list based rolling array in
+    eye_gaze_gesture_mini_project.py, where every new sample created a pandas Series, shifted it and converted it
+    back to a list, and the mean was then recomputed over the whole window. Here a sample is written in place into a
+    preallocated numpy array and the sum of the window is kept up to date, so both push and mean are O(1).
+    An example of how to use it:
+            gaze_array = GazeRingBuffer(29)
+            gaze_array.push(eyetracker.sample())
+            current_gaze_mean = gaze_array.mean()
+"""
+
+import time
+import numpy as np
+
+
+class GazeRingBuffer(object):
+    """
+        Circular buffer of (x, y, timestamp) samples with a running sum of the samples in the window.
+    """
+
+    # The running sum is rebuilt from the stored samples after this many full turns of the buffer, so that floating
+    # point errors from adding and subtracting cannot build up over a long session.
+    resum_turns = 64
+
+    def __init__(self, capacity, clock=time.time):
+        """
+            input:
+                capacity - The number of most recent samples that are kept and averaged
+                clock - Function used to timestamp samples that are pushed without a timestamp
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1, got %r" % (capacity,))
+        self.capacity = int(capacity)
+        self.clock = clock
+        self.samples = np.zeros((self.capacity, 3))
+        self.running_sum = np.zeros(3)
+        self.index = 0  # Index the next sample is written to
+        self.count = 0
+        self.pushes = 0
+
+    def __len__(self):
+        return self.count
+
+    def push(self, sample, timestamp=None):
+        """
+            Puts a new sample in the buffer, overwriting the oldest sample when the buffer is full.
+            input:
+                sample - An (x, y) gaze position, e.g. the return value of EyeTracker.sample()
+                timestamp - Time of the sample. If None the buffer clock is used
+        """
+        if timestamp is None:
+            timestamp = self.clock()
+        row = self.samples[self.index]
+        if self.count == self.capacity:
+            self.running_sum -= row
+        else:
+            self.count += 1
+        row[0] = sample[0]
+        row[1] = sample[1]
+        row[2] = timestamp
+        self.running_sum += row
+
+        self.index += 1
+        if self.index == self.capacity:
+            self.index = 0
+        self.pushes += 1
+        if self.pushes == self.capacity * self.resum_turns:
+            self.pushes = 0
+            self.running_sum = self.samples[:self.count].sum(axis=0)
+
+    def mean(self):
+        """
+            Returns the mean (x, y) gaze position of the samples in the buffer. Returns None if the buffer is empty.
+        """
+        if self.count == 0:
+            return None
+        return self.running_sum[:2] / self.count
+
+    def mean_timestamp(self):
+        """
+            Returns the mean timestamp of the samples in the buffer, i.e. the time the mean position belongs to.
+        """
+        if self.count == 0:
+            return None
+        return self.running_sum[2] / self.count
+
+    def latest(self):
+        """
+            Returns the most recent (x, y, timestamp) sample, or None if the buffer is empty.
+        """
+        if self.count == 0:
+            return None
+        return self.samples[self.index - 1]
+
+    def to_array(self):
+        """
+            Returns a copy of the samples ordered from the newest to the oldest, the same order as the old rolling
+            array where the new value was put in the first index.
+        """
+        newest_first = np.roll(self.samples[::-1], self.index - self.capacity, axis=0)
+        if self.count < self.capacity:
+            return newest_first[:self.count].copy()
+        return newest_first
+
+    def clear(self):
+        """
+            Removes all samples from the buffer.
+        """
+        self.samples[:] = 0
+        self.running_sum[:] = 0
+        self.index = 0
+        self.count = 0
+        self.pushes = 0
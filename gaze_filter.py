@@ -0,0 +1,233 @@
+"""
+Description:
+    Low lag alternatives to the mean over the last 29 gaze samples. The mean of a window of n samples lags (n - 1) / 2
+    samples behind the gaze, about 15 samples for the drag loop, and every sample in the window weighs the same, so
+    noise during a fixation still shows up as jitter. The filters here keep a constant amount of state and update in
+    O(1) per sample:
+        OneEuroFilter - Low pass filter whose cutoff frequency rises with the gaze speed, so fixations are smoothed
+                        strongly and saccades are followed with little lag (Casiez et al., CHI 2012).
+        KalmanFilter  - Constant velocity Kalman filter of position and velocity on both axes.
+    The filters have the same push/mean/latest interface as gaze_buffer.GazeRingBuffer, so they can be used anywhere
+    the ring buffer is, e.g. with updateRollingArray or TobiiGazeSource.drainInto, and mean() returns the filtered
+    position. makeGazeFilter creates the ring buffer or one of the filters by name.
+    An example of how to use it:
+            gaze_array = makeGazeFilter('oneeuro')
+            gaze_array.push(eyetracker.sample())
+            current_gaze_mean = gaze_array.mean()
+"""
+
+import math
+import time
+import numpy as np
+
+import gaze_buffer
+
+
+class GazeFilter(object):
+    """
+        Base class of the filters. Subclasses implement update, which takes a sample and the time since the previous
+        one and updates self.position.
+    """
+
+    def __init__(self, rate=60.0, clock=time.time):
+        """
+            input:
+                rate - Sample rate of the eye tracker in Hz, used when two samples have the same timestamp
+                clock - Function used to timestamp samples that are pushed without a timestamp
+        """
+        self.default_dt = 1.0 / rate
+        self.clock = clock
+        self.clear()
+
+    def __len__(self):
+        return self.count
+
+    def push(self, sample, timestamp=None):
+        """
+            Filters a new (x, y) sample. Samples with a NaN coordinate, i.e. without a valid gaze, are ignored.
+        """
+        x = float(sample[0])
+        y = float(sample[1])
+        if math.isnan(x) or math.isnan(y):
+            return
+        if timestamp is None:
+            timestamp = self.clock()
+        if self.count == 0:
+            self.reset(x, y)
+        else:
+            dt = timestamp - self.last_sample[2]
+            self.update(x, y, dt if dt > 0 else self.default_dt)
+        self.last_sample[0] = x
+        self.last_sample[1] = y
+        self.last_sample[2] = timestamp
+        self.count += 1
+
+    def reset(self, x, y):
+        """
+            Starts the filter at the first sample.
+        """
+        self.position[0] = x
+        self.position[1] = y
+
+    def update(self, x, y, dt):
+        raise NotImplementedError
+
+    def mean(self):
+        """
+            Returns a copy of the filtered (x, y) gaze position, or None before the first sample. Named like
+            GazeRingBuffer.mean so the filters can replace the ring buffer.
+        """
+        if self.count == 0:
+            return None
+        return self.position.copy()
+
+    def mean_timestamp(self):
+        """
+            Returns the timestamp of the newest sample. The filters have no fixed delay like the mean window, their
+            lag depends on the gaze speed.
+        """
+        if self.count == 0:
+            return None
+        return self.last_sample[2]
+
+    def latest(self):
+        """
+            Returns the most recent raw (x, y, timestamp) sample, or None if no sample was pushed.
+        """
+        if self.count == 0:
+            return None
+        return self.last_sample
+
+    def clear(self):
+        """
+            Forgets all samples.
+        """
+        self.position = np.zeros(2)
+        self.last_sample = np.zeros(3)
+        self.count = 0
+
+
+class OneEuroFilter(GazeFilter):
+    """
+        One Euro filter on the gaze position. The cutoff frequency is min_cutoff + beta * speed, where the speed in
+        pixels per second is itself low pass filtered with d_cutoff. Lower min_cutoff removes more jitter during
+        fixations, higher beta reduces the lag during saccades.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=0.01, d_cutoff=1.0, rate=60.0, clock=time.time):
+        """
+            input:
+                min_cutoff - Cutoff frequency in Hz when the gaze is still
+                beta - Increase of the cutoff frequency in Hz per pixel per second of gaze speed
+                d_cutoff - Cutoff frequency in Hz of the speed estimate
+                rate - Sample rate of the eye tracker in Hz, used when two samples have the same timestamp
+                clock - Function used to timestamp samples that are pushed without a timestamp
+        """
+        self.min_cutoff = float(min_cutoff)
+        self.beta = float(beta)
+        self.d_cutoff = float(d_cutoff)
+        GazeFilter.__init__(self, rate, clock)
+
+    @staticmethod
+    def alpha(cutoff, dt):
+        """
+            Returns the smoothing factor of an exponential low pass filter with the cutoff frequency at a time step.
+        """
+        tau = 1.0 / (2.0 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def reset(self, x, y):
+        GazeFilter.reset(self, x, y)
+        self.vx = 0.0
+        self.vy = 0.0
+
+    def update(self, x, y, dt):
+        position = self.position
+        # Speed of the raw gaze relative to the filtered position, low pass filtered
+        a = self.alpha(self.d_cutoff, dt)
+        self.vx += a * ((x - position[0]) / dt - self.vx)
+        self.vy += a * ((y - position[1]) / dt - self.vy)
+        speed = math.sqrt(self.vx * self.vx + self.vy * self.vy)
+        a = self.alpha(self.min_cutoff + self.beta * speed, dt)
+        position[0] += a * (x - position[0])
+        position[1] += a * (y - position[1])
+
+
+class KalmanFilter(GazeFilter):
+    """
+        Kalman filter with a constant velocity model per axis, i.e. the state is the position and velocity on x and
+        y, and the gaze is modelled as moving with a random acceleration. Both axes have the same noise and time
+        steps, so they share one 2x2 covariance matrix, which is updated with scalar arithmetic.
+    """
+
+    def __init__(self, process_noise=5e4, measurement_noise=100.0, rate=60.0, clock=time.time):
+        """
+            input:
+                process_noise - Spectral density of the random acceleration in pixels^2 / s^3. Higher values follow
+                                saccades faster, lower values smooth more
+                measurement_noise - Variance of the eye tracker noise in pixels^2, e.g. 100 for a 10 pixel standard
+                                    deviation
+                rate - Sample rate of the eye tracker in Hz, used when two samples have the same timestamp
+                clock - Function used to timestamp samples that are pushed without a timestamp
+        """
+        self.q = float(process_noise)
+        self.r = float(measurement_noise)
+        GazeFilter.__init__(self, rate, clock)
+
+    def reset(self, x, y):
+        GazeFilter.reset(self, x, y)
+        self.vx = 0.0
+        self.vy = 0.0
+        # Covariance [[p00, p01], [p01, p11]] of position and velocity, starting at the measurement noise and a
+        # velocity that is unknown within a screen width per second
+        self.p00 = self.r
+        self.p01 = 0.0
+        self.p11 = 1e6
+
+    def update(self, x, y, dt):
+        position = self.position
+        q = self.q
+        # Predict: position += velocity * dt, covariance F P F' + Q for a random acceleration
+        px = position[0] + self.vx * dt
+        py = position[1] + self.vy * dt
+        p00 = self.p00 + dt * (2.0 * self.p01 + dt * self.p11) + q * dt * dt * dt / 3.0
+        p01 = self.p01 + dt * self.p11 + q * dt * dt / 2.0
+        p11 = self.p11 + q * dt
+        # Correct with the measured position
+        s = p00 + self.r
+        k0 = p00 / s
+        k1 = p01 / s
+        ex = x - px
+        ey = y - py
+        position[0] = px + k0 * ex
+        position[1] = py + k0 * ey
+        self.vx += k1 * ex
+        self.vy += k1 * ey
+        self.p00 = (1.0 - k0) * p00
+        self.p01 = (1.0 - k0) * p01
+        self.p11 = p11 - k1 * p01
+
+
+FILTERS = {
+    'mean': gaze_buffer.GazeRingBuffer,
+    'oneeuro': OneEuroFilter,
+    'kalman': KalmanFilter,
+}
+
+
+def makeGazeFilter(name='mean', **kwargs):
+    """
+        Creates a gaze filter by name.
+            input:
+                name - 'mean' for the 29 sample gaze_buffer.GazeRingBuffer, 'oneeuro' or 'kalman'
+                kwargs - Arguments of the filter class. rate is ignored for 'mean', so the same arguments can be
+                         passed whatever the name
+            return:
+                An object with push, mean, mean_timestamp, latest and clear
+    """
+    if name not in FILTERS:
+        raise ValueError("Unknown gaze filter %r, use one of %s" % (name, ', '.join(sorted(FILTERS))))
+    if name == 'mean':
+        kwargs.pop('rate', None)
+        kwargs.setdefault('capacity', 29)
+    return FILTERS[name](**kwargs)
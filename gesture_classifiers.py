@@ -0,0 +1,171 @@
+"""
+Description:
+    A registry of hand gesture classifiers that share one feature tensor per frame. Recognising a new gesture used to
+    mean another loop over hand.fingers with its own SWIG calls and its own angle computation. Here the features of
+    all hands of a frame are computed once from the hand_snapshot record, with gesture_kernel.boneAngles for the joint
+    angles, and every registered classifier is a function of those features that returns one boolean per hand. Adding
+    a gesture therefore only adds a few numpy comparisons to the hot path. The registry measures the time of the
+    feature computation and of every classifier, so a slow classifier shows up in timings.
+    The features work on any shape of hand records, so the same classifiers run on one live frame and on a whole
+    recording.
+    Built in gestures: fist, pinch, open palm and point.
+    An example of how to use it:
+            gestures = defaultRegistry()
+            gestures.register('thumbs_up', lambda features: features.curl[..., 0] < 0.5)
+            features, results = gestures.classify(snapshot['hands'][:snapshot['hand_count']])
+            if results['pinch'].any():
+                ...
+            print(gestures.timings())   # Mean seconds per call of every classifier
+"""
+
+import collections
+import time
+import numpy as np
+
+import gesture_kernel
+
+timer = getattr(time, 'perf_counter', time.time)
+
+FINGERS = slice(1, 5)  # Index, middle, ring and pinky finger
+
+# The features of the hands of a record, every field has the shape of the hand records as leading axes. angles are the
+# inter bone angles shaped (..., 5, 3), see gesture_kernel.boneAngles, curl is the sum of the three angles of every
+# finger shaped (..., 5). The other fields are copied from hand_snapshot.HAND_DTYPE.
+HandFeatures = collections.namedtuple('HandFeatures', ['ids', 'is_left', 'angles', 'curl', 'palm_normal',
+                                                       'grab_strength', 'pinch_strength'])
+
+
+def handFeatures(records):
+    """
+        Computes the features all classifiers share.
+            input:
+                records - hand_snapshot.HAND_DTYPE records of any shape, e.g. the tracked hands of one frame
+            return:
+                HandFeatures of the records
+    """
+    angles = gesture_kernel.boneAngles(records['bone_directions'])
+    return HandFeatures(records['id'], records['is_left'], angles, angles.sum(axis=-1), records['palm_normal'],
+                        records['grab_strength'], records['pinch_strength'])
+
+
+def fistGesture(features, threshold=gesture_kernel.FIST_THRESHOLD):
+    """
+        A fist, the mean knuckle angle of the index, middle and ring finger is above threshold radians. The same
+        decision as gesture_kernel.fistFromAngles.
+    """
+    return gesture_kernel.fistFromAngles(features.angles[..., 0], threshold)
+
+
+def pinchGesture(features, threshold=0.8):
+    """
+        The thumb and a finger touch, the Leap pinch strength is at least threshold.
+    """
+    return features.pinch_strength >= threshold
+
+
+def openPalmGesture(features, max_grab=0.2, max_curl=0.6):
+    """
+        A flat hand, the Leap grab strength is at most max_grab and no finger except the thumb is bent by more than
+        max_curl radians in total.
+    """
+    with np.errstate(invalid='ignore'):
+        return (features.grab_strength <= max_grab) & (features.curl[..., FINGERS].max(axis=-1) <= max_curl)
+
+
+def pointGesture(features, max_index_curl=0.6, min_curl=2.0):
+    """
+        Pointing with the index finger, the index finger is bent by at most max_index_curl radians and the middle, ring
+        and pinky finger by at least min_curl radians.
+    """
+    curl = features.curl
+    with np.errstate(invalid='ignore'):
+        return (curl[..., 1] <= max_index_curl) & (curl[..., 2:].min(axis=-1) >= min_curl)
+
+
+class GestureRegistry(object):
+    """
+        Named gesture classifiers evaluated on shared HandFeatures, with the time spent in each of them.
+    """
+
+    def __init__(self):
+        self.classifiers = collections.OrderedDict()  # name -> function(HandFeatures) returning booleans per hand
+        self.elapsed = {}  # name -> total seconds
+        self.calls = {}  # name -> number of calls
+        self.resetTimings()
+
+    def __len__(self):
+        return len(self.classifiers)
+
+    def __contains__(self, name):
+        return name in self.classifiers
+
+    def names(self):
+        return list(self.classifiers)
+
+    def register(self, name, classifier):
+        """
+            Adds a classifier, or replaces the classifier with the same name.
+                input:
+                    name - Name of the gesture, the key of its result in classify
+                    classifier - Function called with the HandFeatures of the hands, returning a boolean array with
+                                 their shape. Use functools.partial or a lambda to give it parameters
+        """
+        self.classifiers[name] = classifier
+        self.elapsed[name] = 0.0
+        self.calls[name] = 0
+
+    def unregister(self, name):
+        del self.classifiers[name]
+        del self.elapsed[name]
+        del self.calls[name]
+
+    def resetTimings(self):
+        for name in list(self.elapsed):
+            self.elapsed[name] = 0.0
+            self.calls[name] = 0
+        self.elapsed['features'] = 0.0
+        self.calls['features'] = 0
+
+    def classify(self, records):
+        """
+            Computes the features of hand records once and runs every classifier on them.
+                input:
+                    records - hand_snapshot.HAND_DTYPE records of any shape
+                return:
+                    features - HandFeatures of the records
+                    results - Dictionary from gesture name to a boolean array with the shape of records
+        """
+        elapsed = self.elapsed
+        calls = self.calls
+        start = timer()
+        features = handFeatures(records)
+        stop = timer()
+        elapsed['features'] += stop - start
+        calls['features'] += 1
+        results = {}
+        for name, classifier in self.classifiers.items():
+            start = stop
+            results[name] = classifier(features)
+            stop = timer()
+            elapsed[name] += stop - start
+            calls[name] += 1
+        return features, results
+
+    def timings(self):
+        """
+            Returns a dictionary from classifier name, and 'features' for the shared feature computation, to its mean
+            time per call in seconds.
+        """
+        return dict((name, self.elapsed[name] / self.calls[name] if self.calls[name] else 0.0) for name in self.elapsed)
+
+
+def defaultRegistry(fist_threshold=gesture_kernel.FIST_THRESHOLD):
+    """
+        Returns a GestureRegistry with the built in gestures 'fist', 'pinch', 'open_palm' and 'point'.
+    """
+    registry = GestureRegistry()
+    registry.register('fist', lambda features: fistGesture(features, fist_threshold))
+    registry.register('pinch', pinchGesture)
+    registry.register('open_palm', openPalmGesture)
+    registry.register('point', pointGesture)
+    return registry
@@ -0,0 +1,89 @@
+"""
+Description:
+    Vectorized versions of the finger angle and fist computations in gesture_reader.py. Instead of one hand and one
+    finger at a time, the functions take an array of bone directions shaped
+    (... , 5 fingers, 4 bones, 3) where the leading axes can be anything, e.g. (frames, hands). This means the same
+    code is used for a single live frame and for offline recordings of millions of frames.
+    The finger order is the Leap order (Thumb, Index, Middle, Ring, Pinky) and the bone order is
+    (Metacarpal, Proximal, Intermediate, Distal). Missing hands can be given as NaN and are never classified as a fist.
+    An example of how to use it:
+            directions = np.load('recording_directions.npy')   # (N, 2, 5, 4, 3)
+            angles, fist = classifyFist(directions)            # (N, 2, 5, 3), (N, 2)
+"""
+
+import numpy as np
+
+FIST_THRESHOLD = 1.3  # Mean knuckle angle in radians above which a hand is a fist, set imperically
+FIST_FINGERS = slice(1, 4)  # Index, middle and ring finger, the same fingers as angle_array[1:-1]
+CHUNK_SIZE = 65536  # Number of frames processed at a time by classifyFist to bound the memory of temporaries
+
+
+def unitVectors(vectors):
+    """
+        Returns the vectors along the last axis scaled to unit length. Zero length vectors become NaN.
+    """
+    vectors = np.asarray(vectors)
+    if vectors.dtype.kind != 'f':
+        vectors = vectors.astype(np.float64)
+    norm = np.sqrt(np.einsum('...i,...i->...', vectors, vectors))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return vectors / norm[..., np.newaxis]
+
+
+def boneAngles(directions):
+    """
+        Calculates the angles between neighbouring bones of every finger. Angles are measured in radians.
+            input:
+                directions - Bone directions shaped (..., 5, 4, 3)
+            return:
+                angles - Array shaped (..., 5, 3). angles[..., 0] is the angle between the Metacarpal and the Proximal
+                         phalanx, the input of fistFromAngles
+    """
+    unit = unitVectors(directions)
+    cos = np.einsum('...i,...i->...', unit[..., :-1, :], unit[..., 1:, :])
+    np.clip(cos, -1.0, 1.0, out=cos)
+    return np.arccos(cos, out=cos)
+
+
+def fistFromAngles(knuckle_angles, threshold=FIST_THRESHOLD):
+    """
+        Checks if a fist is made, the decision of the 'fist' gesture of gesture_classifiers.
+            input:
+                knuckle_angles - Angles between the Metacarpal and the Proximal phalanx shaped (..., 5)
+                threshold - Mean angle in radians of the index, middle and ring finger above which it is a fist
+            return:
+                fist - Boolean array shaped (...). Hands with NaN angles are False
+    """
+    knuckle_angles = np.asarray(knuckle_angles)
+    mean_angle = knuckle_angles[..., FIST_FINGERS].mean(axis=-1)
+    with np.errstate(invalid='ignore'):
+        return mean_angle > threshold
+
+
+def classifyFist(directions, threshold=FIST_THRESHOLD, chunk_size=CHUNK_SIZE):
+    """
+        Calculates all inter bone angles and fist decisions for an array of bone directions. The first axis is
+        processed in chunks of chunk_size so a long recording does not need several copies of itself in memory.
+            input:
+                directions - Bone directions shaped (..., 5, 4, 3)
+                threshold - See fistFromAngles
+                chunk_size - Number of entries along the first axis processed at a time
+            return:
+                angles - Array shaped (..., 5, 3), see boneAngles
+                fist - Boolean array shaped (...), see fistFromAngles
+    """
+    directions = np.asarray(directions)
+    if directions.shape[-3:] != (5, 4, 3):
+        raise ValueError("directions must be shaped (..., 5, 4, 3), got %r" % (directions.shape,))
+    if directions.ndim == 3 or len(directions) <= chunk_size:
+        angles = boneAngles(directions)
+        return angles, fistFromAngles(angles[..., 0], threshold)
+
+    dtype = directions.dtype if directions.dtype.kind == 'f' else np.float64
+    angles = np.empty(directions.shape[:-3] + (5, 3), dtype=dtype)
+    fist = np.empty(directions.shape[:-3], dtype=bool)
+    for start in range(0, len(directions), chunk_size):
+        stop = start + chunk_size
+        angles[start:stop] = boneAngles(directions[start:stop])
+        fist[start:stop] = fistFromAngles(angles[start:stop, ..., 0], threshold)
+    return angles, fist
@@ -21,9 +21,28 @@ Desciprtion:
             # Check if a fist is currently being made
             fiststatus = listener.getFist(controller)
             print(fiststatus)
+
+    The gestures are classified once per Leap frame in on_frame and published as a GestureSnapshot, so getFist only
+    reads the latest snapshot and never calls back into the controller. To handle every frame exactly once use
+    waitForFrame:
+            snapshot = listener.waitForFrame(snapshot.frame_id)
+    When on_frame is not called for some frames, because the listener was busy, the frames in between are taken from
+    the frame history of the controller and classified together with the new frame, so every frame votes once and the
+    votes follow time instead of the speed of the listener. dropped_frames counts the frames that were never
+    classified, because they were already gone from the history or catch_up is off.
+    Every hand keeps its own fist votes by hand id, see hand_state.py. getFist is the fist of the first hand in the
+    frame, getHandFist the fist of the left or the right hand.
+    All gestures are classified from one set of features per frame by the classifiers in gestures, see
+    gesture_classifiers.py. More gestures are added with
+            listener.gestures.register('thumbs_up', lambda features: features.curl[..., 0] < 0.5)
     
     Current recognized gestures:
         Fist - getFist(Leap.controller)
+        Pinch, open palm, point - getGesture('pinch'), getGesture('open_palm'), getGesture('point')
+        Swipe, circle, screen tap, key tap - recognised by the Leap service, see leap_gestures.py:
+            native_gestures = leap_gestures.GestureDispatcher()
+            native_gestures.addHandler(leap_gestures.SWIPE, on_swipe)
+            listener = SampleListener(native_gestures=native_gestures)
     
 Authors:
     Shagen Djanian, Aalborg University
@@ -39,20 +58,61 @@ sys.path.insert(0, os.path.abspath(os.path.join(src_dir, arch_dir)))
 import Leap
 import numpy as np
 import numpy.linalg as la
-import itertools
-import operator
-import math
-import pandas as pd
+import threading
+import collections
+import gesture_kernel
+import hand_snapshot
+import leap_fast
+import latency
+import hand_state
+import gesture_classifiers
+
+# The gesture state of one Leap frame. fist is None if no hand was detected, frame_id and timestamp are Frame.id and
+# Frame.timestamp (microseconds) of the frame it was computed from, hands is its hand_snapshot.FRAME_DTYPE record,
+# hand_fists has the fist of every hand in hands and edges the hand_state.FistEdges of the fists that started or ended.
+# gestures maps the name of every registered gesture to its undebounced result for every hand in hands. capture_time is
+# the capture time of the frame on the host clock in seconds while latency.tracker is enabled, otherwise None.
+GestureSnapshot = collections.namedtuple('GestureSnapshot', ['fist', 'frame_id', 'timestamp', 'hands', 'hand_fists',
+                                                             'edges', 'gestures', 'capture_time'])
 
 class SampleListener(Leap.Listener):
     finger_names = ['Thumb', 'Index', 'Middle', 'Ring', 'Pinky']
     bone_names = ['Metacarpal', 'Proximal', 'Intermediate', 'Distal']
-    fiveFistArray = [False,False,False,False,False]
+    fist_threshold = gesture_kernel.FIST_THRESHOLD
+    history_size = 60  # Number of frames the Leap service keeps, controller.frame(history) for history < history_size
+
+    def __init__(self, on_fist_start=None, on_fist_end=None, native_gestures=None, catch_up=True):
+        """
+        on_fist_start and on_fist_end are optional functions called with a hand_state.FistEdge on the Leap thread when
+        the fist of a hand starts or ends. native_gestures is an optional leap_gestures.GestureDispatcher, whose
+        gestures are enabled when the controller connects and whose handlers are called on the Leap thread. catch_up
+        classifies the frames that were missed between two calls of on_frame, see missedFrames.
+        """
+        Leap.Listener.__init__(self)
+        # on_frame replaces the whole tuple, so readers on other threads always see a consistent snapshot
+        self.snapshot = GestureSnapshot(None, -1, 0, hand_snapshot.emptySnapshot(), np.zeros(0, dtype=bool), [], {},
+                                        None)
+        self.fist_snapshot = self.snapshot  # The snapshot the last getFist read its fist from
+        self.frame_condition = threading.Condition()
+        # The fist state machine of every hand, per listener instead of one list shared by all listeners and hands. A
+        # fist starts at 4 of the last 5 votes, like the old majority vote, and only ends at 1 of 5
+        self.hand_states = hand_state.HandStateTable(votes=5, enter_votes=4, exit_votes=1, on_fist_start=on_fist_start,
+                                                     on_fist_end=on_fist_end)
+        # The gesture classifiers, all evaluated on the same features of a frame
+        self.gestures = gesture_classifiers.defaultRegistry(self.fist_threshold)
+        self.native_gestures = native_gestures
+        self.catch_up = catch_up
+        self.last_frame_id = None  # Frame.id of the last frame classified in on_frame
+        self.caught_up_frames = 0  # Number of missed frames that were classified from the history
+        self.dropped_frames = 0  # Number of frames that were never classified, missed and not caught up
+
     def on_init(self, controller):
         print("Initialized")
 
     def on_connect(self, controller):
         print("Connected")
+        if self.native_gestures is not None:
+            self.native_gestures.enable(controller)
 
     def on_disconnect(self, controller):
         # Note: not dispatched when running in a debugger.
@@ -61,173 +121,175 @@ class SampleListener(Leap.Listener):
     def on_exit(self, controller):
         print ("Exited")
         
-    def shift2(self,arr,num = 1):
+    def classifyFrame(self, frame, capture_time=None):
         """
-        Shifs the array by 1 using np.roll.
+        Reads the hands of a frame into a hand_snapshot record in one pass with the direct getters of leap_fast and
+        classifies it, see classifySnapshot.
         """
-        arr=np.roll(arr,num)
-        if num<0:
-             np.put(arr,range(len(arr)+num,len(arr)),np.nan)
-        elif num > 0:
-             np.put(arr,range(num),np.nan)
-        return arr
+        return self.classifySnapshot(leap_fast.snapshotFrame(frame), capture_time)
 
-    def shift1(self,arr,num = 1):
+    def classifySnapshot(self, hands, capture_time=None):
         """
-        Shifts the array by 1 converting array to panda, shifting and converting to list. 
+        Classifies all hands of a hand_snapshot record at once and returns its GestureSnapshot. Every hand id has its
+        own debounced state machine over the votes of the 5 most recent frames it was seen in, which becomes a fist at
+        4 fist votes and stops at 1, see hand_state.HandStateTable. fist is the fist of the first hand. Frames without
+        hands do not change the votes, but hands that are gone for a while are forgotten. The features of the hands
+        are computed once and shared by all registered gestures, whose results are in gestures. When 'fist' is
+        registered its result is what the fist votes count. capture_time is put in the snapshot as is.
         """
-        data = pd.Series(arr)
-        data = data.shift(num)
-        return data.tolist()
-
-
-    def most_common(L):
-      """
-          Gets the most common occurence in a list. Code from https://stackoverflow.com/questions/1518522/find-the-most-common-element-in-a-list/20872750
-      """
-      # get an iterable of (item, iterable) pairs
-      SL = sorted((x, i) for i, x in enumerate(L))
-      # print 'SL:', SL
-      groups = itertools.groupby(SL, key=operator.itemgetter(0))
-      # auxiliary function to get "quality" for an item
-      def _auxfun(g):
-        item, iterable = g
-        count = 0
-        min_index = len(L)
-        for _, where in iterable:
-          count += 1
-          min_index = min(min_index, where)
-        # print 'item %r, count %r, minind %r' % (item, count, min_index)
-        return count, -min_index
-      # pick the highest-count/earliest item
-      return max(groups, key=_auxfun)[0]          
+        frame_id = int(hands['frame_id'])
+        timestamp = int(hands['timestamp'])
+        features, gestures = self.gestures.classify(hands['hands'][:hands['hand_count']])
+        hand_fists = self.hand_states.update(hands, self.fist_threshold, gestures.get('fist'), features.angles)
+        edges = self.hand_states.edges
+        if hands['hand_count'] == 0:
+            return GestureSnapshot(None, frame_id, timestamp, hands, hand_fists, edges, gestures, capture_time)
+        return GestureSnapshot(bool(hand_fists[0]), frame_id, timestamp, hands, hand_fists, edges, gestures,
+                               capture_time)
 
-      # get an iterable of (item, iterable) pairs
- 
-
-    def updateRollingArray(self,arr,new_value):
+    def classifyFrames(self, frames, capture_time=None):
         """
-        Shifts the array and puts the new value in the first index's place
+        Reads consecutive frames, the oldest first, into hand_snapshot records and classifies them together, see
+        classifySnapshots.
         """
-        shifted_arr = self.shift2(arr)
-        shifted_arr[0] = new_value
-        return shifted_arr
-
-    def unit_vector(self,vector):
-        """ Returns the unit vector of the vector.  """
-        return vector / np.linalg.norm(vector)
+        records = hand_snapshot.emptySnapshot(len(frames))
+        for ii, frame in enumerate(frames):
+            leap_fast.snapshotFrame(frame, records[ii])
+        return self.classifySnapshots(records, capture_time)
 
-    def angle_between(self,v1, v2):
-        """ Returns the angle in radians between vectors 'v1' and 'v2'::
-                >>> angle_between((1, 0, 0), (0, 1, 0))
-                1.5707963267948966
-                >>> angle_between((1, 0, 0), (1, 0, 0))
-                0.0
-                >>> angle_between((1, 0, 0), (-1, 0, 0))
-                3.141592653589793
-        """
-        v1_u = self.unit_vector(v1)
-        v2_u = self.unit_vector(v2)
-        return np.arccos(np.clip(np.dot(v1_u, v2_u), -1.0, 1.0))
-    
-    def get_current_angles(self, controller):
+    def classifySnapshots(self, records, capture_time=None):
         """
-        Calculates the angles between the finger bones. The finger bone direction are stored in a Leap.Vector which has to be convected to numpy array.
-        Angles are measured in radians.
+        Classifies an array of consecutive hand_snapshot records, the oldest first. The features and gestures of all
+        hands of all records are computed in one call of the gesture classifiers, then the fist votes of every record
+        are added in order, like classifySnapshot does for one record. Returns the GestureSnapshot of the last record,
+        with the edges of all records and capture_time, which is the capture time of the last record.
         """
-        frame = controller.frame()
-        for hand in frame.hands:
+        features, gestures = self.gestures.classify(records['hands'])
+        fists = gestures.get('fist')
+        edges = []
+        for ii in range(len(records)):
+            hands = records[ii]
+            hand_count = int(hands['hand_count'])
+            raw_fist = None if fists is None else fists[ii, :hand_count]
+            hand_fists = self.hand_states.update(hands, self.fist_threshold, raw_fist, features.angles[ii, :hand_count])
+            edges.extend(self.hand_states.edges)
+        gestures = dict((name, result[-1, :hand_count]) for name, result in gestures.items())
+        fist = bool(hand_fists[0]) if hand_count else None
+        return GestureSnapshot(fist, int(hands['frame_id']), int(hands['timestamp']), hands, hand_fists, edges,
+                               gestures, capture_time)
 
-            #handType = "Left hand" if hand.is_left else "Right hand"
+    def missedFrames(self, controller, frame):
+        """
+        Returns the frames between the last frame classified in on_frame and frame, the oldest first, from the frame
+        history of the controller. Frames that are no longer in the history are missing from the list. Leap frame ids
+        are consecutive, so the gap is known from the ids.
+        """
+        last_frame_id = self.last_frame_id
+        if last_frame_id is None or frame.id <= last_frame_id + 1:
+            return []
+        frames = []
+        for history in range(self.history_size):
+            old_frame = controller.frame(history)
+            if not old_frame.is_valid or old_frame.id <= last_frame_id:
+                break
+            if old_frame.id < frame.id:  # The service may have added frames after frame
+                frames.append(old_frame)
+        frames.reverse()
+        self.caught_up_frames += len(frames)
+        return frames
 
-            #print ("  %s, id %d, position: %s" % (
-            #    handType, hand.id, hand.palm_position))
-            # Get fingers
-            bone_difference_angle_array = np.zeros(5)
-            ii = 0;
-            for finger in hand.fingers:
-                 #Get bones
-                close_finger_dir = finger.bone(0).direction # Metacarpals (first bone)
-                close_finger_dir_nparray = self.LeapVectorToNpArray(close_finger_dir)
-                
-                #print(close_finger_dir_nparray)
-                
-                far_finger_dir = finger.bone(1).direction # Proximal phalanges (second finger bone)
-                far_finger_dir_nparray = self.LeapVectorToNpArray(far_finger_dir)
-                #print(far_finger_dir_nparray)
+    def publishSnapshot(self, snapshot):
+        """
+        Swaps in a new snapshot and wakes up the threads waiting in waitForFrame.
+        """
+        with self.frame_condition:
+            self.snapshot = snapshot
+            self.frame_condition.notify_all()
 
-                angle = self.angle_between(close_finger_dir_nparray,far_finger_dir_nparray)
-                #print(angle)
-                bone_difference_angle_array[ii] = angle
-                ii = ii + 1
-                
-            if frame.hands.is_empty == True:
-                #print ("Empty")
-                #empty = np.zeros(5)
-                return 
-            else:
-                return bone_difference_angle_array 
+    def getSnapshot(self):
+        """
+        Returns the GestureSnapshot of the most recent frame. It does not call into the controller.
+        """
+        return self.snapshot
 
-    def checkFistGesture(self,angle_array):
+    def waitForFrame(self, last_frame_id, timeout=None):
         """
-        Checks if a fist is made. The mean of the finger angles is taken to ensure that all four fingers are closed for a first. threshold is set imperically
-            input:
-                angle_array - An array of the angles between the Metacarpals (first bone) and the Proximal phalanges (second finger bone). The first index is the thumb
+        Blocks until a frame newer than last_frame_id has been classified and returns its snapshot. If the timeout in
+        seconds runs out the current snapshot is returned, which may still have last_frame_id.
         """
-        if angle_array is None:
-            return False
-        
-        drop_thumb = angle_array[1:-1]
-        mean_angle = np.mean(drop_thumb)
-        threshold = 1.3
-        if mean_angle>threshold:
-            fist = True
-        else:
-            fist = False
-        return fist
+        with self.frame_condition:
+            if self.snapshot.frame_id == last_frame_id:
+                self.frame_condition.wait(timeout)
+            return self.snapshot
 
-    def getMajorityBool(self,arr):
+    def getFist(self, controller=None):
         """
-            Counts how many trues are in a boolean array. If there are more trues than false, returns true.
+        Get the status of a fist. If no hand is detected it prints no hands. The fist is classified in on_frame, this
+        only reads the latest snapshot, so the controller argument is not used anymore and only kept for old callers.
+        The snapshot it was read from is kept in fist_snapshot.
         """
-        #num_true = arr.count(True)
-        num_true = sum(arr)
-        if num_true > math.ceil(len(arr)/2.0):
-            return True
-        else:
-            return False
+        snapshot = self.snapshot
+        self.fist_snapshot = snapshot
+        fist_status = snapshot.fist
+        if latency.tracker.enabled:
+            latency.tracker.mark('getFist', latency.captureTimes(snapshot))
+        if fist_status is None:
+            print ("No hand detected")
+        return fist_status
 
-    def getFist(self, controller):
+    def getHandFist(self, is_left):
         """
-        Get the status of a fist. If no hand is detected it prints no hands. Is uses a rolling mean, so if the 5 most
-        recent samples for a fist are true it returns true.
+        Get the status of the fist of the left hand if is_left is True, or of the right hand if it is False. Returns
+        None if that hand is not tracked.
         """
-        
-        angle_array = self.get_current_angles(controller)
-        frame = controller.frame()
-        if frame.hands.is_empty == True:
-                print ("No hand detected")
-                return
-        else:
-            fist_status = self.checkFistGesture(angle_array)
-            self.fiveFistArray = self.updateRollingArray(self.fiveFistArray,fist_status)
-            fist_status = self.getMajorityBool(self.fiveFistArray)
-            return fist_status
-        
-    def LeapVectorToNpArray(self,leap_vec):
+        snapshot = self.snapshot
+        hands = snapshot.hands['hands'][:snapshot.hands['hand_count']]
+        for hand_is_left, fist_status in zip(hands['is_left'], snapshot.hand_fists):
+            if hand_is_left == is_left:
+                return bool(fist_status)
+        return None
+
+    def getGesture(self, name, is_left=None):
         """
-        Converts a Leap.Vector to a numpy array. Leap.Vector is a class in the Leap package
+        Get the result of a registered gesture, see gesture_classifiers.py, for the first hand in the frame, or for the
+        left or right hand if is_left is True or False. Unlike the fist it is not debounced. Returns None if that hand
+        is not tracked.
         """
-        tup = leap_vec.to_tuple()
-        nparray = np.asarray(tup)
-        return nparray
-    
+        snapshot = self.snapshot
+        results = snapshot.gestures.get(name)
+        if results is None:
+            if name not in self.gestures:
+                raise KeyError("No gesture called %r is registered" % (name,))
+            return None
+        hands = snapshot.hands['hands'][:snapshot.hands['hand_count']]
+        for hand_is_left, result in zip(hands['is_left'], results):
+            if is_left is None or hand_is_left == is_left:
+                return bool(result)
+        return None
+        
     def on_frame(self, controller):
         '''
-        Sample code from leap motion. Uncomment all print all values you receive from a hand.
+        Classifies every new frame once and publishes the result, see classifyFrame. With catch_up the frames missed
+        since the last call are classified with it, see missedFrames. The missed frames that are not classified are
+        counted in dropped_frames with or without catch_up. Below is the sample code from leap motion.
+        Uncomment all print all values you receive from a hand.
         '''
         # Get the most recent frame and report some basic information
         frame = controller.frame()
+        capture_time = latency.tracker.frameCaptureTime(frame, controller) if latency.tracker.enabled else None
+        missed_frames = self.missedFrames(controller, frame) if self.catch_up else []
+        if self.last_frame_id is not None and frame.id > self.last_frame_id + 1:
+            self.dropped_frames += frame.id - self.last_frame_id - 1 - len(missed_frames)
+        if missed_frames:
+            snapshot = self.classifyFrames(missed_frames + [frame], capture_time)
+        else:
+            snapshot = self.classifyFrame(frame, capture_time)
+        self.publishSnapshot(snapshot)
+        self.last_frame_id = frame.id
+        if self.native_gestures is not None:
+            self.native_gestures.dispatch(frame)
+        if capture_time is not None:
+            latency.tracker.mark('on_frame', latency.captureTimes(snapshot))
 
 #        print ("Frame id: %d, timestamp: %d, hands: %d, fingers: %d" % (
 #              frame.id, frame.timestamp, len(frame.hands), len(frame.fingers)))
@@ -290,11 +352,11 @@ def main():
     # Keep this process running until Enter is pressed
     print ("Press Enter to quit...")
     try:
+        snapshot = listener.getSnapshot()
         while True:
             #sys.stdin.readline()
-            #foo = listener.get_current_angles(controller)
-            foo = listener.getFist(controller)
-            print(foo)
+            snapshot = listener.waitForFrame(snapshot.frame_id, 1.0)
+            print(snapshot.fist)
             #controller.add_listener(listener)
     except KeyboardInterrupt:
         pass
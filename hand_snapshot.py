@@ -0,0 +1,102 @@
+"""
+Description:
+    A compact copy of the hand data of a Leap frame as a numpy structured array. Every property read on a Leap.Hand,
+    Finger, Bone or Vector goes through the SWIG __getattr__ dispatch, so the data the gesture code needs is read
+    once per frame in a single pass by snapshotFrame, and everything downstream works on the snapshot instead of on
+    the live SWIG objects. The record has a fixed size, so snapshots of many frames can be stored in one array.
+    An example of how to use it:
+            snapshot = snapshotFrame(controller.frame())
+            if snapshot['hand_count'] > 0:
+                directions = snapshot['hands']['bone_directions'][0]   # (5, 4, 3) of the first hand
+"""
+
+import numpy as np
+
+MAX_HANDS = 2  # The Leap service tracks at most two hands
+
+HAND_DTYPE = np.dtype([
+    ('id', '<i4'),
+    ('is_left', '?'),
+    ('palm_position', '<f4', (3,)),
+    ('palm_normal', '<f4', (3,)),
+    ('palm_velocity', '<f4', (3,)),
+    ('grab_strength', '<f4'),
+    ('pinch_strength', '<f4'),
+    ('bone_directions', '<f4', (5, 4, 3)),  # Finger (Thumb..Pinky) x bone (Metacarpal..Distal) x xyz
+])
+
+FRAME_DTYPE = np.dtype([
+    ('frame_id', '<i8'),
+    ('timestamp', '<i8'),
+    ('hand_count', '<i4'),
+    ('hands', HAND_DTYPE, (MAX_HANDS,)),
+])
+
+
+def emptySnapshot(shape=()):
+    """
+        Returns zeroed frame snapshots with the given shape, e.g. () for one frame or (n,) for a recording.
+    """
+    return np.zeros(shape, dtype=FRAME_DTYPE)
+
+
+def fillHand(hand, out):
+    """
+        Copies the data of a Leap.Hand into a HAND_DTYPE record.
+    """
+    out['id'] = hand.id
+    out['is_left'] = hand.is_left
+    out['palm_position'] = hand.palm_position.to_tuple()
+    out['palm_normal'] = hand.palm_normal.to_tuple()
+    out['palm_velocity'] = hand.palm_velocity.to_tuple()
+    out['grab_strength'] = hand.grab_strength
+    out['pinch_strength'] = hand.pinch_strength
+    boneDirections(hand, out['bone_directions'])
+
+
+def boneDirections(hand, out=None):
+    """
+        Returns the directions of all 20 bones of a Leap.Hand as a (5, 4, 3) array ordered by finger and bone.
+    """
+    if out is None:
+        out = np.empty((5, 4, 3), dtype=np.float32)
+    ii = 0
+    for finger in hand.fingers:
+        for jj in range(4):
+            out[ii, jj] = finger.bone(jj).direction.to_tuple()
+        ii = ii + 1
+    return out
+
+
+def snapshotFrame(frame, out=None):
+    """
+        Reads the hands of a Leap.Frame into a FRAME_DTYPE record in one pass. Hands after the first MAX_HANDS are
+        ignored, unused hand slots are left zeroed.
+            input:
+                frame - Leap.Frame
+                out - Optional FRAME_DTYPE record to fill, e.g. a row of a recording array, to avoid an allocation
+            return:
+                The filled record
+    """
+    if out is None:
+        out = emptySnapshot()
+    else:
+        out['hands'] = 0
+    out['frame_id'] = frame.id
+    out['timestamp'] = frame.timestamp
+    hands = out['hands']
+    hand_count = 0
+    for hand in frame.hands:
+        if hand_count == MAX_HANDS:
+            break
+        fillHand(hand, hands[hand_count])
+        hand_count += 1
+    out['hand_count'] = hand_count
+    return out
+
+
+def handDirections(snapshot):
+    """
+        Returns the bone directions of the tracked hands of a snapshot shaped (hand_count, 5, 4, 3).
+    """
+    return snapshot['hands']['bone_directions'][:snapshot['hand_count']]
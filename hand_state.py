@@ -0,0 +1,168 @@
+"""
+Description:
+    Gesture state kept per tracked hand. The fist votes used to be a single fiveFistArray on the SampleListener class,
+    shared by every listener and by both hands, and only the first hand of a frame was classified. HandStateTable
+    gives every hand id the Leap service reports its own slot with a debounce.Debouncer over the fist votes of the
+    last frames, remembers whether it is a left or a right hand, and frees the slot when the hand has not been seen
+    for evict_after seconds. All hands of a frame are classified with one gesture_kernel call. When the fist of a hand
+    starts or ends, or a hand with a fist is evicted, an edge event is sent to the callbacks and listed in edges.
+    An example of how to use it:
+            hand_states = HandStateTable(on_fist_start=grab, on_fist_end=release)
+            fists = hand_states.update(hand_snapshot.snapshotFrame(frame))   # One bool per hand in the frame
+            left_fist = hand_states.handFist(is_left=True)                 # None if no left hand is tracked
+"""
+
+import collections
+import numpy as np
+
+import debounce
+import gesture_kernel
+
+LEFT, RIGHT = True, False  # Values of is_left
+
+# A fist transition of a hand. edge is debounce.START or debounce.END, timestamp is the Leap timestamp in microseconds.
+FistEdge = collections.namedtuple('FistEdge', ['edge', 'hand_id', 'is_left', 'timestamp'])
+
+
+class HandStateTable(object):
+    """
+        Fixed number of hand slots, each with the id, side, time last seen and fist state machine of one hand.
+    """
+
+    def __init__(self, votes=5, enter_votes=4, exit_votes=1, min_active=0.0, min_inactive=0.0, max_hands=8,
+                 evict_after=0.5, on_fist_start=None, on_fist_end=None):
+        """
+            input:
+                votes - Number of most recent frames that vote on the fist of a hand
+                enter_votes - Number of fist votes at or above which a hand becomes a fist, see debounce.Debouncer
+                exit_votes - Number of fist votes at or below which a hand stops being a fist
+                min_active - Minimum time in seconds a fist lasts
+                min_inactive - Minimum time in seconds between the end of a fist and the next fist of a hand
+                max_hands - Number of hands kept at the same time. When a new hand does not fit, the hand seen least
+                            recently is evicted
+                evict_after - Seconds after which a hand that has not been seen is forgotten
+                on_fist_start - Optional function called with a FistEdge when a fist starts
+                on_fist_end - Optional function called with a FistEdge when a fist ends
+        """
+        self.debounce_args = dict(window=votes, enter_votes=enter_votes, exit_votes=exit_votes,
+                                  min_active=min_active, min_inactive=min_inactive)
+        self.max_hands = int(max_hands)
+        self.evict_after = int(evict_after * 1e6)  # Leap timestamps are in microseconds
+        self.callbacks = {debounce.START: on_fist_start, debounce.END: on_fist_end}
+        self.clear()
+
+    def __len__(self):
+        return len(self.slots)
+
+    def clear(self):
+        """
+            Forgets all hands.
+        """
+        n = self.max_hands
+        self.slots = {}  # hand id -> slot
+        self.ids = np.full(n, -1, dtype=np.int64)
+        self.is_left = np.zeros(n, dtype=bool)
+        self.last_seen = np.zeros(n, dtype=np.int64)
+        self.debouncers = [debounce.Debouncer(**self.debounce_args) for _ in range(n)]
+        self.raw_fist = np.zeros(n, dtype=bool)
+        self.fist = np.zeros(n, dtype=bool)
+        self.angles = np.full((n, 5), np.nan)
+        self.edges = []  # FistEdges of the last update
+
+    def slotFor(self, hand_id, timestamp):
+        """
+            Returns the slot of a hand id, assigning a fresh slot to a new hand.
+        """
+        slot = self.slots.get(hand_id)
+        if slot is not None:
+            return slot
+        if len(self.slots) < self.max_hands:
+            slot = int(np.flatnonzero(self.ids < 0)[0])
+        else:
+            slot = int(np.argmin(self.last_seen))
+            self.evict(slot, timestamp)
+        self.slots[hand_id] = slot
+        self.ids[slot] = hand_id
+        self.last_seen[slot] = timestamp
+        self.debouncers[slot].reset()
+        self.fist[slot] = False
+        return slot
+
+    def evict(self, slot, timestamp):
+        """
+            Frees the slot of a hand. A fist that is still held ends.
+        """
+        self.sendEdge(self.debouncers[slot].exit(timestamp * 1e-6), slot, timestamp)
+        self.fist[slot] = False
+        del self.slots[int(self.ids[slot])]
+        self.ids[slot] = -1
+        self.angles[slot] = np.nan
+
+    def sendEdge(self, edge, slot, timestamp):
+        if edge is None:
+            return
+        fist_edge = FistEdge(edge, int(self.ids[slot]), bool(self.is_left[slot]), timestamp)
+        self.edges.append(fist_edge)
+        callback = self.callbacks[edge]
+        if callback is not None:
+            callback(fist_edge)
+
+    def update(self, hands, threshold=gesture_kernel.FIST_THRESHOLD, raw_fist=None, angles=None):
+        """
+            Classifies all hands of a hand_snapshot record at once, updates their fist state machines and evicts the
+            hands that were not seen for evict_after. The fist edges of the record are in edges afterwards.
+            input:
+                hands - hand_snapshot.FRAME_DTYPE record
+                threshold - Fist threshold in radians, see gesture_kernel.fistFromAngles
+                raw_fist - Optional fist decision of every tracked hand, when the frame was already classified, e.g.
+                           by gesture_classifiers.GestureRegistry. threshold is not used then
+                angles - Optional inter bone angles shaped (hand_count, 5, 3) that go with raw_fist. They are
+                         computed from the records when raw_fist is given without them
+            return:
+                Boolean array with the debounced fist of every hand in the record, in the order of the record
+        """
+        timestamp = int(hands['timestamp'])
+        hand_count = int(hands['hand_count'])
+        self.edges = []
+        if hand_count:
+            records = hands['hands'][:hand_count]
+            if raw_fist is None:
+                angles, raw_fist = gesture_kernel.classifyFist(records['bone_directions'], threshold)
+            elif angles is None:
+                angles = gesture_kernel.boneAngles(records['bone_directions'])
+            slots = np.array([self.slotFor(int(hand_id), timestamp) for hand_id in records['id']], dtype=np.intp)
+            self.is_left[slots] = records['is_left']
+            self.last_seen[slots] = timestamp
+            self.angles[slots] = angles[:, :, 0]
+            self.raw_fist[slots] = raw_fist
+            seconds = timestamp * 1e-6
+            for slot, value in zip(slots, raw_fist):
+                debouncer = self.debouncers[slot]
+                self.sendEdge(debouncer.update(value, seconds), slot, timestamp)
+                self.fist[slot] = debouncer.active
+        else:
+            slots = np.zeros(0, dtype=np.intp)
+        stale = (self.ids >= 0) & (timestamp - self.last_seen > self.evict_after)
+        for slot in np.flatnonzero(stale):
+            self.evict(slot, timestamp)
+        return self.fist[slots]
+
+    def handFist(self, is_left=None):
+        """
+            Returns the fist of the most recently seen hand of a side, or of any side if is_left is None. Returns None
+            if no such hand is tracked.
+        """
+        tracked = self.ids >= 0
+        if is_left is not None:
+            tracked &= self.is_left == is_left
+        if not tracked.any():
+            return None
+        candidates = np.flatnonzero(tracked)
+        return bool(self.fist[candidates[np.argmax(self.last_seen[candidates])]])
+
+    def handStates(self):
+        """
+            Returns a list of (hand id, is_left, fist) of the tracked hands.
+        """
+        return [(int(self.ids[slot]), bool(self.is_left[slot]), bool(self.fist[slot]))
+                for slot in sorted(self.slots.values())]
@@ -0,0 +1,241 @@
+"""
+Description:
+    Instrumentation of the end to end latency from capture to actuation. Every Leap frame and gaze sample carries its
+    capture time on the host clock: the GestureSnapshot of a frame in capture_time and a gaze sample in its timestamp
+    in the gaze buffer. Every stage of the loop (on_frame, getFist, updateRollingArray, movePynput, ...) is given the
+    capture times of the data it worked on, see captureTimes, and records how old that data was when it ran. The
+    actuation stage keeps the capture times with the target it holds back, so the age at a window move is the age of
+    the data that target was made from. The ages are kept in HDR style histograms with a bounded relative error, and
+    can be dumped as a table or printed live.
+    The instrumentation is off until it is enabled, then the hooks only cost a dictionary lookup and a few integer
+    operations each.
+    An example of how to use it:
+            import latency
+            latency.tracker.enable()
+            ...
+            latency.tracker.startLiveView(2.0)   # Prints the table every 2 seconds
+            latency.tracker.mark('movePynput', latency.captureTimes(listener.getSnapshot(), gaze_array))
+            print(latency.tracker.dump())
+"""
+
+import threading
+import time
+import numpy as np
+
+HAND = 'hand'
+GAZE = 'gaze'
+GAZE_MEAN = 'mean'  # The smoothed gaze, aged by the mean timestamp of the samples in the window
+
+
+def captureTimes(snapshot=None, gaze_array=None):
+    """
+        Returns the capture times of the data a stage worked on as a dictionary from source to time on the host clock
+        in seconds, for LatencyTracker.mark.
+            input:
+                snapshot - gesture_reader.GestureSnapshot the hand data came from, its capture_time is used for HAND
+                gaze_array - Gaze buffer or filter the gaze came from, the timestamp of its newest sample is used for
+                             GAZE and its mean timestamp for GAZE_MEAN
+    """
+    captures = {}
+    if snapshot is not None and snapshot.capture_time is not None:
+        captures[HAND] = snapshot.capture_time
+    if gaze_array is not None:
+        latest = gaze_array.latest()
+        if latest is not None:
+            captures[GAZE] = float(latest[2])
+            captures[GAZE_MEAN] = gaze_array.mean_timestamp()
+    return captures
+
+
+class LatencyHistogram(object):
+    """
+        Log-linear histogram of integer latencies in microseconds, in the style of an HdrHistogram. Values below
+        2**significant_bits are counted exactly, larger values are counted in buckets with a relative width of at most
+        2**(1 - significant_bits). Recording a value is O(1).
+    """
+
+    def __init__(self, significant_bits=7, max_value=60 * 10**6):
+        self.significant_bits = significant_bits
+        self.sub_count = 2 ** significant_bits
+        self.half_count = self.sub_count // 2
+        self.max_value = max_value
+        self.counts = np.zeros(self.bucketIndex(max_value) + 1, dtype=np.int64)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def bucketIndex(self, value):
+        if value < self.sub_count:
+            return value
+        shift = value.bit_length() - self.significant_bits
+        return self.sub_count + (shift - 1) * self.half_count + (value >> shift) - self.half_count
+
+    def bucketValue(self, index):
+        """
+            Returns the highest value that is counted in the bucket.
+        """
+        if index < self.sub_count:
+            return index
+        shift, sub_index = divmod(index - self.sub_count, self.half_count)
+        shift += 1
+        return ((sub_index + self.half_count + 1) << shift) - 1
+
+    def record(self, value):
+        """
+            Records a latency in microseconds. Negative values, from clocks that are slightly off, count as 0 and
+            values above max_value count as max_value.
+        """
+        value = min(max(int(value), 0), self.max_value)
+        self.counts[self.bucketIndex(value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, percent):
+        """
+            Returns the latency in microseconds that percent of the recorded values are below or equal to.
+        """
+        if self.count == 0:
+            return None
+        rank = max(1, int(np.ceil(percent / 100.0 * self.count)))
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+        return min(self.bucketValue(index), self.max)
+
+    def mean(self):
+        if self.count == 0:
+            return None
+        return self.total / float(self.count)
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    def reset(self):
+        self.counts[:] = 0
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+
+class LatencyTracker(object):
+    """
+        Keeps one histogram per stage and source of the age of the data the stage worked on.
+    """
+
+    percentiles = [50, 90, 99, 99.9]
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.enabled = False
+        self.histograms = {}
+        self.lock = threading.Lock()
+        self.live_thread = None
+        self.live_stop = threading.Event()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def frameCaptureTime(self, frame, controller):
+        """
+            Returns the capture time of a Leap frame on the host clock in seconds. Frame.timestamp and
+            Controller.now() are on the device clock in microseconds, so their difference is the age of the frame.
+        """
+        return self.clock() - (controller.now() - frame.timestamp) * 1e-6
+
+    def mark(self, stage, captures):
+        """
+            Records the age at a stage of the data it worked on.
+            input:
+                stage - Name of the stage
+                captures - Dictionary from source to the capture time of its data, see captureTimes. Sources with a
+                           capture time of None are skipped
+        """
+        if not captures:
+            return
+        now = self.clock()
+        with self.lock:
+            for source, capture_time in captures.items():
+                if capture_time is None:
+                    continue
+                key = (stage, source)
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = self.histograms[key] = LatencyHistogram()
+                histogram.record((now - capture_time) * 1e6)
+
+    def summary(self):
+        """
+            Returns a dictionary from (stage, source) to count, mean, max and percentiles in milliseconds.
+        """
+        result = {}
+        with self.lock:
+            for key, histogram in self.histograms.items():
+                if histogram.count == 0:
+                    continue
+                stats = {'count': histogram.count, 'mean': histogram.mean() * 1e-3, 'max': histogram.max * 1e-3}
+                for percent in self.percentiles:
+                    stats['p%g' % percent] = histogram.percentile(percent) * 1e-3
+                result[key] = stats
+        return result
+
+    def dump(self):
+        """
+            Returns the summary as a text table.
+        """
+        columns = ['p%g' % percent for percent in self.percentiles] + ['mean', 'max']
+        lines = [("%-22s %-5s %9s" + " %9s" * len(columns)) % tuple(['stage', 'data', 'count'] + columns)]
+        summary = self.summary()
+        for stage, source in sorted(summary):
+            stats = summary[(stage, source)]
+            lines.append(("%-22s %-5s %9d" + " %9.2f" * len(columns)) % tuple(
+                [stage, source, stats['count']] + [stats[c] for c in columns]))
+        lines.append('(ages in ms from capture of the data a stage worked on to the stage)')
+        return '\n'.join(lines)
+
+    def reset(self):
+        with self.lock:
+            for histogram in self.histograms.values():
+                histogram.reset()
+
+    def startLiveView(self, interval=2.0, reset=False, out=None):
+        """
+            Prints the table every interval seconds from a background thread. With reset the histograms are cleared
+            after every print, so each table covers only the last interval.
+        """
+        def liveView():
+            while not self.live_stop.wait(interval):
+                text = self.dump()
+                if out is None:
+                    print(text)
+                else:
+                    out.write(text + '\n')
+                if reset:
+                    self.reset()
+
+        self.live_stop.clear()
+        self.live_thread = threading.Thread(target=liveView)
+        self.live_thread.daemon = True
+        self.live_thread.start()
+
+    def stopLiveView(self):
+        self.live_stop.set()
+        if self.live_thread is not None:
+            self.live_thread.join()
+            self.live_thread = None
+
+
+# The tracker used by the hooks in gesture_reader and eye_gaze_gesture_mini_project
+tracker = LatencyTracker()
@@ -0,0 +1,125 @@
+"""
+Description:
+    Fast access to the Leap properties that are read every frame. A property like Vector.x or Bone.direction on the
+    SWIG proxies in Leap.py is resolved through __getattr__, _swig_getattr and a __swig_getmethods__ lookup on every
+    access, Vector.to_tuple() does that three times, and iterating a HandList or FingerList calls len() and
+    __getitem__ through the same machinery for every item. This module binds the underlying LeapPython getters
+    directly, and has bulk helpers that read for example all 20 bone directions of a hand into a (5, 4, 3) array.
+    The functions take the usual Leap proxy objects and return the same values as the properties.
+    An example of how to use it:
+            directions = handBoneDirections(frame.hands[0])   # (5, 4, 3)
+            snapshot = snapshotFrame(frame)                   # hand_snapshot.FRAME_DTYPE record
+"""
+## Finds the relative path to the correct library needed for Leap.py
+import os, sys, inspect
+src_dir = os.path.dirname(inspect.getfile(inspect.currentframe()))
+arch_dir = '../lib/x64' if sys.maxsize > 2**32 else '../lib/x86'
+sys.path.insert(0, os.path.abspath(os.path.join(src_dir, arch_dir)))
+
+import Leap
+import numpy as np
+import hand_snapshot
+
+# Stand-in Leap modules, such as the one in benchmarks/standins.py, have no LeapPython to bind to
+AVAILABLE = hasattr(Leap, 'LeapPython')
+
+if AVAILABLE:
+    _lp = Leap.LeapPython
+
+    vectorX = _lp.Vector_x_get
+    vectorY = _lp.Vector_y_get
+    vectorZ = _lp.Vector_z_get
+
+    frameId = _lp.Frame_id_get
+    frameTimestamp = _lp.Frame_timestamp_get
+    frameHands = _lp.Frame_hands_get
+
+    handListLength = _lp.HandList___len__
+    handListItem = _lp.HandList___getitem__
+    handId = _lp.Hand_id_get
+    handIsLeft = _lp.Hand_is_left_get
+    handFingers = _lp.Hand_fingers_get
+    handPalmPosition = _lp.Hand_palm_position_get
+    handPalmNormal = _lp.Hand_palm_normal_get
+    handPalmVelocity = _lp.Hand_palm_velocity_get
+    handGrabStrength = _lp.Hand_grab_strength_get
+    handPinchStrength = _lp.Hand_pinch_strength_get
+
+    fingerListLength = _lp.FingerList___len__
+    fingerListItem = _lp.FingerList___getitem__
+    fingerBone = _lp.Finger_bone
+    boneDirection = _lp.Bone_direction_get
+
+    def vectorTuple(vector):
+        """
+            Same as Leap.Vector.to_tuple().
+        """
+        return (vectorX(vector), vectorY(vector), vectorZ(vector))
+
+    def frameHandList(frame):
+        """
+            Returns the hands of a frame as a python list.
+        """
+        hands = frameHands(frame)
+        return [handListItem(hands, ii) for ii in range(handListLength(hands))]
+
+    def handBoneDirections(hand, out=None):
+        """
+            Returns the directions of all 20 bones of a hand as a (5, 4, 3) float32 array ordered by finger and bone,
+            see hand_snapshot.boneDirections. The 60 values are collected in a list and copied into the array at once.
+        """
+        if out is None:
+            out = np.empty((5, 4, 3), dtype=np.float32)
+        fingers = handFingers(hand)
+        values = []
+        for ii in range(fingerListLength(fingers)):
+            finger = fingerListItem(fingers, ii)
+            for jj in range(4):
+                direction = boneDirection(fingerBone(finger, jj))
+                values.append(vectorX(direction))
+                values.append(vectorY(direction))
+                values.append(vectorZ(direction))
+        out.reshape(-1)[:len(values)] = values
+        return out
+
+    def fillHand(hand, out):
+        """
+            Same as hand_snapshot.fillHand using the direct getters.
+        """
+        out['id'] = handId(hand)
+        out['is_left'] = handIsLeft(hand)
+        out['palm_position'] = vectorTuple(handPalmPosition(hand))
+        out['palm_normal'] = vectorTuple(handPalmNormal(hand))
+        out['palm_velocity'] = vectorTuple(handPalmVelocity(hand))
+        out['grab_strength'] = handGrabStrength(hand)
+        out['pinch_strength'] = handPinchStrength(hand)
+        handBoneDirections(hand, out['bone_directions'])
+
+    def snapshotFrame(frame, out=None):
+        """
+            Same as hand_snapshot.snapshotFrame using the direct getters.
+        """
+        if out is None:
+            out = hand_snapshot.emptySnapshot()
+        else:
+            out['hands'] = 0
+        out['frame_id'] = frameId(frame)
+        out['timestamp'] = frameTimestamp(frame)
+        hands = frameHands(frame)
+        hand_count = min(handListLength(hands), hand_snapshot.MAX_HANDS)
+        out_hands = out['hands']
+        for ii in range(hand_count):
+            fillHand(handListItem(hands, ii), out_hands[ii])
+        out['hand_count'] = hand_count
+        return out
+else:
+    # Without LeapPython the generic versions work on any objects with the Leap attributes
+    def vectorTuple(vector):
+        return vector.to_tuple()
+
+    def frameHandList(frame):
+        return list(frame.hands)
+
+    handBoneDirections = hand_snapshot.boneDirections
+    fillHand = hand_snapshot.fillHand
+    snapshotFrame = hand_snapshot.snapshotFrame
@@ -0,0 +1,214 @@
+"""
+Description:
+    Dispatch of the gestures the Leap service recognises itself: swipe, circle, screen tap and key tap. The SDK only
+    reports them after Controller.enable_gesture, and a gesture that lasts several frames, like a swipe, is listed in
+    every one of them, first with STATE_START, then with STATE_UPDATE and at the end with STATE_STOP. Taps are only
+    reported once with STATE_STOP. GestureDispatcher remembers the last frame it read and drains
+    Frame.gestures(sinceFrame) from there, so the gestures of frames that were skipped are not lost and a frame is
+    never read twice. Every gesture id is delivered with START and STOP once, and with the newest UPDATE of a drain,
+    as a typed event to the handlers registered for its gesture type.
+    Events of a drain are delivered in the order START, UPDATE, STOP, and by gesture id within a state, so a gesture
+    never gets an UPDATE after its STOP.
+    An example of how to use it:
+            gestures = GestureDispatcher()
+            gestures.addHandler(SWIPE, lambda event: print(event.direction, event.speed))
+            gestures.enable(controller)
+            ...
+            gestures.dispatch(controller.frame())   # In on_frame, or whenever the main loop gets to it
+"""
+## Finds the relative path to the correct library needed for Leap.py
+import os, sys, inspect
+src_dir = os.path.dirname(inspect.getfile(inspect.currentframe()))
+arch_dir = '../lib/x64' if sys.maxsize > 2**32 else '../lib/x86'
+sys.path.insert(0, os.path.abspath(os.path.join(src_dir, arch_dir)))
+
+import collections
+import Leap
+
+SWIPE = Leap.Gesture.TYPE_SWIPE
+CIRCLE = Leap.Gesture.TYPE_CIRCLE
+SCREEN_TAP = Leap.Gesture.TYPE_SCREEN_TAP
+KEY_TAP = Leap.Gesture.TYPE_KEY_TAP
+GESTURE_TYPES = (SWIPE, CIRCLE, SCREEN_TAP, KEY_TAP)
+
+STATE_START = Leap.Gesture.STATE_START
+STATE_UPDATE = Leap.Gesture.STATE_UPDATE
+STATE_STOP = Leap.Gesture.STATE_STOP
+
+# Fields of every event: state is one of the STATE_ constants, id the gesture id, frame_id the id of the frame the
+# gesture was read from, duration the time since the gesture started in microseconds and hand_ids the ids of the
+# hands making it. Positions and directions are (x, y, z) tuples in millimeters in the Leap coordinate system.
+EVENT_FIELDS = ['state', 'id', 'frame_id', 'duration', 'hand_ids']
+SwipeEvent = collections.namedtuple('SwipeEvent', EVENT_FIELDS + ['position', 'start_position', 'direction', 'speed'])
+CircleEvent = collections.namedtuple('CircleEvent', EVENT_FIELDS + ['center', 'normal', 'progress', 'radius',
+                                                                    'clockwise'])
+ScreenTapEvent = collections.namedtuple('ScreenTapEvent', EVENT_FIELDS + ['position', 'direction'])
+KeyTapEvent = collections.namedtuple('KeyTapEvent', EVENT_FIELDS + ['position', 'direction'])
+
+
+def commonFields(gesture):
+    return [gesture.state, gesture.id, gesture.frame.id, gesture.duration, [hand.id for hand in gesture.hands]]
+
+
+def swipeEvent(gesture):
+    swipe = Leap.SwipeGesture(gesture)
+    return SwipeEvent(*commonFields(gesture) + [swipe.position.to_tuple(), swipe.start_position.to_tuple(),
+                                                 swipe.direction.to_tuple(), swipe.speed])
+
+
+def circleEvent(gesture):
+    circle = Leap.CircleGesture(gesture)
+    normal = circle.normal.to_tuple()
+    # The circle goes clockwise when the finger points along its normal, see the Leap documentation of CircleGesture
+    direction = circle.pointable.direction.to_tuple()
+    clockwise = sum(a * b for a, b in zip(direction, normal)) >= 0
+    return CircleEvent(*commonFields(gesture) + [circle.center.to_tuple(), normal, circle.progress, circle.radius,
+                                                  clockwise])
+
+
+def screenTapEvent(gesture):
+    tap = Leap.ScreenTapGesture(gesture)
+    return ScreenTapEvent(*commonFields(gesture) + [tap.position.to_tuple(), tap.direction.to_tuple()])
+
+
+def keyTapEvent(gesture):
+    tap = Leap.KeyTapGesture(gesture)
+    return KeyTapEvent(*commonFields(gesture) + [tap.position.to_tuple(), tap.direction.to_tuple()])
+
+
+EVENT_MAKERS = {SWIPE: swipeEvent, CIRCLE: circleEvent, SCREEN_TAP: screenTapEvent, KEY_TAP: keyTapEvent}
+EVENT_TYPES = {SwipeEvent: SWIPE, CircleEvent: CIRCLE, ScreenTapEvent: SCREEN_TAP, KeyTapEvent: KEY_TAP}
+
+
+class GestureDispatcher(object):
+    """
+        Incremental reader of the native Leap gestures that delivers every gesture state once to typed handlers.
+    """
+
+    def __init__(self, gesture_types=GESTURE_TYPES, remember=256):
+        """
+            input:
+                gesture_types - The gesture types that are enabled and delivered, a subset of GESTURE_TYPES
+                remember - Number of stopped gesture ids remembered to drop their repeats, and the most gestures that
+                           are kept as active at the same time
+        """
+        self.gesture_types = tuple(gesture_types)
+        self.remember = int(remember)
+        self.handlers = dict((gesture_type, []) for gesture_type in self.gesture_types)
+        self.clear()
+
+    def clear(self):
+        """
+            Forgets the last frame and the gestures seen so far.
+        """
+        self.last_frame = None
+        self.active = collections.OrderedDict()  # id -> type of the gestures that started and did not stop yet
+        self.stopped = collections.OrderedDict()  # ids of the recently stopped gestures, the oldest first
+        self.delivered = 0  # Number of events sent to the handlers
+        self.duplicates = 0  # Number of gesture entries dropped because their state was already delivered
+
+    def enable(self, controller):
+        """
+            Turns on the recognition of the gesture types in the Leap service.
+        """
+        for gesture_type in self.gesture_types:
+            controller.enable_gesture(gesture_type, True)
+
+    def disable(self, controller):
+        for gesture_type in self.gesture_types:
+            controller.enable_gesture(gesture_type, False)
+
+    def addHandler(self, gesture_type, handler):
+        """
+            Adds a function called with the SwipeEvent, CircleEvent, ScreenTapEvent or KeyTapEvent of every new
+            gesture state of the type.
+        """
+        self.handlers[gesture_type].append(handler)
+
+    def removeHandler(self, gesture_type, handler):
+        self.handlers[gesture_type].remove(handler)
+
+    def frameGestures(self, frame):
+        """
+            Returns the gestures of the frame and of all frames since the last frame that was read, and makes it the
+            last frame. A frame that is not newer than the last frame has no new gestures.
+        """
+        last_frame = self.last_frame
+        if last_frame is None or not last_frame.is_valid:
+            gestures = frame.gestures()
+        elif frame.id <= last_frame.id:
+            return []
+        else:
+            gestures = frame.gestures(last_frame)
+        self.last_frame = frame
+        return gestures
+
+    def newGestures(self, frame):
+        """
+            Drains the gestures up to a frame and returns the events that were not delivered before, see the
+            description of the module for their order.
+        """
+        starts = {}
+        updates = {}
+        stops = {}
+        active = self.active
+        stopped = self.stopped
+        for gesture in self.frameGestures(frame):
+            gesture_type = gesture.type
+            if gesture_type not in self.handlers:
+                continue
+            gesture_id = gesture.id
+            state = gesture.state
+            if gesture_id in stopped:
+                self.duplicates += 1
+            elif state == STATE_STOP:
+                if gesture_id in stops:
+                    self.duplicates += 1
+                stops[gesture_id] = gesture
+            elif state == STATE_UPDATE:
+                previous = updates.get(gesture_id)
+                if previous is not None:
+                    self.duplicates += 1
+                    if previous.duration >= gesture.duration:
+                        continue
+                updates[gesture_id] = gesture
+            elif state == STATE_START:
+                if gesture_id in active or gesture_id in starts:
+                    self.duplicates += 1
+                else:
+                    starts[gesture_id] = gesture
+
+        events = []
+        for gesture_id in sorted(starts):
+            gesture = starts[gesture_id]
+            active[gesture_id] = gesture.type
+            events.append((gesture.type, gesture))
+        for gesture_id in sorted(updates):
+            if gesture_id in stops:
+                self.duplicates += 1
+                continue
+            gesture = updates[gesture_id]
+            active[gesture_id] = gesture.type
+            events.append((gesture.type, gesture))
+        for gesture_id in sorted(stops):
+            gesture = stops[gesture_id]
+            active.pop(gesture_id, None)
+            stopped[gesture_id] = True
+            events.append((gesture.type, gesture))
+        while len(stopped) > self.remember:
+            stopped.popitem(last=False)
+        while len(active) > self.remember:
+            active.popitem(last=False)
+        return [EVENT_MAKERS[gesture_type](gesture) for gesture_type, gesture in events]
+
+    def dispatch(self, frame):
+        """
+            Drains the gestures up to a frame and calls the handlers with the new events, which are also returned.
+        """
+        events = self.newGestures(frame)
+        handlers = self.handlers
+        for event in events:
+            for handler in handlers[EVENT_TYPES[type(event)]]:
+                handler(event)
+        self.delivered += len(events)
+        return events
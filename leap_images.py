@@ -0,0 +1,135 @@
+"""
+Description:
+    Zero copy access to the infrared camera images of the Leap. Image.data in Leap.py allocates a byte_array of
+    width * height * bytes_per_pixel and copies the image into it on every access, and Image.distortion does the same
+    for the distortion map, which is too slow to look at both cameras at the device frame rate. The SDK also exposes
+    the address of the buffers through Image.data_pointer and Image.distortion_pointer, so the functions here wrap
+    that memory in a read-only numpy array without copying it. The buffer belongs to the image, so every array keeps
+    the Image, and the Frame it came from when given, alive for as long as the array or any view of it exists.
+    The images are only sent after controller.set_policy(Leap.Controller.POLICY_IMAGES), see enableImages.
+    An example of how to use it:
+            enableImages(controller)
+            frame = controller.frame()
+            left, right = stereoArrays(frame)           # (240, 640) uint8 views, no copy
+            stereo = stereoStack(frame, out=stereo)     # (2, 240, 640) uint8, one copy of each image into out
+            distortion = distortionArray(frame.images[0], frame)   # (64, 64, 2) float32
+"""
+## Finds the relative path to the correct library needed for Leap.py
+import os, sys, inspect
+src_dir = os.path.dirname(inspect.getfile(inspect.currentframe()))
+arch_dir = '../lib/x64' if sys.maxsize > 2**32 else '../lib/x86'
+sys.path.insert(0, os.path.abspath(os.path.join(src_dir, arch_dir)))
+
+import ctypes
+import Leap
+import numpy as np
+
+# Stand-in Leap modules, such as the one in benchmarks/standins.py, have no LeapPython to bind to
+AVAILABLE = hasattr(Leap, 'LeapPython')
+
+if AVAILABLE:
+    _lp = Leap.LeapPython
+
+    def imageGeometry(image):
+        return (_lp.Image_width_get(image), _lp.Image_height_get(image), _lp.Image_bytes_per_pixel_get(image))
+
+    def distortionGeometry(image):
+        return (_lp.Image_distortion_width_get(image), _lp.Image_distortion_height_get(image))
+
+    imageDataPointer = _lp.Image_data_pointer_get
+    imageDistortionPointer = _lp.Image_distortion_pointer_get
+else:
+    def imageGeometry(image):
+        return (image.width, image.height, image.bytes_per_pixel)
+
+    def distortionGeometry(image):
+        return (image.distortion_width, image.distortion_height)
+
+    def imageDataPointer(image):
+        return image.data_pointer
+
+    def imageDistortionPointer(image):
+        return image.distortion_pointer
+
+
+def enableImages(controller):
+    """
+        Asks the Leap service to send the camera images with every frame.
+    """
+    controller.set_policy(Leap.Controller.POLICY_IMAGES)
+
+
+def pinnedArray(address, ctype, shape, owners):
+    """
+        Returns a read-only numpy array over the memory at address. The ctypes array it is built on keeps a reference
+        to owners, which keeps the memory alive as long as the numpy array or a view of it exists.
+    """
+    array_type = ctype
+    for size in reversed(shape):
+        array_type = array_type * size
+    buffer = array_type.from_address(address)
+    buffer.owners = owners
+    array = np.ctypeslib.as_array(buffer)
+    array.flags.writeable = False
+    return array
+
+
+def imageArray(image, frame=None):
+    """
+        Returns the pixels of a Leap.Image as a read-only uint8 array without copying them, shaped (height, width), or
+        (height, width, bytes_per_pixel) for images with more than one byte per pixel.
+            input:
+                image - Leap.Image, e.g. frame.images[0]
+                frame - Optional Leap.Frame the image belongs to, kept alive with the image
+    """
+    if not image.is_valid:
+        raise ValueError("The image is not valid, are images enabled with enableImages?")
+    width, height, bytes_per_pixel = imageGeometry(image)
+    shape = (height, width) if bytes_per_pixel == 1 else (height, width, bytes_per_pixel)
+    return pinnedArray(int(imageDataPointer(image)), ctypes.c_ubyte, shape, (image, frame))
+
+
+def distortionArray(image, frame=None):
+    """
+        Returns the distortion map of a Leap.Image as a read-only float32 array without copying it, shaped
+        (distortion_height, distortion_width / 2, 2) with the x and y of every grid point in the last axis.
+    """
+    if not image.is_valid:
+        raise ValueError("The image is not valid, are images enabled with enableImages?")
+    width, height = distortionGeometry(image)
+    return pinnedArray(int(imageDistortionPointer(image)), ctypes.c_float, (height, width // 2, 2), (image, frame))
+
+
+def stereoArrays(frame):
+    """
+        Returns read-only views of the left and right camera image of a frame, see imageArray. Both keep the frame
+        alive.
+    """
+    images = frame.images
+    if len(images) < 2:
+        raise ValueError("The frame has %d images, are images enabled with enableImages?" % len(images))
+    return imageArray(images[0], frame), imageArray(images[1], frame)
+
+
+def stereoStack(frame, out=None):
+    """
+        Copies both camera images of a frame into one array shaped (2, height, width), with one memory copy per
+        image and no intermediate byte_array. Pass the array of the previous frame as out to reuse it.
+    """
+    left, right = stereoArrays(frame)
+    if out is None or out.shape[1:] != left.shape:
+        out = np.empty((2,) + left.shape, dtype=np.uint8)
+    out[0] = left
+    out[1] = right
+    return out
+
+
+def stereoDistortion(frame):
+    """
+        Returns read-only views of the distortion maps of the left and right camera, see distortionArray. The maps
+        only change when the device is recalibrated, so they can be kept across frames.
+    """
+    images = frame.images
+    if len(images) < 2:
+        raise ValueError("The frame has %d images, are images enabled with enableImages?" % len(images))
+    return distortionArray(images[0], frame), distortionArray(images[1], frame)
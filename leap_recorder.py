@@ -0,0 +1,343 @@
+"""
+Description:
+    Records Leap Motion sessions to a file and plays them back without a device. Frames are stored with
+    Leap.Frame.serialize as length prefixed records, and a sidecar index file (<recording>.idx) stores the frame id,
+    Frame.timestamp and file offset of every record.
+    ReplayController has the same frame(history) / add_listener / remove_listener surface as Leap.Controller, so
+    gesture_reader.SampleListener runs on a recording unchanged, either at the recorded pace or as fast as possible.
+    Deserializing frames still needs the LeapPython library, but no device or service has to be running. Leap is only
+    imported when it is needed, so a recording can also be replayed without it by passing encode to FrameRecorder and
+    decode to ReplayController.
+    An example of how to use it:
+            # Record until Ctrl-C
+            python leap_recorder.py record session.leap
+            # Replay as fast as possible through SampleListener
+            python leap_recorder.py replay session.leap --fast
+
+            controller = ReplayController('session.leap', realtime=False)
+            controller.add_listener(listener)
+            controller.run()
+"""
+## Finds the relative path to the correct library needed for Leap.py
+import os, sys, inspect
+src_dir = os.path.dirname(inspect.getfile(inspect.currentframe()))
+arch_dir = '../lib/x64' if sys.maxsize > 2**32 else '../lib/x86'
+sys.path.insert(0, os.path.abspath(os.path.join(src_dir, arch_dir)))
+
+import collections
+import ctypes
+import mmap
+import struct
+import threading
+import time
+import numpy as np
+
+RECORD_HEADER = struct.Struct('<I')  # Length of the serialized frame that follows
+INDEX_RECORD = struct.Struct('<qqQI')  # Frame id, Frame.timestamp, offset of the serialized frame, length
+INDEX_DTYPE = np.dtype([('frame_id', '<i8'), ('timestamp', '<i8'), ('offset', '<u8'), ('length', '<u4')])
+INDEX_SUFFIX = '.idx'
+HISTORY_SIZE = 60  # Number of frames Leap.Controller keeps in its history
+
+
+def serializeFrame(frame):
+    """
+        Returns the serialized frame as a byte string.
+    """
+    data, length = frame.serialize
+    return ctypes.string_at(int(data.cast()), length)
+
+
+def deserializeFrame(data):
+    """
+        Creates a Leap.Frame from a byte string returned by serializeFrame.
+    """
+    import Leap
+    length = len(data)
+    leap_byte_array = Leap.byte_array(length)
+    ctypes.memmove(int(leap_byte_array.cast()), data, length)
+    frame = Leap.Frame()
+    frame.deserialize((leap_byte_array, length))
+    return frame
+
+
+def readIndex(path):
+    """
+        Reads the sidecar index of a recording as a numpy structured array with the fields frame_id, timestamp, offset
+        and length.
+    """
+    return np.fromfile(path + INDEX_SUFFIX, dtype=INDEX_DTYPE)
+
+
+def invalidFrame():
+    """
+        Returns the invalid frame that Leap.Controller returns for frames it does not have, or an InvalidFrame when
+        the LeapPython library is not available.
+    """
+    try:
+        import Leap
+    except ImportError:
+        return InvalidFrame()
+    return Leap.Frame()
+
+
+class InvalidFrame(object):
+    """
+        The parts of an invalid Leap.Frame that the listeners in this project look at.
+    """
+    id = -1
+    timestamp = 0
+    is_valid = False
+    hands = ()
+
+
+class FrameRecorder(object):
+    """
+        Appends serialized frames to a recording and its index file.
+    """
+
+    def __init__(self, path, encode=serializeFrame):
+        """
+            input:
+                path - File the frames are appended to, the index is written to path + INDEX_SUFFIX
+                encode - Function turning a frame into the bytes stored in the recording
+        """
+        self.path = path
+        self.encode = encode
+        self.data_file = open(path, 'ab')
+        self.index_file = open(path + INDEX_SUFFIX, 'ab')
+        self.offset = self.data_file.tell()
+        self.frames_recorded = 0
+
+    def record(self, frame):
+        """
+            Writes a Leap.Frame to the recording.
+        """
+        self.recordBytes(self.encode(frame), frame.id, frame.timestamp)
+
+    def recordBytes(self, data, frame_id, timestamp):
+        """
+            Writes an already serialized frame to the recording.
+        """
+        length = len(data)
+        self.data_file.write(RECORD_HEADER.pack(length))
+        self.data_file.write(data)
+        payload_offset = self.offset + RECORD_HEADER.size
+        self.index_file.write(INDEX_RECORD.pack(frame_id, timestamp, payload_offset, length))
+        self.offset = payload_offset + length
+        self.frames_recorded += 1
+
+    def close(self):
+        self.data_file.close()
+        self.index_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def recordingListenerClass():
+    """
+        Returns a Leap.Listener subclass that writes every frame it receives to a FrameRecorder. The class is created
+        when it is needed, so replaying does not import Leap.
+    """
+    import Leap
+
+    class RecordingListener(Leap.Listener):
+        def __init__(self, recorder):
+            Leap.Listener.__init__(self)
+            self.recorder = recorder
+            self.lock = threading.Lock()
+
+        def on_frame(self, controller):
+            frame = controller.frame()
+            with self.lock:
+                self.recorder.record(frame)
+
+    return RecordingListener
+
+
+class ReplayController(object):
+    """
+        Plays a recording back with the interface of Leap.Controller that the listeners in this project use.
+    """
+
+    def __init__(self, path, realtime=True, speed=1.0, history_size=HISTORY_SIZE, decode=deserializeFrame):
+        """
+            input:
+                path - Recording written by FrameRecorder
+                realtime - If True frames are dispatched at the pace they were recorded, otherwise as fast as possible
+                speed - Playback speed factor used when realtime is True
+                history_size - Number of frames available through frame(history)
+                decode - Function turning the stored bytes into a frame object
+        """
+        self.path = path
+        self.realtime = realtime
+        self.speed = float(speed)
+        self.decode = decode
+        self.index = readIndex(path)
+        self.data_file = open(path, 'rb')
+        if len(self.index):
+            self.data = mmap.mmap(self.data_file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.data = b''
+        self.history = collections.deque(maxlen=history_size)
+        self.listeners = []
+        self.position = 0  # Index of the next frame to be dispatched
+        self.is_connected = False
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.clock_start = None
+
+    def __len__(self):
+        return len(self.index)
+
+    def frame(self, history=0):
+        """
+            Returns the current frame, or an older one if history is given. Returns an invalid frame if the frame is not
+            available, like Leap.Controller.
+        """
+        if history < len(self.history):
+            return self.history[-1 - history]
+        return invalidFrame()
+
+    def now(self):
+        """
+            Returns the replay clock in microseconds on the timescale of Frame.timestamp.
+        """
+        if not len(self.index):
+            return 0
+        if self.clock_start is None:
+            return int(self.index['timestamp'][0])
+        wall_start, first_timestamp = self.clock_start
+        return int(first_timestamp + (time.time() - wall_start) * 1e6 * self.speed)
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+        listener.on_init(self)
+        if self.is_connected:
+            listener.on_connect(self)
+        return True
+
+    def remove_listener(self, listener):
+        if listener not in self.listeners:
+            return False
+        self.listeners.remove(listener)
+        listener.on_exit(self)
+        return True
+
+    def readFrameBytes(self, position):
+        """
+            Returns the stored bytes of the frame at a position in the recording.
+        """
+        offset = int(self.index['offset'][position])
+        return self.data[offset:offset + int(self.index['length'][position])]
+
+    def step(self):
+        """
+            Decodes the next frame, adds it to the history and dispatches on_frame to the listeners. Returns False when
+            the end of the recording is reached.
+        """
+        if self.position >= len(self.index):
+            return False
+        self.history.append(self.decode(self.readFrameBytes(self.position)))
+        self.position += 1
+        for listener in list(self.listeners):
+            listener.on_frame(self)
+        return True
+
+    def run(self):
+        """
+            Plays the recording from the current position to the end, or until stop is called.
+        """
+        if not self.is_connected:
+            self.is_connected = True
+            for listener in list(self.listeners):
+                listener.on_connect(self)
+        if self.position < len(self.index):
+            self.clock_start = (time.time(), int(self.index['timestamp'][self.position]))
+        timestamps = self.index['timestamp']
+        while not self.stop_event.is_set() and self.position < len(self.index):
+            if self.realtime:
+                delay = (timestamps[self.position] - self.now()) / (1e6 * self.speed)
+                if delay > 0:
+                    self.stop_event.wait(delay)
+            self.step()
+        self.is_connected = False
+        for listener in list(self.listeners):
+            listener.on_disconnect(self)
+
+    def start(self):
+        """
+            Plays the recording in a background thread, like a Leap.Controller delivering frames.
+        """
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def rewind(self):
+        self.position = 0
+        self.history.clear()
+
+    def close(self):
+        self.stop()
+        if len(self.index):
+            self.data.close()
+        self.data_file.close()
+
+
+def record(path):
+    import Leap
+    controller = Leap.Controller()
+    controller.set_policy(Leap.Controller.POLICY_BACKGROUND_FRAMES)
+    with FrameRecorder(path) as recorder:
+        listener = recordingListenerClass()(recorder)
+        controller.add_listener(listener)
+        print ("Recording to %s, press Ctrl-C to stop..." % path)
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            controller.remove_listener(listener)
+        print ("Recorded %d frames" % recorder.frames_recorded)
+
+
+def replay(path, realtime):
+    import gesture_reader
+    controller = ReplayController(path, realtime=realtime)
+    listener = gesture_reader.SampleListener()
+    controller.add_listener(listener)
+    start = time.time()
+    controller.run()
+    elapsed = time.time() - start
+    controller.remove_listener(listener)
+    print ("Replayed %d frames in %.2f s (%.0f frames/s), last snapshot: %s" % (
+        len(controller), elapsed, len(controller) / max(elapsed, 1e-9), listener.getSnapshot()))
+    controller.close()
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Record and replay Leap Motion sessions.')
+    parser.add_argument('command', choices=['record', 'replay'])
+    parser.add_argument('path')
+    parser.add_argument('--fast', action='store_true', help='Replay as fast as possible instead of in real time')
+    args = parser.parse_args()
+    if args.command == 'record':
+        record(args.path)
+    else:
+        replay(args.path, not args.fast)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""
+Description:
+    A ring of hand snapshots in shared memory, so the Leap acquisition runs in its own process and other processes
+    (fusion, logging, analytics) read its frames without a copy and without sharing a GIL with it. Every slot holds a
+    sequence number, the time it was published, the debounced fist of every hand and a hand_snapshot.FRAME_DTYPE
+    record. There is one writer. It marks a slot as being written, fills it and then stores its sequence number, and
+    only then counts it in the header, so a reader that finds the sequence number it expects in a slot knows the slot
+    holds that frame. Readers never block the writer: a reader that falls more than the capacity behind skips the
+    frames that were overwritten and counts them as lost. Records returned by a reader are views into the shared
+    memory. They stay valid until the writer wraps around to their slot, so a reader copies or uses what it needs
+    from a view and then calls RingReader.confirm, which tells whether the slot was overwritten in the meantime and
+    counts such a frame as lost. Only the creator of the ring removes the shared memory, attaching processes leave it
+    alone when they exit. It needs Python 3.8 or newer for multiprocessing.shared_memory.
+    An example of how to use it:
+            # Acquisition process
+            ring = SnapshotRing(capacity=1024, create=True)
+            runAcquisition(ring)                                   # Leap.Controller with a RingListener
+
+            # Reader process
+            reader = RingReader(SnapshotRing(name))
+            for sequence, slot in reader.poll():
+                fist = slot['hand_fists'][:slot['snapshot']['hand_count']].copy()
+                if reader.confirm(sequence):                        # Not overwritten while it was copied
+                    useFist(fist)
+"""
+
+import sys
+import time
+import numpy as np
+from multiprocessing import resource_tracker, shared_memory
+
+import hand_snapshot
+
+# Header fields, int64 each
+CAPACITY, WRITTEN = range(2)
+HEADER_SIZE = 64  # Bytes before the first slot, keeps the slots aligned
+
+SLOT_DTYPE = np.dtype([
+    ('sequence', '<i8'),  # Sequence number of the frame in the slot, -1 while it is written
+    ('published', '<f8'),  # time.time() when the frame was written
+    ('hand_fists', '?', (hand_snapshot.MAX_HANDS,)),  # Debounced fist of every hand in snapshot
+    ('snapshot', hand_snapshot.FRAME_DTYPE),
+], align=True)
+
+
+def attachSharedMemory(name):
+    """
+        Attaches to an existing shared memory block without registering it with the resource tracker. Before Python
+        3.13 every attach registers the block on POSIX, so the tracker of a reader that was started on its own
+        removes the block when the reader exits. Unregistering it afterwards is no way out, a reader started with
+        multiprocessing shares the tracker of the creator and would drop the registration of the creator.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class SnapshotRing(object):
+    """
+        Fixed size ring of SLOT_DTYPE slots in a multiprocessing.shared_memory block.
+    """
+
+    def __init__(self, name=None, capacity=1024, create=False):
+        """
+            input:
+                name - Name of the shared memory block. None picks a new name when create is True
+                capacity - Number of slots, only used when the ring is created
+                create - True to create the block, False to attach to the block an acquisition process created
+        """
+        if create:
+            size = HEADER_SIZE + int(capacity) * SLOT_DTYPE.itemsize
+            self.memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+        else:
+            self.memory = attachSharedMemory(name)
+        self.owner = create
+        self.header = np.ndarray((HEADER_SIZE // 8,), dtype=np.int64, buffer=self.memory.buf)
+        if create:
+            self.header[:] = 0
+            self.header[CAPACITY] = capacity
+        self.capacity = int(self.header[CAPACITY])
+        self.slots = np.ndarray((self.capacity,), dtype=SLOT_DTYPE, buffer=self.memory.buf, offset=HEADER_SIZE)
+        if create:
+            self.slots['sequence'] = -1
+
+    @property
+    def name(self):
+        return self.memory.name
+
+    def written(self):
+        """
+            Returns the number of frames written so far, which is the sequence number of the next frame.
+        """
+        return int(self.header[WRITTEN])
+
+    def write(self, snapshot, hand_fists=None):
+        """
+            Copies a hand_snapshot record into the next slot and returns its sequence number. Only one process may
+            write.
+        """
+        sequence = int(self.header[WRITTEN])
+        slot = self.slots[sequence % self.capacity]
+        slot['sequence'] = -1
+        slot['snapshot'] = snapshot
+        fists = slot['hand_fists']
+        fists[:] = False
+        if hand_fists is not None:
+            fists[:len(hand_fists)] = hand_fists
+        slot['published'] = time.time()
+        slot['sequence'] = sequence
+        self.header[WRITTEN] = sequence + 1
+        return sequence
+
+    def slot(self, sequence):
+        """
+            Returns the slot of a sequence number as a view into the shared memory, or None if it was overwritten or
+            not written yet.
+        """
+        slot = self.slots[sequence % self.capacity]
+        if slot['sequence'] != sequence:
+            return None
+        return slot
+
+    def intact(self, sequence):
+        """
+            Returns True if the slot of a sequence number still holds that frame, e.g. after reading a view of it.
+        """
+        return self.slots['sequence'][sequence % self.capacity] == sequence
+
+    def close(self):
+        """
+            Detaches from the shared memory and, in the process that created it, removes it. Slot views returned by
+            readers must be deleted first.
+        """
+        if self.memory is None:
+            return
+        # The numpy views have to be gone before the buffer can be released
+        del self.header, self.slots
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+        self.memory = None
+
+
+class RingReader(object):
+    """
+        Reads the frames of a SnapshotRing in order, from the frame that was newest when it was created.
+    """
+
+    def __init__(self, ring, from_start=False):
+        """
+            input:
+                ring - SnapshotRing attached to the shared memory
+                from_start - True to start at the oldest frame still in the ring instead of the newest one
+        """
+        self.ring = ring
+        written = ring.written()
+        self.next_sequence = max(0, written - ring.capacity) if from_start else max(0, written - 1)
+        self.read = 0  # Number of frames returned
+        self.lost = 0  # Number of frames overwritten before they were read
+
+    def lag(self):
+        """
+            Returns the number of frames written but not read yet.
+        """
+        return self.ring.written() - self.next_sequence
+
+    def poll(self, max_count=None):
+        """
+            Returns a list of (sequence number, slot view) of the frames written since the last poll, the oldest
+            first. Frames that were overwritten are skipped and counted in lost. The views are not copies, see
+            confirm.
+        """
+        ring = self.ring
+        written = ring.written()
+        oldest = written - ring.capacity
+        if self.next_sequence < oldest:
+            self.lost += oldest - self.next_sequence
+            self.next_sequence = oldest
+        stop = written if max_count is None else min(written, self.next_sequence + max_count)
+        frames = []
+        for sequence in range(self.next_sequence, stop):
+            slot = ring.slot(sequence)
+            if slot is None:  # Overwritten while reading
+                self.lost += 1
+                continue
+            frames.append((sequence, slot))
+        self.read += len(frames)
+        self.next_sequence = stop
+        return frames
+
+    def confirm(self, sequence):
+        """
+            Returns True if the slot of a frame returned by poll or latest still holds that frame, so what was read
+            from its view up to now belongs to it. Otherwise the writer overwrote the slot while it was read, and the
+            frame is moved from read to lost.
+        """
+        if self.ring.intact(sequence):
+            return True
+        self.read -= 1
+        self.lost += 1
+        return False
+
+    def latest(self):
+        """
+            Returns (sequence number, slot view) of the newest frame and skips everything before it, or None if there
+            is no new frame.
+        """
+        ring = self.ring
+        written = ring.written()
+        if written <= self.next_sequence:
+            return None
+        sequence = written - 1
+        self.lost += sequence - self.next_sequence
+        self.next_sequence = written
+        slot = ring.slot(sequence)
+        if slot is None:
+            self.lost += 1
+            return None
+        self.read += 1
+        return sequence, slot
+
+
+def ringListenerClass(listener_class):
+    """
+        Returns a subclass of a gesture_reader.SampleListener class that also writes every published snapshot to a
+        SnapshotRing, given as the ring keyword argument.
+    """
+    class RingListener(listener_class):
+        def __init__(self, *args, **kwargs):
+            self.ring = kwargs.pop('ring')
+            listener_class.__init__(self, *args, **kwargs)
+
+        def publishSnapshot(self, snapshot):
+            listener_class.publishSnapshot(self, snapshot)
+            self.ring.write(snapshot.hands, snapshot.hand_fists)
+
+    return RingListener
+
+
+def runAcquisition(ring, controller=None, stop_event=None, poll_interval=0.1):
+    """
+        Runs a Leap.Controller with a SampleListener that writes to the ring until stop_event is set, or until
+        KeyboardInterrupt when there is no stop_event. Meant as the target of the acquisition process.
+            input:
+                ring - SnapshotRing created by this process, or the name of the shared memory block to attach to
+                controller - Optional controller, a new Leap.Controller by default
+                stop_event - Optional multiprocessing.Event that ends the acquisition
+                poll_interval - Seconds between checks of stop_event
+    """
+    import gesture_reader
+    if not isinstance(ring, SnapshotRing):
+        ring = SnapshotRing(ring)
+    if controller is None:
+        controller = gesture_reader.Leap.Controller()
+    listener = ringListenerClass(gesture_reader.SampleListener)(ring=ring)
+    controller.add_listener(listener)
+    try:
+        while stop_event is None or not stop_event.is_set():
+            time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        controller.remove_listener(listener)
@@ -0,0 +1,9 @@
+"""
+Description:
+    Puts the modules in the project root and the stand-ins in benchmarks on the path of the tests. The tests run on
+    the stand-ins of benchmarks/standins.py, so they need no Leap, eye tracker or window system.
+"""
+import os, sys
+tests_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(tests_dir, '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(tests_dir, '..', 'benchmarks')))
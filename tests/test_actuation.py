@@ -0,0 +1,121 @@
+"""
+Description:
+    Tests actuation.PointerActuator with a fake clock and a mouse that records the events it gets.
+"""
+import actuation
+
+
+class Clock(object):
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class EventMouse(object):
+    """
+        Fake pynput mouse that records every event in order, with the pointer position at presses and releases.
+    """
+
+    def __init__(self):
+        self._position = (0, 0)
+        self.events = []
+
+    @property
+    def position(self):
+        return self._position
+
+    @position.setter
+    def position(self, pos):
+        self._position = pos
+        self.events.append(('move', pos))
+
+    def press(self, button):
+        self.events.append(('press', self._position))
+
+    def release(self, button):
+        self.events.append(('release', self._position))
+
+    def count(self, name):
+        return sum(1 for event, _ in self.events if event == name)
+
+
+def makeActuator(deadband=2.0, max_rate=10.0):
+    clock = Clock()
+    mouse = EventMouse()
+    return actuation.PointerActuator(mouse, 'left', deadband=deadband, max_rate=max_rate, clock=clock), mouse, clock
+
+
+def test_deadband():
+    actuator, mouse, clock = makeActuator(max_rate=None)
+    assert actuator.move((100, 100))
+    assert not actuator.move((101, 100.6))
+    assert actuator.move((103, 100))
+    assert mouse.events == [('move', (100, 100)), ('press', (100, 100)), ('move', (103, 100))]
+    assert actuator.stats['deadband'] == 1
+
+
+def test_deadband_drops_held_back_target_and_tag():
+    actuator, mouse, clock = makeActuator()
+    actuator.move((100, 100))
+    clock.now = 0.01
+    assert not actuator.move((150, 150), 'held back')
+    assert abs(actuator.pendingDelay() - 0.09) < 1e-9
+    # The gaze came back to the written position, the held back target is stale
+    assert not actuator.move((100, 101), 'back')
+    assert (actuator.pending, actuator.pending_tag) == (None, None)
+    assert actuator.pendingDelay() is None
+    clock.now = 1.0
+    assert not actuator.flush()
+    assert mouse.position == (100, 100)
+
+
+def test_coalescing_and_flush():
+    actuator, mouse, clock = makeActuator()
+    assert actuator.move((0, 0))
+    for ii in range(1, 5):
+        clock.now = ii * 0.02
+        assert not actuator.move((ii * 10, 0), ii)
+    assert actuator.stats['coalesced'] == 3
+    assert abs(actuator.pendingDelay() - 0.02) < 1e-9
+    assert not actuator.flush()
+    clock.now = 0.1
+    assert actuator.pendingDelay() == 0.0
+    assert actuator.flush()
+    assert (mouse.position, actuator.written_tag) == ((40, 0), 4)
+    assert actuator.pendingDelay() is None
+    assert not actuator.flush()
+    assert mouse.count('move') == 2
+
+
+def test_one_press_and_release_per_drag():
+    actuator, mouse, clock = makeActuator(max_rate=None)
+    for drag in range(3):
+        for ii in range(10):
+            actuator.move((ii * 10, drag * 10))
+        actuator.release()
+        actuator.release()
+    assert (mouse.count('press'), mouse.count('release')) == (3, 3)
+    assert actuator.stats['presses_saved'] == 27
+    assert actuator.stats['releases_saved'] == 3
+
+
+def test_release_writes_held_back_target():
+    actuator, mouse, clock = makeActuator()
+    actuator.move((0, 0))
+    clock.now = 0.01
+    actuator.move((60, 60))
+    actuator.release()
+    assert mouse.events[-2:] == [('move', (60, 60)), ('release', (60, 60))]
+
+
+def test_new_drag_presses_at_its_first_target():
+    actuator, mouse, clock = makeActuator()
+    actuator.move((0, 0))
+    clock.now = 0.01
+    actuator.release()
+    # A new drag right after the last write, within the rate limit
+    clock.now = 0.02
+    assert actuator.move((500, 300))
+    assert mouse.events[-2:] == [('move', (500, 300)), ('press', (500, 300))]
@@ -0,0 +1,88 @@
+"""
+Description:
+    Tests the enter and exit votes, the dwell times and the edges of debounce.Debouncer.
+"""
+import pytest
+
+import debounce
+
+
+def feed(debouncer, values, period=0.01):
+    """
+        Feeds the values at the given period and returns the edge of every update.
+    """
+    return [debouncer.update(value, ii * period) for ii, value in enumerate(values)]
+
+
+def test_enters_at_enter_votes():
+    debouncer = debounce.Debouncer(window=5, enter_votes=4, exit_votes=1)
+    edges = feed(debouncer, [True, True, True, False, True])
+    assert edges == [None, None, None, None, debounce.START]
+    assert debouncer.active
+
+
+def test_exits_at_exit_votes_only():
+    debouncer = debounce.Debouncer(window=5, enter_votes=4, exit_votes=1)
+    feed(debouncer, [True] * 5)
+    # 3 and 2 of 5 votes are between the thresholds and keep the fist, 1 of 5 ends it
+    edges = [debouncer.update(False, 1.0 + ii) for ii in range(4)]
+    assert edges == [None, None, None, debounce.END]
+    assert not debouncer.active
+
+
+def test_between_thresholds_keeps_inactive():
+    debouncer = debounce.Debouncer(window=5, enter_votes=4, exit_votes=1)
+    assert feed(debouncer, [True, False, True, False, True] * 3) == [None] * 15
+    assert debouncer.count == 3
+    assert not debouncer.active
+
+
+def test_callbacks():
+    calls = []
+    debouncer = debounce.Debouncer(window=3, enter_votes=2, exit_votes=0, on_enter=lambda t: calls.append(('on', t)),
+                                   on_exit=lambda t: calls.append(('off', t)))
+    feed(debouncer, [True, True, False, False, False], period=1.0)
+    assert calls == [('on', 1.0), ('off', 4.0)]
+
+
+def test_min_active():
+    debouncer = debounce.Debouncer(window=1, enter_votes=1, exit_votes=0, min_active=0.1)
+    assert debouncer.update(True, 0.0) == debounce.START
+    assert debouncer.update(False, 0.05) is None
+    assert debouncer.active
+    assert debouncer.update(False, 0.1) == debounce.END
+
+
+def test_min_inactive():
+    debouncer = debounce.Debouncer(window=1, enter_votes=1, exit_votes=0, min_inactive=0.1)
+    assert debouncer.update(True, 0.0) == debounce.START
+    assert debouncer.update(False, 0.0) == debounce.END
+    assert debouncer.update(True, 0.05) is None
+    assert debouncer.update(True, 0.1) == debounce.START
+
+
+def test_exit_and_reset():
+    calls = []
+    debouncer = debounce.Debouncer(window=2, enter_votes=1, exit_votes=0, on_exit=calls.append)
+    assert debouncer.exit(0.0) is None
+    debouncer.update(True, 0.0)
+    assert debouncer.exit(0.5) == debounce.END
+    assert calls == [0.5]
+    debouncer.update(True, 1.0)
+    debouncer.reset()
+    assert not debouncer.active and debouncer.count == 0 and calls == [0.5]
+
+
+def test_ring_wraps():
+    debouncer = debounce.Debouncer(window=3, enter_votes=3, exit_votes=0)
+    values = [True, False, True, True, True, False, False, False]
+    feed(debouncer, values)
+    assert debouncer.count == 0
+    assert sum(debouncer.votes) == 0
+
+
+@pytest.mark.parametrize('args', [(5, 4, 4), (5, 6, 1), (5, 4, -1)])
+def test_invalid_votes(args):
+    window, enter_votes, exit_votes = args
+    with pytest.raises(ValueError):
+        debounce.Debouncer(window=window, enter_votes=enter_votes, exit_votes=exit_votes)
@@ -0,0 +1,86 @@
+"""
+Description:
+    Tests the fixation detectors of fixation_detector.py on synthetic gaze traces.
+"""
+import numpy as np
+import pytest
+
+import fixation_detector
+
+
+def gazeTrace(n_fixations=40, fixation_length=30, rate=120.0, noise=5.0, seed=0):
+    """
+        Returns an (n, 3) array of x, y, timestamp samples: noisy fixations at random places joined by jumps.
+    """
+    rng = np.random.RandomState(seed)
+    centers = rng.uniform((0, 0), (1600, 900), (n_fixations, 2))
+    positions = np.repeat(centers, fixation_length, axis=0)
+    positions += rng.normal(0.0, noise, positions.shape)
+    times = np.arange(len(positions)) / rate
+    return np.column_stack([positions, times])
+
+
+def pushAll(detector, samples):
+    events = [detector.push(sample, sample[2]) for sample in samples]
+    return np.array([event for event in events if event is not None], dtype=fixation_detector.EVENT_DTYPE)
+
+
+def assertSameEvents(expected, actual):
+    assert len(expected) == len(actual)
+    for name in fixation_detector.EVENT_DTYPE.names:
+        assert np.allclose(expected[name], actual[name])
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 100, 100000])
+def test_velocity_process_matches_push(chunk_size):
+    samples = gazeTrace()
+    pushed = pushAll(fixation_detector.VelocityFixationDetector(), samples)
+    detector = fixation_detector.VelocityFixationDetector()
+    processed = np.concatenate([detector.process(samples[ii:ii + chunk_size])
+                                for ii in range(0, len(samples), chunk_size)])
+    assert len(pushed) > 40
+    assertSameEvents(pushed, processed)
+    assert detector.count == len(samples)
+
+
+@pytest.mark.parametrize('detector_class', [fixation_detector.VelocityFixationDetector,
+                                            fixation_detector.DispersionFixationDetector])
+def test_nan_samples_are_skipped(detector_class):
+    samples = gazeTrace(n_fixations=10)
+    with_nans = samples.copy()
+    with_nans[::7, 0] = np.nan
+    with_nans[3::11, 1] = np.nan
+    valid = with_nans[~np.isnan(with_nans[:, :2]).any(axis=1)]
+    detector = detector_class()
+    assert detector.push((np.nan, 100.0), 0.0) is None
+    assert len(detector) == 0
+    assertSameEvents(pushAll(detector_class(), valid), detector_class().process(with_nans))
+    assertSameEvents(pushAll(detector_class(), valid), pushAll(detector_class(), with_nans))
+
+
+def test_dispersion_events():
+    samples = gazeTrace(n_fixations=5, fixation_length=40, noise=3.0)
+    events = []
+    detector = fixation_detector.DispersionFixationDetector(callback=events.append)
+    pushAll(detector, samples)
+    kinds = [event.kind for event in events]
+    assert kinds.count(fixation_detector.FIXATION_START) == 5
+    assert kinds.count(fixation_detector.SACCADE) == 4
+    assert kinds.count(fixation_detector.FIXATION_UPDATE) > 0
+    # Every fixation starts after min_samples samples and its centroid is near the samples
+    first = events[0]
+    assert first.kind == fixation_detector.FIXATION_START
+    assert first.time == samples[detector.min_samples - 1, 2]
+    assert np.hypot(first.x - samples[:40, 0].mean(), first.y - samples[:40, 1].mean()) < 5.0
+    assert detector.newTarget() is not None
+    assert detector.newTarget() is None
+
+
+def test_mean_is_not_changed_by_later_events():
+    detector = fixation_detector.VelocityFixationDetector()
+    samples = gazeTrace(n_fixations=2)
+    pushAll(detector, samples[:30])
+    mean = detector.mean()
+    pushAll(detector, samples[30:])
+    assert isinstance(mean, tuple)
+    assert detector.mean() != mean
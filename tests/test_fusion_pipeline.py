@@ -0,0 +1,137 @@
+"""
+Description:
+    Tests the queues and the actuation stage of fusion_pipeline. The stage runs on a thread of the test process, the
+    StageQueues work the same between threads as between processes.
+"""
+import threading
+import time
+
+import fusion_pipeline
+
+
+class Recorder(object):
+    """
+        grab, move and release functions that record their calls.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def grab(self, pos):
+        self.calls.append(('grab', pos))
+        return 1
+
+    def move(self, pos, hwnd):
+        self.calls.append(('move', pos))
+
+    def release(self):
+        self.calls.append(('release', None))
+
+    def count(self, name):
+        return sum(1 for call, _ in self.calls if call == name)
+
+
+def startActuation(in_queue, recorder):
+    counters = fusion_pipeline.multiprocessing.Array('d', len(fusion_pipeline.STAGE_COUNTERS))
+    stop_event = threading.Event()
+    thread = threading.Thread(target=fusion_pipeline.actuationWorker,
+                              args=(in_queue, counters, stop_event, recorder.grab, recorder.move, recorder.release),
+                              kwargs={'timeout': 0.01})
+    thread.start()
+    return thread, stop_event
+
+
+def waitUntilTaken(in_queue, timeout=5.0):
+    end = time.time() + timeout
+    while time.time() < end:
+        metrics = in_queue.metrics()
+        if metrics['gets'] + metrics['dropped'] >= metrics['puts']:
+            return
+        time.sleep(0.01)
+    raise AssertionError("The actuation stage did not take the messages: %r" % (in_queue.metrics(),))
+
+
+def test_drop_oldest_keeps_grab_and_release():
+    in_queue = fusion_pipeline.StageQueue('actuation', maxsize=4, overflow=fusion_pipeline.DROP_OLDEST)
+    # Two drags and a release, far more messages than the queue holds before the stage reads any of them
+    for drag in (1, 2):
+        for ii in range(50):
+            in_queue.put((drag, (drag * 100.0 + ii, 0.0), time.time()))
+    assert in_queue.metrics()['dropped'] > 0
+    recorder = Recorder()
+    thread, stop_event = startActuation(in_queue, recorder)
+    try:
+        waitUntilTaken(in_queue)
+        time.sleep(0.05)
+        # The newest state was a drag, the window is held at its newest target
+        assert recorder.count('grab') == recorder.count('release') + 1
+        assert recorder.calls[-1] == ('move', (249.0, 0.0))
+        in_queue.put((0, None, time.time()))
+        waitUntilTaken(in_queue)
+        time.sleep(0.05)
+        assert recorder.count('grab') == recorder.count('release')
+        assert recorder.calls[-1] == ('release', None)
+    finally:
+        stop_event.set()
+        thread.join()
+        in_queue.close()
+
+
+def test_block_loses_nothing():
+    in_queue = fusion_pipeline.StageQueue('actuation', maxsize=4, overflow=fusion_pipeline.BLOCK)
+    recorder = Recorder()
+    thread, stop_event = startActuation(in_queue, recorder)
+    targets = [(float(ii), 0.0) for ii in range(200)]
+    try:
+        for target in targets[:100]:
+            in_queue.put((1, target, time.time()))
+        in_queue.put((0, None, time.time()))
+        for target in targets[100:]:
+            in_queue.put((2, target, time.time()))
+        in_queue.put((0, None, time.time()))
+        waitUntilTaken(in_queue)
+        time.sleep(0.05)
+    finally:
+        stop_event.set()
+        thread.join()
+        in_queue.close()
+    assert in_queue.metrics()['dropped'] == 0
+    assert [pos for call, pos in recorder.calls if call == 'move'] == targets
+    assert (recorder.count('grab'), recorder.count('release')) == (2, 2)
+
+
+def test_fusion_filters_gaze_with_sample_times(monkeypatch):
+    import gaze_filter
+    filters = []
+
+    class RecordingFilter(gaze_filter.OneEuroFilter):
+        def __init__(self, **kwargs):
+            gaze_filter.OneEuroFilter.__init__(self, **kwargs)
+            self.kwargs = kwargs
+            self.times = []
+            filters.append(self)
+
+        def push(self, sample, timestamp=None):
+            self.times.append(timestamp)
+            gaze_filter.OneEuroFilter.push(self, sample, timestamp)
+
+    monkeypatch.setitem(gaze_filter.FILTERS, 'oneeuro', RecordingFilter)
+    in_queue = fusion_pipeline.StageQueue('fusion', maxsize=64, overflow=fusion_pipeline.BLOCK)
+    out_queue = fusion_pipeline.StageQueue('actuation', maxsize=64)
+    counters = fusion_pipeline.multiprocessing.Array('d', len(fusion_pipeline.STAGE_COUNTERS))
+    times = [1000.0 + ii / 120.0 for ii in range(10)]
+    for ii, source_time in enumerate(times):
+        in_queue.put((fusion_pipeline.GAZE, source_time, (100.0 + ii, 200.0)))
+    stop_event = threading.Event()
+    thread = threading.Thread(target=fusion_pipeline.fusionWorker,
+                              args=(in_queue, out_queue, counters, stop_event, 'oneeuro', 120.0, 0.01))
+    thread.start()
+    try:
+        waitUntilTaken(in_queue)
+    finally:
+        stop_event.set()
+        thread.join()
+        in_queue.close()
+        out_queue.close()
+    assert filters[0].kwargs == {'rate': 120.0}
+    assert filters[0].times == times
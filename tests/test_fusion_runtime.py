@@ -0,0 +1,149 @@
+"""
+Description:
+    Runs fusion_runtime.FusionRuntime on asyncio with the stand-in Leap controller and eye tracker, and with a
+    scripted listener for the fist states.
+"""
+import asyncio
+import collections
+import threading
+import time
+
+import numpy as np
+
+import standins
+standins.installStandins()
+
+import Leap
+import fusion_runtime
+import gesture_reader
+
+
+class Recorder(object):
+    """
+        grab, move and release functions that record their calls with the time.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def grab(self, pos):
+        self.calls.append(('grab', time.monotonic()))
+        return 1
+
+    def move(self, pos, hwnd):
+        self.calls.append(('move', time.monotonic()))
+
+    def release(self):
+        self.calls.append(('release', time.monotonic()))
+
+    def times(self, name):
+        return [when for call, when in self.calls if call == name]
+
+
+class NumpyEyeTracker(standins.EyeTracker):
+    """
+        Eye tracker returning numpy arrays, like some PyGaze back ends.
+    """
+
+    def sample(self):
+        return np.asarray(standins.EyeTracker.sample(self))
+
+
+Snapshot = collections.namedtuple('Snapshot', ['fist', 'frame_id'])
+
+
+class ScriptedListener(object):
+    """
+        Listener that delivers a frame with the next fist state of a list every period seconds.
+    """
+
+    def __init__(self, fists, period=0.05):
+        self.snapshots = [Snapshot(fist, ii) for ii, fist in enumerate(fists)]
+        self.period = period
+        self.index = -1
+
+    def getSnapshot(self):
+        return Snapshot(None, -1)
+
+    def waitForFrame(self, last_frame_id, timeout=None):
+        time.sleep(self.period)
+        self.index = min(self.index + 1, len(self.snapshots) - 1)
+        return self.snapshots[self.index]
+
+
+def runFor(runtime, seconds):
+    async def main():
+        asyncio.get_event_loop().call_later(seconds, runtime.stop)
+        await runtime.main()
+
+    asyncio.run(main())
+
+
+def test_stand_ins_with_rate_cap():
+    controller = Leap.Controller(frame_rate=200.0, fist_period=40)
+    listener = gesture_reader.SampleListener()
+    controller.add_listener(listener)
+    stop = threading.Event()
+
+    def produce():
+        while not stop.is_set():
+            controller.advance()
+            time.sleep(0.005)
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    recorder = Recorder()
+    runtime = fusion_runtime.FusionRuntime(listener, NumpyEyeTracker(), grab=recorder.grab, move=recorder.move,
+                                           release=recorder.release, gaze_rate=120.0, max_rate=20.0)
+    try:
+        runFor(runtime, 1.5)
+    finally:
+        stop.set()
+        producer.join()
+    moves = recorder.times('move')
+    assert recorder.times('grab') and len(moves) > 3
+    assert runtime.stats['gaze_samples'] > 0
+    # At most one move per 50 ms, the targets in between are coalesced
+    assert min(np.diff(moves)) >= 0.05 - 0.005
+    assert len(recorder.times('release')) == len(recorder.times('grab'))
+
+
+def test_no_hand_keeps_the_window():
+    recorder = Recorder()
+    listener = ScriptedListener([True, None, None, True, False])
+    runtime = fusion_runtime.FusionRuntime(listener, NumpyEyeTracker(), grab=recorder.grab, move=recorder.move,
+                                           release=recorder.release, max_rate=None)
+    runFor(runtime, 0.6)
+    assert len(recorder.times('grab')) == 1
+    assert len(recorder.times('release')) == 1
+    assert recorder.calls[-1][0] == 'release'
+    assert recorder.times('release')[0] > max(recorder.times('move'))
+
+
+class SaccadeEyeTracker(object):
+    """
+        Eye tracker whose gaze jumps between two corners of the screen on every sample, never a fixation.
+    """
+
+    def __init__(self):
+        self.n_samples = 0
+
+    def sample(self):
+        self.n_samples += 1
+        return (100.0, 100.0) if self.n_samples % 2 else (1500.0, 800.0)
+
+
+def test_fixation_detector_moves_only_on_fixation_events():
+    import fixation_detector
+    detector = fixation_detector.VelocityFixationDetector()
+    for ii in range(10):
+        detector.push((800.0, 450.0), ii / 60.0)
+    assert detector.newTarget() is not None
+    recorder = Recorder()
+    runtime = fusion_runtime.FusionRuntime(ScriptedListener([True]), SaccadeEyeTracker(), grab=recorder.grab,
+                                           move=recorder.move, release=recorder.release, gaze_array=detector)
+    runFor(runtime, 0.4)
+    # The mean is still the old fixation, but there was no fixation event during the drag
+    assert detector.mean() is not None
+    assert len(recorder.times('grab')) == 1
+    assert recorder.times('move') == []
@@ -0,0 +1,49 @@
+"""
+Description:
+    Tests the gaze filters of gaze_filter.py and makeGazeFilter.
+"""
+import numpy as np
+import pytest
+
+import gaze_buffer
+import gaze_filter
+
+
+@pytest.mark.parametrize('name', sorted(gaze_filter.FILTERS))
+def test_shared_arguments(name):
+    gaze_array = gaze_filter.makeGazeFilter(name, rate=120.0)
+    assert gaze_array.mean() is None
+    for ii in range(200):
+        gaze_array.push((400.0, 300.0), ii / 120.0)
+    assert np.allclose(gaze_array.mean(), (400.0, 300.0))
+
+
+def test_mean_is_29_sample_buffer():
+    gaze_array = gaze_filter.makeGazeFilter('mean')
+    assert isinstance(gaze_array, gaze_buffer.GazeRingBuffer)
+    assert gaze_array.capacity == 29
+
+
+def test_unknown_filter():
+    with pytest.raises(ValueError):
+        gaze_filter.makeGazeFilter('median')
+
+
+@pytest.mark.parametrize('name', ['oneeuro', 'kalman'])
+def test_mean_is_not_changed_by_later_samples(name):
+    gaze_array = gaze_filter.makeGazeFilter(name)
+    gaze_array.push((100.0, 100.0), 0.0)
+    previous = gaze_array.mean()
+    expected = tuple(previous)
+    gaze_array.push((900.0, 500.0), 0.1)
+    assert tuple(previous) == expected
+    assert tuple(gaze_array.mean()) != expected
+
+
+@pytest.mark.parametrize('name', ['oneeuro', 'kalman'])
+def test_nan_samples_are_ignored(name):
+    gaze_array = gaze_filter.makeGazeFilter(name)
+    gaze_array.push((100.0, 200.0), 0.0)
+    gaze_array.push((float('nan'), float('nan')), 0.1)
+    assert len(gaze_array) == 1
+    assert np.allclose(gaze_array.mean(), (100.0, 200.0))
@@ -0,0 +1,101 @@
+"""
+Description:
+    Tests the registration and timings of gesture_classifiers.GestureRegistry, and its fist as the raw fist of
+    hand_state.HandStateTable.
+"""
+import numpy as np
+import pytest
+
+import standins
+standins.installStandins()
+
+import gesture_classifiers
+import gesture_kernel
+import hand_snapshot
+import hand_state
+
+
+class Clock(object):
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def snapshots(n_frames=40, n_hands=2, fist_period=5):
+    controller = standins.Controller(fist_period=fist_period, n_hands=n_hands)
+    return [hand_snapshot.snapshotFrame(controller.makeFrame()) for _ in range(n_frames)]
+
+
+def trackedHands(snapshot):
+    return snapshot['hands'][:snapshot['hand_count']]
+
+
+def test_register_and_unregister():
+    registry = gesture_classifiers.defaultRegistry()
+    assert registry.names() == ['fist', 'pinch', 'open_palm', 'point']
+    registry.register('thumbs_up', lambda features: features.curl[..., 0] < 0.5)
+    assert 'thumbs_up' in registry and len(registry) == 5
+    features, results = registry.classify(trackedHands(snapshots(1)[0]))
+    assert sorted(results) == sorted(registry.names())
+    assert all(result.shape == (2,) for result in results.values())
+    registry.unregister('thumbs_up')
+    assert 'thumbs_up' not in registry and 'thumbs_up' not in registry.timings()
+
+
+def test_replace_keeps_order():
+    registry = gesture_classifiers.defaultRegistry()
+    registry.register('pinch', lambda features: features.pinch_strength > 0.1)
+    assert registry.names() == ['fist', 'pinch', 'open_palm', 'point']
+
+
+def test_fist_matches_kernel():
+    registry = gesture_classifiers.defaultRegistry()
+    records = np.stack([trackedHands(snapshot) for snapshot in snapshots()])
+    features, results = registry.classify(records)
+    angles, fist = gesture_kernel.classifyFist(records['bone_directions'])
+    assert np.array_equal(results['fist'], fist)
+    assert np.allclose(features.angles, angles)
+    assert results['fist'].any() and not results['fist'].all()
+
+
+def test_timings_per_classifier(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(gesture_classifiers, 'timer', clock)
+
+    def slow(features):
+        clock.now += 0.25
+        return features.pinch_strength > 0
+
+    def fast(features):
+        clock.now += 0.01
+        return features.pinch_strength > 0
+
+    registry = gesture_classifiers.GestureRegistry()
+    registry.register('slow', slow)
+    registry.register('fast', fast)
+    assert registry.timings() == {'features': 0.0, 'slow': 0.0, 'fast': 0.0}
+    records = trackedHands(snapshots(1)[0])
+    for _ in range(4):
+        registry.classify(records)
+    timings = registry.timings()
+    assert timings['slow'] == pytest.approx(0.25)
+    assert timings['fast'] == pytest.approx(0.01)
+    assert timings['features'] == 0.0
+    assert registry.calls['slow'] == 4
+    registry.resetTimings()
+    assert registry.timings() == {'features': 0.0, 'slow': 0.0, 'fast': 0.0}
+
+
+def test_raw_fist_of_hand_state_table():
+    registry = gesture_classifiers.defaultRegistry()
+    classified = hand_state.HandStateTable()
+    reference = hand_state.HandStateTable()
+    for snapshot in snapshots():
+        features, results = registry.classify(trackedHands(snapshot))
+        fists = classified.update(snapshot, raw_fist=results['fist'], angles=features.angles)
+        assert np.array_equal(fists, reference.update(snapshot))
+        assert np.array_equal(classified.raw_fist, reference.raw_fist)
+        assert np.allclose(classified.angles, reference.angles, equal_nan=True)
+    assert len(classified.edges) == len(reference.edges)
@@ -0,0 +1,51 @@
+"""
+Description:
+    Tests the frame accounting of gesture_reader.SampleListener when on_frame is not called for every frame, on the
+    stand-in controller.
+"""
+import pytest
+
+import standins
+standins.installStandins()
+
+import Leap
+import gesture_reader
+
+
+def stalledListener(catch_up, stalls, history_size=60):
+    """
+        Returns the listener after on_frame was called once after every stall, a number of frames the controller
+        produced without calling it.
+    """
+    controller = Leap.Controller(history_size=history_size)
+    listener = gesture_reader.SampleListener(catch_up=catch_up)
+    for stall in stalls:
+        for _ in range(stall):
+            controller.pushFrame(controller.makeFrame())
+        listener.on_frame(controller)
+    return listener
+
+
+@pytest.mark.parametrize('catch_up', [False, True])
+def test_every_frame(catch_up):
+    listener = stalledListener(catch_up, [1] * 50)
+    assert (listener.caught_up_frames, listener.dropped_frames) == (0, 0)
+
+
+def test_missed_frames_are_dropped_without_catch_up():
+    listener = stalledListener(False, [1, 5, 3, 10])
+    assert listener.caught_up_frames == 0
+    assert listener.dropped_frames == 4 + 2 + 9
+
+
+def test_missed_frames_are_caught_up():
+    listener = stalledListener(True, [1, 5, 3, 10])
+    assert listener.caught_up_frames == 4 + 2 + 9
+    assert listener.dropped_frames == 0
+
+
+def test_frames_gone_from_the_history_are_dropped():
+    listener = stalledListener(True, [1, 30, 5], history_size=10)
+    # The history holds the new frame and the 9 frames before it
+    assert listener.caught_up_frames == 9 + 4
+    assert listener.dropped_frames == 29 - 9
@@ -0,0 +1,90 @@
+"""
+Description:
+    Tests the slots, eviction, fist edges and handFist of hand_state.HandStateTable.
+"""
+import numpy as np
+
+import debounce
+import hand_snapshot
+import hand_state
+
+OPEN_DIRECTIONS = np.tile([0.0, 0.0, -1.0], (5, 4, 1))
+FIST_DIRECTIONS = OPEN_DIRECTIONS.copy()
+FIST_DIRECTIONS[:, 1:] = [0.0, -1.0, 0.0]  # Every finger bent by 90 degrees at the knuckle
+
+
+def makeRecord(timestamp, hands):
+    """
+        Returns a FRAME_DTYPE record at timestamp microseconds with the hands given as (id, is_left, fist) tuples.
+    """
+    record = hand_snapshot.emptySnapshot()
+    record['timestamp'] = timestamp
+    record['hand_count'] = len(hands)
+    for ii, (hand_id, is_left, fist) in enumerate(hands):
+        hand = record['hands'][ii]
+        hand['id'] = hand_id
+        hand['is_left'] = is_left
+        hand['bone_directions'] = FIST_DIRECTIONS if fist else OPEN_DIRECTIONS
+    return record
+
+
+def test_slot_assignment():
+    table = hand_state.HandStateTable(max_hands=2)
+    table.update(makeRecord(0, [(7, True, False), (9, False, False)]))
+    assert len(table) == 2
+    assert table.slots == {7: 0, 9: 1}
+    table.update(makeRecord(10000, [(9, False, False)]))
+    assert table.slots[9] == 1
+    # A third hand does not fit, the hand seen least recently is replaced
+    table.update(makeRecord(20000, [(11, True, False)]))
+    assert table.slots == {9: 1, 11: 0}
+    assert table.handStates() == [(11, True, False), (9, False, False)]
+
+
+def test_eviction_after_evict_after():
+    ends = []
+    table = hand_state.HandStateTable(votes=1, enter_votes=1, exit_votes=0, evict_after=0.5, on_fist_end=ends.append)
+    table.update(makeRecord(0, [(3, False, True)]))
+    assert table.handFist() is True
+    table.update(makeRecord(500000, []))
+    assert len(table) == 1
+    table.update(makeRecord(500001, []))
+    assert len(table) == 0
+    assert ends == [hand_state.FistEdge(debounce.END, 3, False, 500001)]
+    assert table.handFist() is None
+
+
+def test_fist_edges():
+    starts, ends = [], []
+    table = hand_state.HandStateTable(votes=5, enter_votes=4, exit_votes=1, on_fist_start=starts.append,
+                                      on_fist_end=ends.append)
+    for ii in range(4):
+        fists = table.update(makeRecord(ii * 10000, [(1, True, True)]))
+    assert fists.tolist() == [True]
+    assert starts == [hand_state.FistEdge(debounce.START, 1, True, 30000)]
+    assert table.edges == starts
+    for ii in range(4, 8):
+        table.update(makeRecord(ii * 10000, [(1, True, False)]))
+    assert ends == [hand_state.FistEdge(debounce.END, 1, True, 70000)]
+    assert table.edges == ends
+    table.update(makeRecord(80000, [(1, True, False)]))
+    assert table.edges == []
+
+
+def test_hand_fist_by_side():
+    table = hand_state.HandStateTable(votes=1, enter_votes=1, exit_votes=0)
+    table.update(makeRecord(0, [(1, True, True), (2, False, False)]))
+    assert table.handFist(is_left=True) is True
+    assert table.handFist(is_left=False) is False
+    table.update(makeRecord(10000, [(1, True, True)]))
+    assert table.handFist() is True
+    table.update(makeRecord(20000, [(2, False, False)]))
+    assert table.handFist() is False
+
+
+def test_raw_fist_without_angles():
+    table = hand_state.HandStateTable(votes=1, enter_votes=1, exit_votes=0)
+    # The raw fist decides, the angles are computed from the bone directions
+    fists = table.update(makeRecord(0, [(1, True, False)]), raw_fist=np.array([True]))
+    assert fists.tolist() == [True]
+    assert np.allclose(table.angles[0], 0.0)
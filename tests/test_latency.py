@@ -0,0 +1,99 @@
+"""
+Description:
+    Tests that the latency tracker measures the age of the data a stage actually worked on, from capture times carried
+    with every snapshot, gaze sample and actuated target.
+"""
+import standins
+standins.installStandins()
+
+import actuation
+import gaze_buffer
+import gesture_reader
+import latency
+
+
+class Clock(object):
+    def __init__(self, now=100.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_histogram_percentiles():
+    histogram = latency.LatencyHistogram()
+    for value in range(1, 1001):
+        histogram.record(value)
+    assert histogram.count == 1000
+    assert histogram.min == 1 and histogram.max == 1000
+    assert abs(histogram.percentile(50) - 500) <= 500 * 2 ** -6
+    assert histogram.percentile(100) == 1000
+
+
+def test_mark_uses_given_capture_times():
+    clock = Clock()
+    tracker = latency.LatencyTracker(clock)
+    tracker.mark('stage', {latency.HAND: 99.99, latency.GAZE: 99.95, latency.GAZE_MEAN: None})
+    summary = tracker.summary()
+    assert set(summary) == {('stage', latency.HAND), ('stage', latency.GAZE)}
+    assert abs(summary[('stage', latency.HAND)]['max'] - 10.0) < 0.2
+    assert abs(summary[('stage', latency.GAZE)]['max'] - 50.0) < 1.0
+    tracker.mark('empty', None)
+    assert ('empty', latency.HAND) not in tracker.summary()
+
+
+def test_capture_times_of_gaze_buffer():
+    gaze_array = gaze_buffer.GazeRingBuffer(3)
+    assert latency.captureTimes(gaze_array=gaze_array) == {}
+    for ii in range(4):
+        gaze_array.push((ii, ii), 10.0 + ii)
+    captures = latency.captureTimes(gaze_array=gaze_array)
+    assert captures[latency.GAZE] == 13.0
+    assert captures[latency.GAZE_MEAN] == 12.0
+    assert latency.HAND not in captures
+
+
+def test_snapshot_carries_frame_capture_time(monkeypatch):
+    clock = Clock(50.0)
+    tracker = latency.LatencyTracker(clock)
+    tracker.enable()
+    monkeypatch.setattr(latency, 'tracker', tracker)
+    controller = standins.Controller()
+    listener = gesture_reader.SampleListener()
+    controller.add_listener(listener)
+    frame = controller.makeFrame()
+    # The service reports the frame as 20 ms old when on_frame runs
+    controller.now = lambda: frame.timestamp + 20000
+    controller.pushFrame(frame)
+    snapshot = listener.getSnapshot()
+    assert abs(snapshot.capture_time - 49.98) < 1e-9
+    listener.getFist()
+    assert listener.fist_snapshot is snapshot
+    assert latency.captureTimes(snapshot)[latency.HAND] == snapshot.capture_time
+    assert ('on_frame', latency.HAND) in tracker.summary()
+
+
+def test_snapshot_without_tracker_has_no_capture_time():
+    controller = standins.Controller()
+    listener = gesture_reader.SampleListener()
+    controller.add_listener(listener)
+    controller.advance()
+    assert listener.getSnapshot().capture_time is None
+
+
+def test_actuator_keeps_tag_of_held_back_target():
+    clock = Clock(0.0)
+    mouse = standins.MouseController()
+    actuator = actuation.PointerActuator(mouse, standins.Button.left, max_rate=10.0, clock=clock)
+    assert actuator.move((0, 0), {latency.GAZE: -0.01})
+    assert actuator.written_tag == {latency.GAZE: -0.01}
+    clock.now = 0.02
+    assert not actuator.move((50, 50), {latency.GAZE: 0.01})
+    clock.now = 0.05
+    assert not actuator.move((80, 80), {latency.GAZE: 0.04})
+    assert actuator.written_tag == {latency.GAZE: -0.01}
+    clock.now = 0.12
+    assert actuator.flush()
+    assert mouse.position == (80, 80)
+    # The age at the write is measured from the capture of the target that was written
+    assert actuator.written_tag == {latency.GAZE: 0.04}
@@ -0,0 +1,99 @@
+"""
+Description:
+    Checks that both paths of leap_fast read the same hand data as hand_snapshot: the generic fallback on the
+    stand-ins, and the direct getters bound to a LeapPython stand-in whose getters read the stand-in objects.
+"""
+import importlib.util
+import os
+import types
+
+import numpy as np
+import pytest
+
+import standins
+standins.installStandins()
+
+import hand_snapshot
+import leap_fast
+
+
+def makeFrame(n_hands=2):
+    controller = standins.Controller(n_hands=n_hands)
+    frame = controller.makeFrame()
+    for ii, hand in enumerate(frame.hands):
+        hand.palm_position = standins.Vector(1.0 + ii, 2.0, 3.0)
+        hand.palm_velocity = standins.Vector(-4.0, 5.0 * ii, 6.0)
+        hand.grab_strength = 0.25 * ii
+        hand.pinch_strength = 0.5
+    return frame
+
+
+def fakeLeapPython():
+    """
+        Returns a module with the LeapPython getters that leap_fast binds, working on the stand-in objects.
+    """
+    getters = {
+        'Vector_x_get': lambda vector: vector.x,
+        'Vector_y_get': lambda vector: vector.y,
+        'Vector_z_get': lambda vector: vector.z,
+        'Frame_id_get': lambda frame: frame.id,
+        'Frame_timestamp_get': lambda frame: frame.timestamp,
+        'Frame_hands_get': lambda frame: frame.hands,
+        'HandList___len__': len,
+        'HandList___getitem__': lambda hands, index: hands[index],
+        'Hand_id_get': lambda hand: hand.id,
+        'Hand_is_left_get': lambda hand: hand.is_left,
+        'Hand_fingers_get': lambda hand: hand.fingers,
+        'Hand_palm_position_get': lambda hand: hand.palm_position,
+        'Hand_palm_normal_get': lambda hand: hand.palm_normal,
+        'Hand_palm_velocity_get': lambda hand: hand.palm_velocity,
+        'Hand_grab_strength_get': lambda hand: hand.grab_strength,
+        'Hand_pinch_strength_get': lambda hand: hand.pinch_strength,
+        'FingerList___len__': len,
+        'FingerList___getitem__': lambda fingers, index: fingers[index],
+        'Finger_bone': lambda finger, index: finger.bone(index),
+        'Bone_direction_get': lambda bone: bone.direction,
+    }
+    module = types.ModuleType('LeapPython')
+    module.__dict__.update(getters)
+    return module
+
+
+@pytest.fixture
+def direct_leap_fast(monkeypatch):
+    """
+        Loads a separate copy of leap_fast with LeapPython available, so the direct getters are bound.
+    """
+    import Leap
+    monkeypatch.setattr(Leap, 'LeapPython', fakeLeapPython(), raising=False)
+    path = os.path.join(os.path.dirname(os.path.abspath(leap_fast.__file__)), 'leap_fast.py')
+    spec = importlib.util.spec_from_file_location('leap_fast_direct', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    assert module.AVAILABLE
+    return module
+
+
+def checkSameAsSnapshot(module, frame):
+    expected = hand_snapshot.snapshotFrame(frame)
+    record = module.snapshotFrame(frame)
+    assert record.tobytes() == expected.tobytes()
+    # Reusing a record clears the hands of the previous frame
+    module.snapshotFrame(makeFrame(n_hands=1), record)
+    assert record['hand_count'] == 1
+    assert not record['hands'][1]['bone_directions'].any()
+    hand = frame.hands[1]
+    assert np.array_equal(module.handBoneDirections(hand), hand_snapshot.boneDirections(hand))
+    assert module.vectorTuple(hand.palm_position) == hand.palm_position.to_tuple()
+    assert module.frameHandList(frame) == list(frame.hands)
+
+
+def test_fallback_path():
+    assert not leap_fast.AVAILABLE
+    assert leap_fast.snapshotFrame is hand_snapshot.snapshotFrame
+    checkSameAsSnapshot(leap_fast, makeFrame())
+
+
+def test_direct_path(direct_leap_fast):
+    assert direct_leap_fast.snapshotFrame is not hand_snapshot.snapshotFrame
+    checkSameAsSnapshot(direct_leap_fast, makeFrame())
@@ -0,0 +1,107 @@
+"""
+Description:
+    Tests that leap_gestures.GestureDispatcher delivers every gesture state once, in order, and drains the gestures
+    of the frames it skipped with sinceFrame, on the stand-in controller and gestures.
+"""
+import standins
+standins.installStandins()
+
+import leap_gestures
+
+
+def swipe(state, gesture_id, duration=0):
+    return standins.Gesture(leap_gestures.SWIPE, state, gesture_id, duration, position=standins.Vector(1.0, 2.0, 3.0),
+                            start_position=standins.Vector(0.0, 0.0, 0.0),
+                            direction=standins.Vector(1.0, 0.0, 0.0), speed=500.0)
+
+
+def keyTap(gesture_id):
+    return standins.Gesture(leap_gestures.KEY_TAP, leap_gestures.STATE_STOP, gesture_id,
+                            position=standins.Vector(0.0, 0.0, 0.0), direction=standins.Vector(0.0, -1.0, 0.0))
+
+
+def makeDispatcher(gesture_types=leap_gestures.GESTURE_TYPES):
+    controller = standins.Controller()
+    dispatcher = leap_gestures.GestureDispatcher(gesture_types)
+    dispatcher.enable(controller)
+    events = []
+    for gesture_type in dispatcher.gesture_types:
+        dispatcher.addHandler(gesture_type, events.append)
+    return controller, dispatcher, events
+
+
+def push(controller, gestures):
+    controller.pushFrame(controller.makeFrame(gestures))
+    return controller.frame()
+
+
+def states(events):
+    return [(event.id, event.state) for event in events]
+
+
+def test_every_state_once():
+    controller, dispatcher, events = makeDispatcher()
+    # The Leap service lists a gesture in every frame it lasts
+    push(controller, [swipe(leap_gestures.STATE_START, 1)])
+    dispatcher.dispatch(controller.frame())
+    for duration in (1000, 2000):
+        push(controller, [swipe(leap_gestures.STATE_UPDATE, 1, duration)])
+        dispatcher.dispatch(controller.frame())
+    push(controller, [swipe(leap_gestures.STATE_STOP, 1, 3000)])
+    dispatcher.dispatch(controller.frame())
+    push(controller, [swipe(leap_gestures.STATE_STOP, 1, 3000)])
+    dispatcher.dispatch(controller.frame())
+    assert states(events) == [(1, leap_gestures.STATE_START), (1, leap_gestures.STATE_UPDATE),
+                              (1, leap_gestures.STATE_UPDATE), (1, leap_gestures.STATE_STOP)]
+    assert isinstance(events[0], leap_gestures.SwipeEvent)
+    assert events[-1].duration == 3000
+    assert dispatcher.delivered == 4
+    assert dispatcher.duplicates == 1
+
+
+def test_same_frame_is_read_once():
+    controller, dispatcher, events = makeDispatcher()
+    frame = push(controller, [keyTap(5)])
+    assert len(dispatcher.dispatch(frame)) == 1
+    assert dispatcher.dispatch(frame) == []
+    assert len(events) == 1
+
+
+def test_skipped_frames_are_drained():
+    controller, dispatcher, events = makeDispatcher()
+    dispatcher.dispatch(push(controller, []))
+    push(controller, [swipe(leap_gestures.STATE_START, 2)])
+    push(controller, [keyTap(3)])
+    push(controller, [swipe(leap_gestures.STATE_UPDATE, 2, 1000)])
+    dispatcher.dispatch(push(controller, [swipe(leap_gestures.STATE_UPDATE, 2, 2000)]))
+    # START before UPDATE before STOP, and only the newest UPDATE of the drain
+    assert states(events) == [(2, leap_gestures.STATE_START), (2, leap_gestures.STATE_UPDATE),
+                              (3, leap_gestures.STATE_STOP)]
+    assert events[1].duration == 2000
+    assert isinstance(events[2], leap_gestures.KeyTapEvent)
+
+
+def test_no_update_after_stop():
+    controller, dispatcher, events = makeDispatcher()
+    dispatcher.dispatch(push(controller, [swipe(leap_gestures.STATE_START, 4)]))
+    push(controller, [swipe(leap_gestures.STATE_UPDATE, 4, 1000)])
+    dispatcher.dispatch(push(controller, [swipe(leap_gestures.STATE_STOP, 4, 2000)]))
+    assert states(events) == [(4, leap_gestures.STATE_START), (4, leap_gestures.STATE_STOP)]
+    dispatcher.dispatch(push(controller, [swipe(leap_gestures.STATE_UPDATE, 4, 3000)]))
+    assert len(events) == 2
+
+
+def test_only_enabled_types():
+    controller, dispatcher, events = makeDispatcher(gesture_types=(leap_gestures.KEY_TAP,))
+    dispatcher.dispatch(push(controller, [swipe(leap_gestures.STATE_START, 6), keyTap(7)]))
+    assert states(events) == [(7, leap_gestures.STATE_STOP)]
+
+
+def test_stopped_ids_are_forgotten_after_remember():
+    controller, dispatcher, events = makeDispatcher()
+    dispatcher.remember = 2
+    for gesture_id in range(4):
+        dispatcher.dispatch(push(controller, [keyTap(gesture_id)]))
+    assert list(dispatcher.stopped) == [2, 3]
+    dispatcher.clear()
+    assert dispatcher.last_frame is None and not dispatcher.stopped
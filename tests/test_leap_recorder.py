@@ -0,0 +1,128 @@
+"""
+Description:
+    Records stand-in Leap frames with leap_recorder and replays them through ReplayController to a listener, without
+    the LeapPython library.
+"""
+import json
+import sys
+import time
+
+import numpy as np
+import pytest
+
+import standins
+
+
+def encodeFrame(frame):
+    hands = [(hand.id, hand.is_left, [[bone.direction.to_tuple() for bone in finger.bones] for finger in hand.fingers])
+             for hand in frame.hands]
+    return json.dumps({'id': frame.id, 'timestamp': frame.timestamp, 'hands': hands}).encode('utf-8')
+
+
+def decodeFrame(data):
+    record = json.loads(bytes(data).decode('utf-8'))
+    hands = [standins.Hand(hand_id, np.array(directions), is_left=is_left)
+             for hand_id, is_left, directions in record['hands']]
+    return standins.Frame(record['id'], record['timestamp'], hands)
+
+
+@pytest.fixture
+def recording(tmp_path):
+    """
+        Records 300 stand-in frames with two hands, which switch between open and fist every 50 frames, and returns
+        the path of the recording and the frames.
+    """
+    standins.installStandins()
+    import leap_recorder
+    path = str(tmp_path / 'session.leap')
+    controller = standins.Controller(fist_period=50, n_hands=2)
+    frames = []
+    with leap_recorder.FrameRecorder(path, encode=encodeFrame) as recorder:
+        controller.add_listener(leap_recorder.recordingListenerClass()(recorder))
+        for _ in range(300):
+            controller.advance()
+            frames.append(controller.frame())
+        assert recorder.frames_recorded == 300
+    return path, frames
+
+
+def test_index(recording):
+    import leap_recorder
+    path, frames = recording
+    index = leap_recorder.readIndex(path)
+    assert list(index['frame_id']) == [frame.id for frame in frames]
+    assert list(index['timestamp']) == [frame.timestamp for frame in frames]
+
+
+def test_replay_without_leap(recording, monkeypatch):
+    path, frames = recording
+    # A None entry makes import Leap raise ImportError, as it does without LeapPython
+    monkeypatch.setitem(sys.modules, 'Leap', None)
+    monkeypatch.delitem(sys.modules, 'leap_recorder')
+    import leap_recorder
+    controller = leap_recorder.ReplayController(path, realtime=False, history_size=10, decode=decodeFrame)
+    assert len(controller) == 300
+    assert not controller.frame().is_valid
+    replayed = []
+    while controller.step():
+        replayed.append(controller.frame())
+    assert [frame.id for frame in replayed] == [frame.id for frame in frames]
+    assert controller.frame(9).id == frames[-10].id
+    assert not controller.frame(10).is_valid
+    for original, frame in zip(frames[-10:], replayed[-10:]):
+        assert [hand.id for hand in frame.hands] == [hand.id for hand in original.hands]
+        assert frame.hands[1].fingers[2].bones[3].direction.to_tuple() == \
+            original.hands[1].fingers[2].bones[3].direction.to_tuple()
+    controller.close()
+
+
+class FrameListener(standins.Listener):
+    """
+        Listener that keeps the callbacks it gets and the id and hand ids of every frame it is given.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.frames = []
+
+    def on_init(self, controller):
+        self.calls.append('init')
+
+    def on_connect(self, controller):
+        self.calls.append('connect')
+
+    def on_disconnect(self, controller):
+        self.calls.append('disconnect')
+
+    def on_frame(self, controller):
+        frame = controller.frame()
+        self.frames.append((frame.id, [hand.id for hand in frame.hands]))
+
+
+def test_replay_through_listener(recording):
+    import leap_recorder
+    path, frames = recording
+    listener = FrameListener()
+    controller = leap_recorder.ReplayController(path, realtime=False, decode=decodeFrame)
+    controller.add_listener(listener)
+    controller.run()
+    assert listener.calls == ['init', 'connect', 'disconnect']
+    assert listener.frames == [(frame.id, [hand.id for hand in frame.hands]) for frame in frames]
+    controller.rewind()
+    assert not controller.frame().is_valid
+    controller.step()
+    assert controller.frame().id == frames[0].id
+    controller.close()
+
+
+def test_realtime_replay_keeps_the_pace(recording):
+    import leap_recorder
+    path, frames = recording
+    controller = leap_recorder.ReplayController(path, realtime=True, speed=10.0, decode=decodeFrame)
+    start = time.time()
+    controller.run()
+    elapsed = time.time() - start
+    controller.close()
+    recorded = (frames[-1].timestamp - frames[0].timestamp) * 1e-6
+    assert elapsed >= 0.9 * recorded / 10.0
+    assert controller.frame().id == frames[-1].id
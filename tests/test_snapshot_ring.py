@@ -0,0 +1,66 @@
+"""
+Description:
+    Tests SnapshotRing and RingReader in one process, and that a process attaching to the ring leaves the shared
+    memory in place when it exits.
+"""
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+import hand_snapshot
+import snapshot_ring
+
+
+@pytest.fixture
+def ring():
+    ring = snapshot_ring.SnapshotRing(capacity=8, create=True)
+    yield ring
+    ring.close()
+
+
+def writeFrames(ring, n):
+    snapshot = hand_snapshot.emptySnapshot()
+    for _ in range(n):
+        snapshot['frame_id'] = ring.written()
+        ring.write(snapshot, np.ones(1, dtype=bool))
+
+
+def test_poll_in_order(ring):
+    reader = snapshot_ring.RingReader(ring, from_start=True)
+    writeFrames(ring, 5)
+    frames = reader.poll()
+    assert [sequence for sequence, _ in frames] == list(range(5))
+    assert [int(slot['snapshot']['frame_id']) for _, slot in frames] == list(range(5))
+    assert all(reader.confirm(sequence) for sequence, _ in frames)
+    assert (reader.read, reader.lost, reader.lag()) == (5, 0, 0)
+
+
+def test_overwritten_frames_are_lost(ring):
+    reader = snapshot_ring.RingReader(ring, from_start=True)
+    writeFrames(ring, 20)
+    frames = reader.poll()
+    assert [sequence for sequence, _ in frames] == list(range(12, 20))
+    assert (reader.read, reader.lost) == (8, 12)
+
+
+def test_frames_overwritten_while_read_are_lost(ring):
+    reader = snapshot_ring.RingReader(ring, from_start=True)
+    writeFrames(ring, 4)
+    frames = reader.poll()
+    writeFrames(ring, 6)  # Wraps around to the slots of frames 0 and 1
+    confirmed = [sequence for sequence, _ in frames if reader.confirm(sequence)]
+    assert confirmed == [2, 3]
+    assert (reader.read, reader.lost) == (2, 2)
+
+
+def test_attaching_process_leaves_the_memory(ring):
+    writeFrames(ring, 3)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = "import snapshot_ring; ring = snapshot_ring.SnapshotRing(%r); assert ring.written() == 3; ring.close()"
+    subprocess.check_call([sys.executable, '-c', code % ring.name], cwd=root)
+    attached = snapshot_ring.SnapshotRing(ring.name)
+    assert attached.written() == 3
+    attached.close()
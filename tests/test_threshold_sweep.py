@@ -0,0 +1,44 @@
+"""
+Description:
+    Tests that threshold_sweep.evaluate matches the debounced fist state machine of the live listener.
+"""
+import numpy as np
+import pytest
+
+import debounce
+import threshold_sweep
+
+
+def simulate(mean_angle, threshold, window, enter_votes, exit_votes):
+    debouncer = debounce.Debouncer(window=window, enter_votes=enter_votes, exit_votes=exit_votes)
+    fist = []
+    for angle in mean_angle:
+        debouncer.update(angle > threshold)
+        fist.append(debouncer.active)
+    return np.array(fist)
+
+
+@pytest.mark.parametrize('rule', threshold_sweep.WINDOW_RULES)
+def test_evaluate_matches_debouncer(rule):
+    rng = np.random.RandomState(3)
+    n = 2000
+    labels = (np.arange(n) // 150) % 2 == 1
+    mean_angle = np.where(labels, 1.6, 1.0) + rng.normal(0.0, 0.3, n)
+    timestamps = np.arange(n) * 9000.0
+    thresholds = np.array([1.1, 1.3, 1.5])
+    windows = np.arange(3, 10)
+    counts = threshold_sweep.evaluate(mean_angle, labels, timestamps, thresholds, windows, rule, memory_mb=1)
+    needed = threshold_sweep.requiredVotes(windows, rule)
+    exits = threshold_sweep.exitVotes(windows, rule)
+    for ww, window in enumerate(windows):
+        for tt, threshold in enumerate(thresholds):
+            fist = simulate(mean_angle, threshold, window, needed[ww], exits[ww])
+            assert counts['tp'][ww, tt] == np.count_nonzero(fist & labels)
+            assert counts['fp'][ww, tt] == np.count_nonzero(fist & ~labels)
+            assert counts['fn'][ww, tt] == np.count_nonzero(~fist & labels)
+
+
+def test_listener_exits_at_one_of_five():
+    assert threshold_sweep.requiredVotes([5], 'listener')[0] == 4
+    assert threshold_sweep.exitVotes([5], 'listener')[0] == 1
+    assert threshold_sweep.exitVotes([5], 'majority')[0] == 2
@@ -0,0 +1,118 @@
+"""
+Description:
+    Tests the lock-free GazeSampleQueue and TobiiGazeSource, driven by the ReplayEyeTracker stand-in.
+"""
+import threading
+
+import numpy as np
+
+import gaze_buffer
+import tobii_gaze
+
+
+def pushSamples(queue, start, stop):
+    for ii in range(start, stop):
+        queue.push(ii, -ii, 10 * ii, 100 * ii)
+
+
+def test_queue_drains_in_order():
+    queue = tobii_gaze.GazeSampleQueue(8)
+    pushSamples(queue, 0, 6)
+    assert len(queue) == 6
+    drained = queue.drain()
+    assert drained[:, tobii_gaze.X].tolist() == list(range(6))
+    assert drained[:, tobii_gaze.Y].tolist() == [-ii for ii in range(6)]
+    assert drained[:, tobii_gaze.DEVICE_TIME].tolist() == [10 * ii for ii in range(6)]
+    assert drained[:, tobii_gaze.SYSTEM_TIME].tolist() == [100 * ii for ii in range(6)]
+    assert len(queue) == 0
+    assert len(queue.drain()) == 0
+    # Wraps around the end of the buffer
+    pushSamples(queue, 6, 11)
+    assert queue.drain()[:, tobii_gaze.X].tolist() == list(range(6, 11))
+    assert queue.dropped == 0
+
+
+def test_queue_overwrites_oldest():
+    queue = tobii_gaze.GazeSampleQueue(8)
+    pushSamples(queue, 0, 20)
+    assert len(queue) == 8
+    drained = queue.drain()
+    # The newest samples are kept. The row the producer could be writing is not trusted, so one less than capacity
+    assert drained[:, tobii_gaze.X].tolist() == list(range(13, 20))
+    assert queue.dropped == 13
+    pushSamples(queue, 20, 23)
+    assert queue.drain()[:, tobii_gaze.X].tolist() == [20, 21, 22]
+    assert queue.dropped == 13
+
+
+def test_queue_with_producer_thread():
+    queue = tobii_gaze.GazeSampleQueue(64)
+    n_samples = 200000
+    producer = threading.Thread(target=pushSamples, args=(queue, 0, n_samples))
+    producer.start()
+    drained = []
+    while producer.is_alive():
+        drained.append(queue.drain())
+    producer.join()
+    drained.append(queue.drain())
+    drained = np.concatenate(drained)
+    x = drained[:, tobii_gaze.X]
+    assert (np.diff(x) > 0).all(), "Samples out of order"
+    assert (drained[:, tobii_gaze.SYSTEM_TIME] == 100 * x).all(), "Torn sample"
+    assert len(drained) + queue.dropped == n_samples
+    assert x[-1] == n_samples - 1
+
+
+def makeTrace(n_samples, invalid=()):
+    trace = np.empty((n_samples, 3))
+    trace[:, 0] = np.linspace(0.0, 1.0, n_samples)
+    trace[:, 1] = 0.5
+    trace[:, 2] = np.arange(n_samples) * 8333.0
+    trace[list(invalid), :2] = np.nan
+    return trace
+
+
+def test_source_with_replay():
+    trace = makeTrace(100, invalid=(10, 11, 50))
+    eyetracker = tobii_gaze.ReplayEyeTracker(trace, realtime=False)
+    source = tobii_gaze.TobiiGazeSource(eyetracker, screen_size=(1600, 900), capacity=256)
+    assert source.sample() is None
+    source.subscribe()
+    eyetracker.join()
+    source.unsubscribe()
+    assert not eyetracker.callbacks
+    assert source.invalid == 3
+    samples = source.drain()
+    valid = np.ones(len(trace), dtype=bool)
+    valid[[10, 11, 50]] = False
+    assert len(samples) == 97
+    assert np.allclose(samples[:, tobii_gaze.X], trace[valid, 0] * 1600)
+    assert np.allclose(samples[:, tobii_gaze.Y], 450)
+    assert (samples[:, tobii_gaze.DEVICE_TIME] == trace[valid, 2]).all()
+    assert source.sample() == (1600.0, 450.0)
+    assert source.queue.dropped == 0
+
+
+def test_source_drops_oldest_when_behind():
+    eyetracker = tobii_gaze.ReplayEyeTracker(makeTrace(1000), realtime=False)
+    source = tobii_gaze.TobiiGazeSource(eyetracker, capacity=64)
+    source.subscribe()
+    eyetracker.join()
+    samples = source.drain()
+    assert len(samples) == 63
+    assert source.queue.dropped == 937
+    assert samples[-1, tobii_gaze.DEVICE_TIME] == 999 * 8333.0
+
+
+def test_source_drain_into_buffer():
+    eyetracker = tobii_gaze.ReplayEyeTracker(makeTrace(40), realtime=False)
+    source = tobii_gaze.TobiiGazeSource(eyetracker)
+    gaze_array = gaze_buffer.GazeRingBuffer(10)
+    source.subscribe()
+    eyetracker.join()
+    assert source.drainInto(gaze_array) == 40
+    assert source.drainInto(gaze_array) == 0
+    assert np.allclose(gaze_array.mean(), (np.linspace(0.0, 1.0, 40)[-10:].mean() * 1600, 450))
+    # Capture times on the host clock, the replay sends the device time as the system time
+    latest = gaze_array.latest()
+    assert np.isclose(latest[2], 39 * 8333.0 * 1e-6 + source.clock_offset)
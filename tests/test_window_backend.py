@@ -0,0 +1,92 @@
+"""
+Description:
+    Tests WindowGeometryCache against FakeWindowBackend: hits, TTL expiry, local updates after own moves and
+    invalidation by change notifications.
+"""
+import window_backend
+
+
+class Clock(object):
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def makeCache(ttl=1.0):
+    backend = window_backend.FakeWindowBackend({1: (100, 100, 900, 700), 2: (0, 0, 50, 50)})
+    clock = Clock()
+    return backend, clock, window_backend.WindowGeometryCache(backend, ttl=ttl, clock=clock)
+
+
+def test_rect_is_cached():
+    backend, clock, cache = makeCache()
+    assert cache.rect(1) == (100, 100, 900, 700)
+    clock.now = 0.5
+    assert cache.rect(1) == (100, 100, 900, 700)
+    assert cache.rect(2) == (0, 0, 50, 50)
+    assert backend.calls['windowRect'] == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_ttl_expiry():
+    backend, clock, cache = makeCache(ttl=1.0)
+    cache.rect(1)
+    # A change the backend does not report is picked up once the entry expires
+    backend.rects[1] = (200, 200, 1000, 800)
+    clock.now = 0.99
+    assert cache.rect(1) == (100, 100, 900, 700)
+    clock.now = 1.0
+    assert cache.rect(1) == (200, 200, 1000, 800)
+    assert backend.calls['windowRect'] == 2
+    clock.now = 1.5
+    assert cache.rect(1) == (200, 200, 1000, 800)
+    assert backend.calls['windowRect'] == 2
+
+
+def test_no_ttl_never_expires():
+    backend, clock, cache = makeCache(ttl=None)
+    cache.rect(1)
+    clock.now = 1e6
+    cache.rect(1)
+    assert backend.calls['windowRect'] == 1
+
+
+def test_own_moves_update_the_cache():
+    backend, clock, cache = makeCache(ttl=1.0)
+    cache.rect(1)
+    clock.now = 0.5
+    cache.moveWindow(1, 150, 120, 800, 600)
+    assert backend.rects[1] == (150, 120, 950, 720)
+    assert cache.rect(1) == (150, 120, 950, 720)
+    assert backend.calls['windowRect'] == 1
+    # The move does not renew the entry, so the TTL still bounds how long an external change goes unnoticed
+    clock.now = 1.0
+    cache.rect(1)
+    assert backend.calls['windowRect'] == 2
+    # A move of a window that was never read is cached as well
+    cache.moveWindow(2, 10, 10, 50, 50)
+    assert cache.rect(2) == (10, 10, 60, 60)
+    assert backend.calls['windowRect'] == 2
+
+
+def test_external_change_invalidates():
+    backend, clock, cache = makeCache(ttl=None)
+    cache.rect(1)
+    cache.rect(2)
+    backend.externalMove(1, (300, 300, 1100, 900))
+    assert cache.rect(1) == (300, 300, 1100, 900)
+    assert cache.rect(2) == (0, 0, 50, 50)
+    assert backend.calls['windowRect'] == 3
+
+
+def test_invalidate_all():
+    backend, clock, cache = makeCache(ttl=None)
+    cache.rect(1)
+    cache.rect(2)
+    cache.invalidate(3)  # Unknown windows are ignored
+    cache.invalidate()
+    cache.rect(1)
+    cache.rect(2)
+    assert backend.calls['windowRect'] == 4
@@ -0,0 +1,88 @@
+"""
+Description:
+    Tests window_index.WindowIndex against the fake window manager in window_backend.FakeWindowBackend.
+"""
+import numpy as np
+
+import window_backend
+import window_index
+
+
+class Clock(object):
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def randomRect(rng):
+    width = rng.randint(100, 800)
+    height = rng.randint(100, 600)
+    left = rng.randint(-100, 1800)
+    top = rng.randint(0, 1000)
+    return (left, top, left + width, top + height)
+
+
+def test_follows_the_events_of_the_window_manager():
+    rng = np.random.RandomState(0)
+    backend = window_backend.FakeWindowBackend(dict((hwnd, randomRect(rng)) for hwnd in range(1, 21)))
+    index = window_index.WindowIndex(backend, cell_size=128)
+    next_hwnd = 21
+    for _ in range(300):
+        action = rng.randint(4)
+        hwnd = backend.stacking[rng.randint(len(backend.stacking))]
+        if action == 0 or len(backend.stacking) < 2:
+            backend.createWindow(next_hwnd, randomRect(rng))
+            next_hwnd += 1
+        elif action == 1:
+            backend.destroyWindow(hwnd)
+        elif action == 2:
+            backend.raiseWindow(hwnd)
+        else:
+            backend.externalMove(hwnd, randomRect(rng))
+        for x, y in zip(rng.randint(-200, 2600, 10), rng.randint(-100, 1700, 10)):
+            assert index.windowAt(x, y) == backend.windowAt(x, y)
+    # Everything came from the events, the layout was only read once
+    assert backend.calls['stackingOrder'] == 1
+
+
+def test_unknown_windows_do_not_rebuild():
+    backend = window_backend.FakeWindowBackend({1: (0, 0, 500, 500), 2: (300, 300, 800, 800)})
+    index = window_index.WindowIndex(backend)
+    backend.sendEvent(window_backend.WINDOW_MOVED, 99, (0, 0, 50, 50))
+    backend.sendEvent(window_backend.WINDOW_RAISED, 99)
+    assert index.windowAt(10, 10) == 1
+    assert index.windowAt(400, 400) == 2
+    assert 99 not in index
+    assert backend.calls['stackingOrder'] == 1
+    backend.sendEvent(window_backend.WINDOWS_RESTACKED, None)
+    assert index.windowAt(400, 400) == 2
+    assert backend.calls['stackingOrder'] == 2
+
+
+def test_refresh_interval_without_events():
+    backend = window_backend.FakeWindowBackend({1: (0, 0, 500, 500)})
+    clock = Clock()
+    index = window_index.WindowIndex(backend, refresh_interval=1.0, clock=clock)
+    backend.event_callback = None  # Like a backend without events
+    backend.createWindow(2, (100, 100, 200, 200))
+    assert index.windowAt(150, 150) == 1
+    clock.now = 1.0
+    assert index.windowAt(150, 150) == 2
+    assert backend.calls['stackingOrder'] == 2
+
+
+def test_without_backend():
+    index = window_index.WindowIndex(cell_size=64)
+    index.addWindow(1, (0, 0, 300, 300))
+    index.addWindow(2, (100, 100, 200, 200))
+    assert index.windowAt(150, 150) == 2
+    index.raiseWindow(1)
+    assert index.windowAt(150, 150) == 1
+    index.moveWindow(1, (400, 400, 500, 500))
+    assert index.windowAt(150, 150) == 2
+    assert index.windowAt(450, 450) == 1
+    index.removeWindow(2)
+    assert index.windowAt(150, 150) is None
+    assert len(index) == 1
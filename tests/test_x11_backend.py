@@ -0,0 +1,232 @@
+"""
+Description:
+    Tests X11Backend and WindowGeometryCache against a virtual X server, once without a window manager and once
+    under every reparenting window manager that is installed. The tests are skipped when Xvfb, python-xlib or, for
+    the second part, a window manager is not installed.
+"""
+import os
+import shutil
+import subprocess
+import time
+
+import pytest
+
+import window_backend
+
+# Reparenting window managers the tests run under, with the arguments that start them on the display in DISPLAY
+WINDOW_MANAGERS = [
+    ('openbox', []),
+    ('fluxbox', []),
+    ('icewm', []),
+    ('xfwm4', ['--compositor=off']),
+    ('metacity', ['--replace']),
+    ('twm', []),
+]
+
+
+def startXvfb():
+    """
+        Starts Xvfb on a free display and returns the process and the display name, or skips the test.
+    """
+    if shutil.which('Xvfb') is None:
+        pytest.skip("Xvfb is not installed")
+    pytest.importorskip('Xlib')
+    read_fd, write_fd = os.pipe()
+    process = subprocess.Popen(['Xvfb', '-displayfd', str(write_fd), '-screen', '0', '1280x1024x24', '-nolisten',
+                                'tcp'], pass_fds=(write_fd,), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as displayfd:
+        number = displayfd.readline().strip()
+    if not number:
+        process.kill()
+        pytest.skip("Xvfb did not start")
+    return process, ':' + number
+
+
+def stop(process):
+    process.terminate()
+    process.wait()
+
+
+def waitFor(condition, timeout=5.0):
+    """
+        Waits until condition() is true and returns its last result.
+    """
+    end = time.time() + timeout
+    while time.time() < end:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+
+@pytest.fixture(scope='module')
+def display_name():
+    process, name = startXvfb()
+    yield name
+    stop(process)
+
+
+@pytest.fixture
+def other(display_name):
+    """
+        Connection of another program, which creates the windows and moves them like the user would.
+    """
+    import Xlib.display
+    display = Xlib.display.Display(display_name)
+    yield display
+    display.close()
+
+
+def createWindow(display, x, y, width, height, border=0):
+    """
+        Creates a top level window, maps it and lists it in _NET_CLIENT_LIST_STACKING like a window manager would.
+    """
+    import Xlib.X
+    screen = display.screen()
+    window = screen.root.create_window(x, y, width, height, border, screen.root_depth)
+    window.map()
+    stacking = display.intern_atom('_NET_CLIENT_LIST_STACKING')
+    window_atom = display.intern_atom('WINDOW')
+    screen.root.change_property(stacking, window_atom, 32, [window.id], Xlib.X.PropModeReplace)
+    display.sync()
+    return window
+
+
+def test_window_is_read_and_moved(display_name, other):
+    window = createWindow(other, 100, 100, 400, 300, border=2)
+    backend = window_backend.X11Backend(display_name)
+    assert backend.stackingOrder() == [window.id]
+    assert backend.frame(window.id) == window.id
+    rect = backend.windowRect(window.id)
+    assert rect == (100, 100, 504, 404)
+    # Reading the rectangle and moving the window to it, like getOffset and moveWin32Gui do, must not move it
+    for _ in range(10):
+        left, top, right, bottom = backend.windowRect(window.id)
+        backend.moveWindow(window.id, left, top, right - left, bottom - top)
+        backend.display.sync()
+    assert backend.windowRect(window.id) == rect
+    backend.moveWindow(window.id, 150, 130, 404, 304)
+    backend.display.sync()
+    assert backend.windowRect(window.id) == (150, 130, 554, 434)
+    geometry = window.get_geometry()
+    assert (geometry.width, geometry.height) == (400, 300)
+    assert backend.windowAt(160, 140) == window.id
+    assert backend.windowAt(90, 140) is None
+    backend.display.close()
+
+
+def test_own_moves_are_not_external_changes(display_name, other):
+    window = createWindow(other, 100, 100, 400, 300)
+    backend = window_backend.X11Backend(display_name, batch=True)
+    cache = window_backend.WindowGeometryCache(backend, ttl=None)
+    changes = []
+
+    def changed(hwnd):
+        changes.append(hwnd)
+        cache.invalidate(hwnd)
+
+    backend.setChangeCallback(changed)
+    left, top, right, bottom = cache.rect(window.id)
+    # Several batched moves before the events are read, every echo has to be recognized
+    for ii in range(1, 11):
+        cache.moveWindow(window.id, left + ii, top, right - left, bottom - top)
+        backend.flush()
+    backend.display.sync()
+    assert cache.rect(window.id) == (left + 10, top, right + 10, bottom)
+    assert changes == []
+    assert backend.windowRect(window.id) == (left + 10, top, right + 10, bottom)
+
+    # A move by another program reaches the cache through its own lookup, without a WindowIndex
+    window.configure(x=300, y=200)
+    other.sync()
+    backend.display.sync()
+    assert cache.rect(window.id) == (300, 200, 300 + right - left, 200 + bottom - top)
+    assert changes == [window.id]
+    backend.display.close()
+
+
+def test_layout_events(display_name, other):
+    window = createWindow(other, 100, 100, 400, 300)
+    backend = window_backend.X11Backend(display_name)
+    events = []
+    backend.setEventCallback(events.append)
+    backend.windowRect(window.id)
+    backend.display.sync()
+    window.configure(x=50, y=60)
+    other.sync()
+    backend.display.sync()
+    backend.pollEvents()
+    moves = [event for event in events if event.kind == window_backend.WINDOW_MOVED]
+    assert moves == [window_backend.WindowEvent(window_backend.WINDOW_MOVED, window.id, (50, 60, 450, 360))]
+    window.destroy()
+    other.sync()
+    backend.display.sync()
+    backend.pollEvents()
+    assert events[-1] == window_backend.WindowEvent(window_backend.WINDOW_REMOVED, window.id, None)
+    assert window.id not in backend.frames
+    backend.display.close()
+
+
+@pytest.mark.parametrize('manager, arguments', WINDOW_MANAGERS, ids=[name for name, _ in WINDOW_MANAGERS])
+def test_moves_under_window_manager(manager, arguments):
+    if shutil.which(manager) is None:
+        pytest.skip("%s is not installed" % manager)
+    import Xlib.display
+    import Xlib.X
+    import Xlib.Xutil
+    server, name = startXvfb()
+    environment = dict(os.environ, DISPLAY=name)
+    process = subprocess.Popen([manager] + arguments, env=environment, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+    try:
+        other = Xlib.display.Display(name)
+        screen = other.screen()
+        window = screen.root.create_window(100, 100, 400, 300, 0, screen.root_depth)
+        # A position given by the user, so the manager places the window without asking
+        window.set_wm_normal_hints(flags=Xlib.Xutil.USPosition | Xlib.Xutil.USSize | Xlib.Xutil.PWinGravity,
+                                   win_gravity=Xlib.X.NorthWestGravity)
+        window.set_wm_name('x11 backend test')
+        window.map()
+        other.sync()
+
+        def reparented():
+            return window.query_tree().parent.id != screen.root.id
+
+        # The manager may still be starting, it reparents the window once it manages it
+        assert waitFor(reparented, timeout=10.0), "%s did not reparent the window" % manager
+        backend = window_backend.X11Backend(name)
+        assert backend.frame(window.id) != window.id
+        previous = [None]
+
+        def settled():
+            rect = backend.windowRect(window.id)
+            stable = rect == previous[0]
+            previous[0] = rect
+            return stable
+
+        assert waitFor(settled)
+        rect = previous[0]
+        width = rect[2] - rect[0]
+        height = rect[3] - rect[1]
+
+        # Reading the rectangle and moving the window to it must not move it by the size of the title bar
+        for _ in range(5):
+            left, top, right, bottom = backend.windowRect(window.id)
+            backend.moveWindow(window.id, left, top, right - left, bottom - top)
+            backend.display.sync()
+            time.sleep(0.1)
+        assert backend.windowRect(window.id) == rect
+
+        # The drag has to reach the window
+        target = (rect[0] + 50, rect[1] + 40, rect[2] + 50, rect[3] + 40)
+        backend.moveWindow(window.id, target[0], target[1], width, height)
+        assert waitFor(lambda: backend.windowRect(window.id) == target), (
+            "%s put the window at %r instead of %r" % (manager, backend.windowRect(window.id), target))
+        geometry = window.get_geometry()
+        assert (geometry.width, geometry.height) == (400, 300)
+        backend.display.close()
+        other.close()
+    finally:
+        stop(process)
+        stop(server)
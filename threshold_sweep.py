@@ -0,0 +1,319 @@
+"""
+Description:
+    Offline tuning of the fist classifier. gesture_kernel.fistFromAngles calls a hand a fist when the mean knuckle
+    angle of the index, middle and ring finger is above a threshold, 1.3 rad, and the listener only reports a fist
+    when enough of the votes of the last frames agree. Both values were tuned by hand. This tool evaluates a grid of
+    thresholds and vote windows on labelled recordings at once: the raw decisions of all thresholds are one broadcast
+    comparison, the votes of every window are differences of one cumulative sum, and the metrics of all combinations
+    are reductions over the frame axis. It reports per user
+        precision - Fraction of the frames classified as a fist that are labelled as a fist
+        recall    - Fraction of the frames labelled as a fist that are classified as a fist
+        latency   - Mean time in ms from the start of a labelled fist until it is first classified as a fist
+        detected  - Fraction of the labelled fists that are classified as a fist at some point
+    The recordings are .npz files with
+        angles     - Knuckle angles (N, 5), or all inter bone angles (N, 5, 3), see gesture_kernel.boneAngles
+        labels     - Boolean ground truth (N,), True while the user makes a fist
+        timestamps - Optional Leap timestamps (N,) in microseconds, otherwise frames are assumed to come at --rate
+        user       - Optional user name, otherwise the name of the directory the file is in
+    The export command creates them from a leap_recorder recording and a CSV file of start,end timestamps of the fists.
+    Files are evaluated in parallel by a pool of processes, and the threshold grid is split in blocks so the memory
+    stays below --memory-mb per process.
+    An example of how to use it:
+            python threshold_sweep.py export session.leap fists.csv alice/session.npz
+            python threshold_sweep.py sweep recordings/*/*.npz --thresholds 0.8 2.0 241 --windows 1 15 --out sweep
+"""
+
+import os
+import csv
+import multiprocessing
+import numpy as np
+
+import gesture_kernel
+
+WINDOW_RULES = ('majority', 'listener')
+METRICS = ('precision', 'recall', 'f1', 'latency_ms', 'detected')
+
+
+def requiredVotes(windows, rule='majority'):
+    """
+        Returns the number of fist votes needed in each window size. 'majority' needs more than half of the votes,
+        'listener' more than ceil(window / 2), i.e. 4 of 5, like the enter votes of the fist in gesture_reader.
+    """
+    windows = np.asarray(windows)
+    if rule == 'majority':
+        return windows // 2 + 1
+    if rule == 'listener':
+        return (windows + 1) // 2 + 1
+    raise ValueError("Unknown rule %r, use one of %s" % (rule, ', '.join(WINDOW_RULES)))
+
+
+def exitVotes(windows, rule='majority'):
+    """
+        Returns the number of fist votes at or below which a fist ends in each window size. 'majority' has no
+        hysteresis, a fist ends as soon as it has fewer than requiredVotes. 'listener' ends it at a fifth of the votes,
+        i.e. 1 of 5, like the exit votes of the fist in gesture_reader. Between the two the previous state is kept.
+    """
+    windows = np.asarray(windows)
+    if rule == 'listener':
+        return np.minimum(windows // 5, requiredVotes(windows, rule) - 1)
+    return requiredVotes(windows, rule) - 1
+
+
+def loadRecording(path, rate=110.0):
+    """
+        Loads a labelled recording and returns the mean knuckle angle of the fist fingers, the labels, the timestamps
+        in microseconds and the user. Frames without a hand, i.e. with NaN angles, are dropped, as they do not vote in
+        the listener either.
+    """
+    data = np.load(path)
+    angles = data['angles']
+    if angles.ndim == 3:
+        angles = angles[..., 0]
+    mean_angle = angles[:, gesture_kernel.FIST_FINGERS].mean(axis=1)
+    labels = data['labels'].astype(bool)
+    if 'timestamps' in data.files:
+        timestamps = data['timestamps'].astype(np.int64)
+    else:
+        timestamps = (np.arange(len(labels)) * (1e6 / rate)).astype(np.int64)
+    if 'user' in data.files:
+        user = str(data['user'])
+    else:
+        user = os.path.basename(os.path.dirname(os.path.abspath(path)))
+    valid = ~np.isnan(mean_angle)
+    return mean_angle[valid], labels[valid], timestamps[valid], user
+
+
+def fistSegments(labels):
+    """
+        Returns the start and stop index of every run of True labels.
+    """
+    edges = np.diff(np.concatenate(([False], labels, [False])).astype(np.int8))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def evaluate(mean_angle, labels, timestamps, thresholds, windows, rule='majority', memory_mb=256):
+    """
+        Evaluates every combination of threshold and vote window on one recording.
+            input:
+                mean_angle - Mean knuckle angle of the fist fingers per frame (N,)
+                labels - Ground truth per frame (N,)
+                timestamps - Frame timestamps in microseconds (N,)
+                thresholds - Fist thresholds in radians (T,)
+                windows - Vote window sizes in frames (W,)
+                rule - See requiredVotes and exitVotes. The minimum dwell times of debounce.Debouncer are not
+                       modelled, the live listener does not use them, and neither is the end of a fist when the hand
+                       is lost, as frames without a hand are dropped by loadRecording
+                memory_mb - Approximate memory used for the temporaries
+            return:
+                Dictionary of (W, T) count arrays: tp, fp, fn, onsets, detected and latency_sum in microseconds. They
+                can be summed over recordings before the metrics are computed with metrics()
+    """
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    windows = np.asarray(windows, dtype=np.intp)
+    needed = requiredVotes(windows, rule)
+    exits = exitVotes(windows, rule)
+    hysteresis = bool(np.any(exits < needed - 1))
+    n = len(labels)
+    shape = (len(windows), len(thresholds))
+    counts = dict((name, np.zeros(shape, dtype=np.int64)) for name in ('tp', 'fp', 'fn', 'onsets', 'detected'))
+    counts['latency_sum'] = np.zeros(shape)
+    if n == 0:
+        return counts
+    starts, stops = fistSegments(labels)
+    counts['onsets'][:] = len(starts)
+
+    # Index range of the votes of every window at every frame, shorter at the start like the live listener
+    high = np.arange(1, n + 1)
+    low = np.maximum(high[np.newaxis, :] - windows[:, np.newaxis], 0)  # (W, N)
+    positives = labels.sum()
+    index = np.arange(n, dtype=np.int32)
+
+    # About 4 arrays of (block, W, N) 4 byte values are alive at once, 6 with hysteresis
+    block = max(1, int(memory_mb * 2 ** 20 // ((24 if hysteresis else 16) * len(windows) * (n + 1))))
+    for first in range(0, len(thresholds), block):
+        block_thresholds = thresholds[first:first + block]
+        votes = mean_angle[np.newaxis, :] > block_thresholds[:, np.newaxis]  # (B, N)
+        cumulative = np.zeros((len(block_thresholds), n + 1), dtype=np.int32)
+        np.cumsum(votes, axis=1, out=cumulative[:, 1:])
+        window_votes = cumulative[:, np.newaxis, high] - cumulative[:, low]  # (B, W, N)
+        fist = window_votes >= needed[np.newaxis, :, np.newaxis]
+        if hysteresis:
+            # A fist lasts until the votes drop to the exit votes, so every frame takes the state of the last frame
+            # at or before it that entered or left the fist, and frames before the first one are not a fist
+            decided = fist | (window_votes <= exits[np.newaxis, :, np.newaxis])
+            last = np.maximum.accumulate(np.where(decided, index, -1), axis=2)
+            fist = np.take_along_axis(fist, np.maximum(last, 0), axis=2) & (last >= 0)
+            del decided, last
+        del window_votes
+
+        tp = np.count_nonzero(fist & labels, axis=2)
+        predicted = np.count_nonzero(fist, axis=2)
+        columns = slice(first, first + len(block_thresholds))
+        counts['tp'][:, columns] = tp.T
+        counts['fp'][:, columns] = (predicted - tp).T
+        counts['fn'][:, columns] = (positives - tp).T
+
+        if len(starts):
+            # Index of the next frame classified as a fist at or after every frame
+            next_fist = np.where(fist, index, n)
+            next_fist = np.minimum.accumulate(next_fist[..., ::-1], axis=2)[..., ::-1]
+            first_fist = next_fist[..., starts]  # (B, W, S)
+            hit = first_fist < stops
+            delay = timestamps[np.minimum(first_fist, n - 1)] - timestamps[starts]
+            counts['detected'][:, columns] = hit.sum(axis=2).T
+            counts['latency_sum'][:, columns] = np.where(hit, delay, 0).sum(axis=2).T
+    return counts
+
+
+def metrics(counts):
+    """
+        Returns the precision, recall, f1, latency_ms and detected (W, T) arrays of summed counts from evaluate.
+    """
+    tp = counts['tp'].astype(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        precision = tp / (tp + counts['fp'])
+        recall = tp / (tp + counts['fn'])
+        f1 = 2 * precision * recall / (precision + recall)
+        latency_ms = counts['latency_sum'] / counts['detected'] * 1e-3
+        detected = counts['detected'] / counts['onsets'].astype(np.float64)
+    return {'precision': precision, 'recall': recall, 'f1': f1, 'latency_ms': latency_ms, 'detected': detected}
+
+
+def evaluateFile(job):
+    """
+        Pool worker evaluating one recording. Returns the user and the counts.
+    """
+    path, thresholds, windows, rule, rate, memory_mb = job
+    mean_angle, labels, timestamps, user = loadRecording(path, rate)
+    return user, evaluate(mean_angle, labels, timestamps, thresholds, windows, rule, memory_mb)
+
+
+def sweep(paths, thresholds, windows, rule='majority', rate=110.0, processes=None, memory_mb=256):
+    """
+        Evaluates all recordings in a pool of processes and returns a dictionary from user to the summed counts.
+    """
+    jobs = [(path, thresholds, windows, rule, rate, memory_mb) for path in paths]
+    users = {}
+    pool = multiprocessing.Pool(processes)
+    try:
+        for user, counts in pool.imap_unordered(evaluateFile, jobs):
+            if user not in users:
+                users[user] = counts
+            else:
+                for name in counts:
+                    users[user][name] += counts[name]
+    finally:
+        pool.close()
+        pool.join()
+    return users
+
+
+def writeResults(users, thresholds, windows, out_dir):
+    """
+        Writes the curves of every user to <out_dir>/<user>.npz and all combinations to <out_dir>/sweep.csv.
+    """
+    if not os.path.isdir(out_dir):
+        os.makedirs(out_dir)
+    with open(os.path.join(out_dir, 'sweep.csv'), 'w') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(('user', 'window', 'threshold') + METRICS)
+        for user in sorted(users):
+            curves = metrics(users[user])
+            np.savez(os.path.join(out_dir, user + '.npz'), thresholds=thresholds, windows=windows, **curves)
+            for ww, window in enumerate(windows):
+                for tt, threshold in enumerate(thresholds):
+                    writer.writerow([user, window, '%.4f' % threshold] +
+                                    ['%.4f' % curves[name][ww, tt] for name in METRICS])
+
+
+def bestCombination(counts, thresholds, windows):
+    """
+        Returns the window, threshold and metrics of the combination with the highest f1, the lowest latency first.
+    """
+    curves = metrics(counts)
+    f1 = np.nan_to_num(curves['f1'])
+    latency = np.where(np.isnan(curves['latency_ms']), np.inf, curves['latency_ms'])
+    order = np.lexsort((latency.ravel(), -f1.ravel()))
+    ww, tt = np.unravel_index(order[0], f1.shape)
+    return windows[ww], thresholds[tt], dict((name, curves[name][ww, tt]) for name in METRICS)
+
+
+def readFistIntervals(path):
+    """
+        Reads a CSV file with one start,end Leap timestamp in microseconds per labelled fist.
+    """
+    intervals = []
+    with open(path) as csv_file:
+        for row in csv.reader(csv_file):
+            if row and not row[0].startswith('#'):
+                intervals.append((int(row[0]), int(row[1])))
+    return intervals
+
+
+def exportRecording(recording, labels_path, out_path, user=None):
+    """
+        Computes the knuckle angles of the first hand in every frame of a leap_recorder recording, labels the frames
+        inside the intervals of labels_path as fists and saves them as a recording for the sweep. Needs LeapPython.
+    """
+    import leap_recorder
+    import leap_fast
+    import hand_snapshot
+    controller = leap_recorder.ReplayController(recording, realtime=False)
+    snapshots = hand_snapshot.emptySnapshot(len(controller))
+    n = 0
+    while controller.step():
+        leap_fast.snapshotFrame(controller.frame(), snapshots[n])
+        n += 1
+    controller.close()
+    snapshots = snapshots[:n]
+    angles = gesture_kernel.boneAngles(snapshots['hands']['bone_directions'][:, 0])[..., 0]
+    angles[snapshots['hand_count'] == 0] = np.nan
+    timestamps = snapshots['timestamp']
+    labels = np.zeros(n, dtype=bool)
+    for start, end in readFistIntervals(labels_path):
+        labels |= (timestamps >= start) & (timestamps < end)
+    extra = {} if user is None else {'user': user}
+    np.savez_compressed(out_path, angles=angles, labels=labels, timestamps=timestamps, **extra)
+    return n
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Sweep the fist threshold and vote window on labelled recordings.')
+    commands = parser.add_subparsers(dest='command')
+    sweep_parser = commands.add_parser('sweep', help='Evaluate a grid of thresholds and vote windows')
+    sweep_parser.add_argument('paths', nargs='+', help='Labelled .npz recordings')
+    sweep_parser.add_argument('--thresholds', nargs=3, type=float, default=(0.8, 2.0, 241),
+                              metavar=('FIRST', 'LAST', 'COUNT'), help='Threshold grid in radians')
+    sweep_parser.add_argument('--windows', nargs=2, type=int, default=(1, 15), metavar=('FIRST', 'LAST'),
+                              help='Vote window sizes in frames')
+    sweep_parser.add_argument('--rule', choices=WINDOW_RULES, default='majority')
+    sweep_parser.add_argument('--rate', type=float, default=110.0,
+                              help='Frame rate used for recordings without timestamps')
+    sweep_parser.add_argument('--processes', type=int, default=None, help='Number of processes, default all cores')
+    sweep_parser.add_argument('--memory-mb', type=int, default=256, help='Memory for temporaries per process')
+    sweep_parser.add_argument('--out', default='sweep', help='Output directory')
+    export_parser = commands.add_parser('export', help='Create a labelled recording from a leap_recorder file')
+    export_parser.add_argument('recording')
+    export_parser.add_argument('labels', help='CSV with start,end timestamps in microseconds of every fist')
+    export_parser.add_argument('out')
+    export_parser.add_argument('--user', default=None)
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        n = exportRecording(args.recording, args.labels, args.out, args.user)
+        print("Exported %d frames to %s" % (n, args.out))
+        return
+    thresholds = np.linspace(args.thresholds[0], args.thresholds[1], int(args.thresholds[2]))
+    windows = np.arange(args.windows[0], args.windows[1] + 1)
+    users = sweep(args.paths, thresholds, windows, args.rule, args.rate, args.processes, args.memory_mb)
+    writeResults(users, thresholds, windows, args.out)
+    for user in sorted(users):
+        window, threshold, best = bestCombination(users[user], thresholds, windows)
+        print("%-16s window %2d threshold %.3f  precision %.3f recall %.3f f1 %.3f latency %.1f ms detected %.3f" % (
+            user, window, threshold, best['precision'], best['recall'], best['f1'], best['latency_ms'],
+            best['detected']))
+
+
+if __name__ == "__main__":
+    main()
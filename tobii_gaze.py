@@ -0,0 +1,259 @@
+"""
+Description:
+    Reads gaze from a tobii eye tracker by subscribing to its gaze data stream with tobii_research, instead of
+    polling PyGaze's eyetracker.sample() which only returns the newest point. The tobii SDK calls back on its own
+    thread for every sample, and the sample is written into a bounded single producer / single consumer ring buffer
+    with its device and system timestamps. The control loop drains everything that arrived since its last read.
+    ReplayEyeTracker plays recorded gaze through the same callback path, so the source can be used without a device.
+    An example of how to use it:
+            gaze_source = TobiiGazeSource(avaliableEyeTrackers()[0], screen_size=(1600, 900))
+            gaze_source.subscribe()
+            while True:
+                gaze_source.drainInto(gaze_array)   # gaze_buffer.GazeRingBuffer
+"""
+
+import math
+import threading
+import time
+import numpy as np
+
+try:
+    import tobii_research as tr
+    GAZE_DATA = tr.EYETRACKER_GAZE_DATA
+except ImportError:
+    tr = None
+    GAZE_DATA = 'gaze_data'  # Value of tr.EYETRACKER_GAZE_DATA
+
+# Columns of the samples returned by GazeSampleQueue.drain
+X, Y, DEVICE_TIME, SYSTEM_TIME = range(4)
+
+
+def systemTimeStamp():
+    """
+        Returns the current tobii system time stamp in microseconds, the clock of system_time_stamp in the gaze data.
+        Falls back to the host clock if tobii_research is not installed.
+    """
+    if tr is not None:
+        return tr.get_system_time_stamp()
+    return int(time.time() * 1e6)
+
+
+def pygazeCaptureTime(eyetracker):
+    """
+        Returns the capture time on the host clock in seconds of the sample that a PyGaze tobii eye tracker returns
+        from sample(), from the system_time_stamp of the newest gaze data it keeps. Returns None if the eye tracker
+        does not keep the tobii gaze data, then the capture time is not known.
+    """
+    gaze = getattr(eyetracker, 'gaze', None)
+    if not gaze or not isinstance(gaze[-1], dict) or 'system_time_stamp' not in gaze[-1]:
+        return None
+    return gaze[-1]['system_time_stamp'] * 1e-6 + time.time() - systemTimeStamp() * 1e-6
+
+
+class GazeSampleQueue(object):
+    """
+        Bounded ring buffer for one producer thread and one consumer thread. The producer never waits: when the
+        consumer falls more than capacity samples behind the oldest samples are overwritten and counted as dropped.
+        No locks are used, the write and read counters only ever grow and each is only written by one side.
+    """
+
+    def __init__(self, capacity=1024):
+        self.capacity = int(capacity)
+        self.samples = np.zeros((self.capacity, 4))
+        self.write_count = 0  # Only written by the producer
+        self.read_count = 0  # Only written by the consumer
+        self.dropped = 0  # Only written by the consumer
+
+    def __len__(self):
+        return min(self.write_count - self.read_count, self.capacity)
+
+    def push(self, x, y, device_time, system_time):
+        """
+            Adds a sample. Called from the producer thread.
+        """
+        row = self.samples[self.write_count % self.capacity]
+        row[X] = x
+        row[Y] = y
+        row[DEVICE_TIME] = device_time
+        row[SYSTEM_TIME] = system_time
+        # Publishing the sample is the last step, so the consumer never sees a half written row as new
+        self.write_count += 1
+
+    def drain(self):
+        """
+            Returns an (n, 4) array with all samples since the last drain, oldest first, with the columns X, Y,
+            DEVICE_TIME and SYSTEM_TIME. Called from the consumer thread.
+        """
+        start = self.read_count
+        stop = self.write_count
+        if stop - start > self.capacity:
+            start = stop - self.capacity
+        first = start % self.capacity
+        n = stop - start
+        if first + n <= self.capacity:
+            drained = self.samples[first:first + n].copy()
+        else:
+            drained = np.concatenate((self.samples[first:], self.samples[:first + n - self.capacity]))
+        # Rows the producer may have overwritten while they were copied are not trusted, including the row it may be
+        # writing right now
+        overwritten = min(self.write_count - self.capacity + 1 - start, n)
+        if overwritten > 0:
+            drained = drained[overwritten:]
+            start += overwritten
+        self.dropped += start - self.read_count
+        self.read_count = stop
+        return drained
+
+
+class TobiiGazeSource(object):
+    """
+        Subscribes to the gaze data of a tobii_research eye tracker and converts every sample to screen pixels.
+    """
+
+    def __init__(self, eyetracker, screen_size=(1600, 900), capacity=1024):
+        """
+            input:
+                eyetracker - tobii_research.EyeTracker, e.g. from avaliableEyeTrackers(), or a ReplayEyeTracker
+                screen_size - Resolution in pixels the normalized gaze points are scaled to
+                capacity - Number of samples kept for the consumer, see GazeSampleQueue
+        """
+        self.eyetracker = eyetracker
+        self.screen_size = screen_size
+        self.queue = GazeSampleQueue(capacity)
+        self.invalid = 0
+        self.subscribed = False
+        self.latest = None
+        # Converts tobii system time stamps to host time in seconds, so gaze can be compared with other sources
+        self.clock_offset = time.time() - systemTimeStamp() * 1e-6
+
+    def gazeDataCallback(self, gaze_data):
+        """
+            Called by tobii_research for every sample. Uses the mean of the eyes with a valid gaze point.
+        """
+        x = 0.0
+        y = 0.0
+        n_valid = 0
+        for eye in ('left', 'right'):
+            if gaze_data[eye + '_gaze_point_validity']:
+                point = gaze_data[eye + '_gaze_point_on_display_area']
+                if not (math.isnan(point[0]) or math.isnan(point[1])):
+                    x += point[0]
+                    y += point[1]
+                    n_valid += 1
+        if n_valid == 0:
+            self.invalid += 1
+            return
+        x = x / n_valid * self.screen_size[0]
+        y = y / n_valid * self.screen_size[1]
+        self.latest = (x, y)
+        self.queue.push(x, y, gaze_data['device_time_stamp'], gaze_data['system_time_stamp'])
+
+    def subscribe(self):
+        self.eyetracker.subscribe_to(GAZE_DATA, self.gazeDataCallback, as_dictionary=True)
+        self.subscribed = True
+
+    def unsubscribe(self):
+        if self.subscribed:
+            self.eyetracker.unsubscribe_from(GAZE_DATA, self.gazeDataCallback)
+            self.subscribed = False
+
+    def drain(self):
+        """
+            Returns all samples since the last drain, see GazeSampleQueue.drain.
+        """
+        return self.queue.drain()
+
+    def drainInto(self, gaze_array):
+        """
+            Pushes all samples since the last drain into a gaze_buffer.GazeRingBuffer and returns how many there were.
+            The samples are timestamped with their capture time on the host clock in seconds, like time.time().
+        """
+        samples = self.queue.drain()
+        for sample in samples:
+            gaze_array.push(sample, sample[SYSTEM_TIME] * 1e-6 + self.clock_offset)
+        return len(samples)
+
+    def sample(self):
+        """
+            Returns the newest (x, y) gaze position like PyGaze's eyetracker.sample(), or None before the first sample.
+        """
+        return self.latest
+
+
+class ReplayEyeTracker(object):
+    """
+        Stand-in for a tobii_research.EyeTracker that plays recorded gaze to the gaze data subscribers from its own
+        thread, like the tobii SDK does.
+    """
+
+    def __init__(self, trace, realtime=True):
+        """
+            input:
+                trace - Array shaped (n, 3) of normalized x, y on the display area and device time stamps in
+                        microseconds. NaN positions are sent as invalid samples
+                realtime - If True samples are sent at the recorded pace, otherwise as fast as possible
+        """
+        self.trace = np.asarray(trace, dtype=np.float64)
+        self.realtime = realtime
+        self.callbacks = []
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.address = 'replay'
+        self.model = 'ReplayEyeTracker'
+        self.device_name = ''
+        self.serial_number = ''
+
+    def gazeData(self, row):
+        valid = not (math.isnan(row[0]) or math.isnan(row[1]))
+        point = (row[0], row[1])
+        device_time = int(row[2])
+        return {
+            'left_gaze_point_on_display_area': point,
+            'right_gaze_point_on_display_area': point,
+            'left_gaze_point_validity': int(valid),
+            'right_gaze_point_validity': int(valid),
+            'device_time_stamp': device_time,
+            'system_time_stamp': systemTimeStamp() if self.realtime else device_time,
+        }
+
+    def subscribe_to(self, subscription_type, callback, as_dictionary=False):
+        self.callbacks.append(callback)
+        if self.thread is None:
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self.play)
+            self.thread.daemon = True
+            self.thread.start()
+
+    def unsubscribe_from(self, subscription_type, callback=None):
+        if callback is None:
+            del self.callbacks[:]
+        elif callback in self.callbacks:
+            self.callbacks.remove(callback)
+        if not self.callbacks and self.thread is not None:
+            self.stop_event.set()
+            if self.thread is not threading.current_thread():
+                self.thread.join()
+            self.thread = None
+
+    def play(self):
+        if not len(self.trace):
+            return
+        wall_start = time.time()
+        first_time = self.trace[0, 2]
+        for row in self.trace:
+            if self.stop_event.is_set():
+                return
+            if self.realtime:
+                delay = (row[2] - first_time) * 1e-6 - (time.time() - wall_start)
+                if delay > 0:
+                    self.stop_event.wait(delay)
+            gaze_data = self.gazeData(row)
+            for callback in list(self.callbacks):
+                callback(gaze_data)
+
+    def join(self):
+        """
+            Waits until the whole trace has been played.
+        """
+        if self.thread is not None:
+            self.thread.join()
@@ -0,0 +1,553 @@
+"""
+Description:
+    The window system calls used to grab and drag windows, behind a small backend interface, and a cache of window
+    geometry on top of it. getOffset used to call win32gui.GetWindowRect for every move during a drag, although the
+    program is the one moving the window. WindowGeometryCache keeps the rectangle of every window it has seen,
+    updates it locally after each move it makes, and only asks the window system again when the backend reports an
+    external change or the entry is older than a TTL. The cache reads the events of the backend itself, so the
+    change notifications arrive without a WindowIndex on the same backend.
+    Win32Backend wraps win32gui, X11Backend uses python-xlib for Linux, and FakeWindowBackend is a fake window
+    manager that keeps windows in a dictionary so the cache can be used on any platform. defaultBackend picks the one
+    for the current platform. Backends that can watch the window manager report the layout changes as WindowEvents,
+    which keep window_index.WindowIndex up to date.
+    An example of how to use it:
+            windows = defaultBackend()
+            window_cache = WindowGeometryCache(windows, ttl=1.0)
+            hwnd = windows.foregroundWindow()
+            left, top, right, bottom = window_cache.rect(hwnd)
+            window_cache.moveWindow(hwnd, left + 10, top, right - left, bottom - top)
+"""
+
+import collections
+import os
+import sys
+import time
+
+# Kinds of WindowEvent. RESTACKED means the stacking order changed in a way that is not described by the event, the
+# whole layout has to be read again.
+WINDOW_ADDED, WINDOW_REMOVED, WINDOW_MOVED, WINDOW_RAISED, WINDOWS_RESTACKED = range(5)
+
+# Flags of a _NET_MOVERESIZE_WINDOW client message: the gravity in the low byte, which of x, y, width and height are
+# set, and the source of the request, 2 for a pager or other tool acting for the user
+NORTH_WEST_GRAVITY = 1
+MOVE_RESIZE_X, MOVE_RESIZE_Y, MOVE_RESIZE_WIDTH, MOVE_RESIZE_HEIGHT = (1 << 8, 1 << 9, 1 << 10, 1 << 11)
+MOVE_RESIZE_SOURCE_PAGER = 2 << 12
+
+# rect is the new (left, top, right, bottom) rectangle for WINDOW_ADDED and WINDOW_MOVED, otherwise None
+WindowEvent = collections.namedtuple('WindowEvent', ['kind', 'hwnd', 'rect'])
+
+
+class WindowBackend(object):
+    """
+        Interface of the window system. Rectangles are (left, top, right, bottom) in screen pixels, like
+        win32gui.GetWindowRect.
+    """
+    has_events = False  # True if the layout changes are reported to the event callback
+
+    def foregroundWindow(self):
+        """
+            Returns the handle of the window in the foreground.
+        """
+        raise NotImplementedError
+
+    def windowAt(self, x, y):
+        """
+            Returns the handle of the top level window under a screen position, or None.
+        """
+        raise NotImplementedError
+
+    def stackingOrder(self):
+        """
+            Returns the handles of the visible top level windows from the bottom to the top of the stack.
+        """
+        raise NotImplementedError
+
+    def windowRect(self, hwnd):
+        raise NotImplementedError
+
+    def moveWindow(self, hwnd, x, y, width, height):
+        """
+            Moves and resizes a window without changing its place in the stacking order.
+        """
+        raise NotImplementedError
+
+    def flush(self):
+        """
+            Sends moves that the backend has batched up. Backends that send every move right away do nothing.
+        """
+        pass
+
+    def setChangeCallback(self, callback):
+        """
+            Registers callback(hwnd) to be called when a window is moved or resized by someone else. Backends that
+            cannot detect this ignore it and the cache relies on its TTL.
+        """
+        pass
+
+    def setEventCallback(self, callback):
+        """
+            Registers callback(event) to be called with a WindowEvent for every change of the window layout. Backends
+            that cannot watch the window manager ignore it.
+        """
+        pass
+
+    def pollEvents(self):
+        """
+            Reads the pending window system events and calls the callbacks. Backends that call them right away, or
+            have no events, do nothing.
+        """
+        pass
+
+
+class Win32Backend(WindowBackend):
+    """
+        Backend using win32gui. Only works on Windows.
+    """
+
+    def __init__(self):
+        import win32gui
+        self.win32gui = win32gui
+
+    def foregroundWindow(self):
+        return self.win32gui.GetForegroundWindow()
+
+    def windowAt(self, x, y):
+        hwnd = self.win32gui.WindowFromPoint((int(x), int(y)))
+        if not hwnd:
+            return None
+        return self.win32gui.GetAncestor(hwnd, 2)  # GA_ROOT, the top level window of a child control
+
+    def stackingOrder(self):
+        hwnds = []
+        # EnumWindows lists the top level windows from the top to the bottom of the stack
+        self.win32gui.EnumWindows(lambda hwnd, _: hwnds.append(hwnd) if self.win32gui.IsWindowVisible(hwnd) else None,
+                                  None)
+        hwnds.reverse()
+        return hwnds
+
+    def windowRect(self, hwnd):
+        return self.win32gui.GetWindowRect(hwnd)
+
+    def moveWindow(self, hwnd, x, y, width, height):
+        self.win32gui.MoveWindow(hwnd, x, y, width, height, False)
+
+
+class X11Backend(WindowBackend):
+    """
+        Backend for X11 using python-xlib. Window handles are X window ids of the client windows, as listed by the
+        window manager. A reparenting window manager puts every client window into a frame with the title bar, and
+        treats the frame as the window, so rectangles are read from the frame, the top level child of the root window
+        that holds the client. Without a window manager the frame is the window itself. The frame belongs to the
+        window manager, which ignores requests to move it, so a framed window is moved by asking the manager with a
+        _NET_MOVERESIZE_WINDOW message, or with a ConfigureWindow of the client window when the manager does not
+        support it. Both use NorthWestGravity, so the manager puts the top left corner of the frame at the requested
+        position and a rectangle read with windowRect can be moved to without drift. Moves have no stack mode, so
+        unlike win32gui.MoveWindow the window is not raised on every move. With batch=True the moves are only queued,
+        only the newest move of every window is kept, and flush sends them all with a single write to the X server.
+    """
+    has_events = True
+
+    def __init__(self, display_name=None, batch=False):
+        import Xlib.display
+        import Xlib.X
+        import Xlib.protocol.event
+        self.X = Xlib.X
+        self.client_message = Xlib.protocol.event.ClientMessage
+        self.display = Xlib.display.Display(display_name)
+        self.root = self.display.screen().root
+        self.batch = batch
+        self.pending = {}  # X window id -> (x, y, width, height) of a queued move
+        self.frames = {}  # Client window id -> id of its frame
+        self.clients = {}  # Frame id -> client window id
+        self.sizes = {}  # Client window id -> (width, height) of its frame when it was last read or resized
+        self.decorations = {}  # Client window id -> (width, height) the frame adds around the client
+        self.own_moves = {}  # Frame id -> positions of our moves that were not seen in a ConfigureNotify yet
+        self.watched = set()  # Frames selected for StructureNotify
+        self.move_resize = None  # True if the window manager supports _NET_MOVERESIZE_WINDOW, None until checked
+        self.change_callback = None
+        self.event_callback = None
+        self.net_active_window = self.display.intern_atom('_NET_ACTIVE_WINDOW')
+        self.net_client_list_stacking = self.display.intern_atom('_NET_CLIENT_LIST_STACKING')
+        self.net_supported = self.display.intern_atom('_NET_SUPPORTED')
+        self.net_moveresize_window = self.display.intern_atom('_NET_MOVERESIZE_WINDOW')
+        self.event_types = {
+            self.X.MapNotify: WINDOW_ADDED,
+            self.X.UnmapNotify: WINDOW_REMOVED,
+            self.X.DestroyNotify: WINDOW_REMOVED,
+            self.X.ConfigureNotify: WINDOW_MOVED,
+        }
+
+    def window(self, hwnd):
+        return self.display.create_resource_object('window', hwnd)
+
+    def frame(self, hwnd):
+        """
+            Returns the id of the top level window that holds a client window, the frame of a reparenting window
+            manager, or the window itself if it is a child of the root window.
+        """
+        frame = self.frames.get(hwnd)
+        if frame is None:
+            window = self.window(hwnd)
+            while True:
+                parent = window.query_tree().parent
+                if not parent or parent.id == self.root.id:
+                    break
+                window = parent
+            frame = window.id
+            self.frames[hwnd] = frame
+            self.clients[frame] = hwnd
+        return frame
+
+    def forgetWindow(self, window_id):
+        """
+            Drops what is known about a client window or a frame and the window it belongs to, after it was
+            reparented or destroyed.
+        """
+        hwnd = self.clients.get(window_id, window_id)
+        frame = self.frames.pop(hwnd, None)
+        if frame is not None:
+            self.clients.pop(frame, None)
+        self.sizes.pop(hwnd, None)
+        self.decorations.pop(hwnd, None)
+        self.own_moves.pop(window_id, None)
+        self.watched.discard(window_id)
+
+    def foregroundWindow(self):
+        active = self.root.get_full_property(self.net_active_window, self.X.AnyPropertyType)
+        if active is not None and len(active.value) and active.value[0]:
+            return int(active.value[0])
+        return self.display.get_input_focus().focus.id
+
+    def stackingOrder(self):
+        """
+            Returns the ids of the top level windows from the bottom to the top of the stack. Uses the EWMH client
+            list of the window manager, or the children of the root window if there is no window manager.
+        """
+        stacking = self.root.get_full_property(self.net_client_list_stacking, self.X.AnyPropertyType)
+        if stacking is not None:
+            return [int(hwnd) for hwnd in stacking.value]
+        return [child.id for child in self.root.query_tree().children
+                if child.get_attributes().map_state == self.X.IsViewable]
+
+    def windowAt(self, x, y):
+        for hwnd in reversed(self.stackingOrder()):
+            left, top, right, bottom = self.windowRect(hwnd)
+            if left <= x < right and top <= y < bottom:
+                return hwnd
+        return None
+
+    def windowRect(self, hwnd):
+        """
+            Returns the rectangle of the frame of a window, including its border, on the root window.
+        """
+        frame = self.frame(hwnd)
+        geometry = self.window(frame).get_geometry()
+        width = geometry.width + 2 * geometry.border_width
+        height = geometry.height + 2 * geometry.border_width
+        if frame == hwnd:
+            self.decorations[hwnd] = (2 * geometry.border_width, 2 * geometry.border_width)
+        else:
+            client = self.window(hwnd).get_geometry()
+            self.decorations[hwnd] = (width - client.width, height - client.height)
+        self.sizes[hwnd] = (width, height)
+        return (geometry.x, geometry.y, geometry.x + width, geometry.y + height)
+
+    def moveWindow(self, hwnd, x, y, width, height):
+        """
+            Moves the frame of a window to (x, y) on the root window, the top left corner windowRect returns. The
+            window is only resized if width and height differ from the size of the frame.
+        """
+        self.pending[hwnd] = (int(x), int(y), int(width), int(height))
+        if not self.batch:
+            self.flush()
+
+    def supportsMoveResize(self):
+        """
+            Returns True if the window manager lists _NET_MOVERESIZE_WINDOW in _NET_SUPPORTED. Checked once.
+        """
+        if self.move_resize is None:
+            supported = self.root.get_full_property(self.net_supported, self.X.AnyPropertyType)
+            self.move_resize = supported is not None and self.net_moveresize_window in supported.value
+        return self.move_resize
+
+    def sendMoveResize(self, hwnd, x, y, client_size):
+        """
+            Asks the window manager to put the frame of a client window at (x, y) and, if client_size is given, to
+            resize the client window to it.
+        """
+        flags = NORTH_WEST_GRAVITY | MOVE_RESIZE_X | MOVE_RESIZE_Y | MOVE_RESIZE_SOURCE_PAGER
+        width = height = 0
+        if client_size:
+            flags |= MOVE_RESIZE_WIDTH | MOVE_RESIZE_HEIGHT
+            width, height = client_size['width'], client_size['height']
+        # The fields are CARD32, negative positions are sent in two's complement
+        data = [flags, x & 0xffffffff, y & 0xffffffff, width, height]
+        message = self.client_message(window=self.window(hwnd), client_type=self.net_moveresize_window,
+                                      data=(32, data))
+        self.root.send_event(message, event_mask=self.X.SubstructureRedirectMask | self.X.SubstructureNotifyMask)
+
+    def flush(self):
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, {}
+        for hwnd, (x, y, width, height) in pending.items():
+            frame = self.frame(hwnd)
+            if frame not in self.watched:
+                self.watch(frame)
+            if hwnd not in self.sizes:
+                self.windowRect(hwnd)
+            client_size = {}
+            if self.sizes[hwnd] != (width, height):
+                extra_width, extra_height = self.decorations[hwnd]
+                client_size = dict(width=max(1, width - extra_width), height=max(1, height - extra_height))
+                self.sizes[hwnd] = (width, height)
+            if frame != hwnd and self.supportsMoveResize():
+                self.sendMoveResize(hwnd, x, y, client_size)
+            else:
+                # Without a window manager this moves the window itself. A reparenting manager gets it as a
+                # ConfigureRequest of its client and moves the frame there
+                self.window(hwnd).configure(x=x, y=y, **client_size)
+            self.own_moves.setdefault(frame, collections.deque(maxlen=64)).append((x, y))
+        self.display.flush()
+
+    def setChangeCallback(self, callback):
+        """
+            Registers callback(hwnd) for ConfigureNotify events of windows moved by others. The events are read by
+            pollEvents, which has to be called regularly, WindowGeometryCache does it before every lookup. Windows are
+            watched once they have been moved through this backend.
+        """
+        self.change_callback = callback
+
+    def setEventCallback(self, callback):
+        """
+            Registers callback(event) for the layout changes of the top level windows. Mapping, unmapping, destroying
+            and configuring the children of the root window are reported as WindowEvents, and a change of the
+            stacking order kept by the window manager as WINDOWS_RESTACKED. Frames whose client window is known are
+            reported as the client. Without a window manager a window that is raised is only reported as moved. The
+            events are read by pollEvents.
+        """
+        self.event_callback = callback
+        self.root.change_attributes(event_mask=self.X.SubstructureNotifyMask | self.X.PropertyChangeMask)
+
+    def watch(self, frame):
+        self.window(frame).change_attributes(event_mask=self.X.StructureNotifyMask)
+        self.watched.add(frame)
+
+    def layoutEvent(self, event):
+        """
+            Converts an X event on the root window to a WindowEvent, or returns None.
+        """
+        if event.type == self.X.PropertyNotify:
+            if event.atom == self.net_client_list_stacking:
+                return WindowEvent(WINDOWS_RESTACKED, None, None)
+            return None
+        kind = self.event_types.get(event.type)
+        if kind is None:
+            return None
+        frame = event.window.id
+        hwnd = self.clients.get(frame, frame)
+        if kind == WINDOW_MOVED:
+            width = event.width + 2 * event.border_width
+            height = event.height + 2 * event.border_width
+            return WindowEvent(kind, hwnd, (event.x, event.y, event.x + width, event.y + height))
+        if kind == WINDOW_ADDED:
+            return WindowEvent(kind, hwnd, self.windowRect(hwnd))
+        return WindowEvent(kind, hwnd, None)
+
+    def isOwnMove(self, event):
+        """
+            Returns True if a ConfigureNotify of a frame put it where one of our own moves did, and forgets the
+            moves up to that one. Batched moves are told apart by their position, so every echo is recognized.
+        """
+        moves = self.own_moves.get(event.window.id)
+        position = (event.x, event.y)
+        if not moves or position not in moves:
+            return False
+        while moves.popleft() != position:
+            pass
+        return True
+
+    def pollEvents(self):
+        """
+            Handles the queued X events without blocking. Events selected on the root window go to the event
+            callback. The ConfigureNotify events of the watched frames that are not echoes of our own moves go to the
+            change callback, with the client window id.
+        """
+        X = self.X
+        while self.display.pending_events():
+            event = self.display.next_event()
+            on_root = getattr(event, 'event', None) == self.root
+            if on_root or event.type == X.PropertyNotify:
+                if self.event_callback is not None:
+                    layout_event = self.layoutEvent(event)
+                    if layout_event is not None:
+                        self.event_callback(layout_event)
+            elif event.type == X.ConfigureNotify and not self.isOwnMove(event):
+                hwnd = self.clients.get(event.window.id, event.window.id)
+                self.sizes.pop(hwnd, None)
+                if self.change_callback is not None:
+                    self.change_callback(hwnd)
+            # With the root window selected the frame is forgotten at its copy of the event, after it was reported
+            if event.type in (X.DestroyNotify, X.ReparentNotify) and (on_root or self.event_callback is None):
+                self.forgetWindow(event.window.id)
+
+
+class FakeWindowBackend(WindowBackend):
+    """
+        Fake window manager that keeps the windows in a dictionary from handle to rectangle and counts the calls made
+        to it. The stacking order is the order of the handles in stacking, from the bottom to the top. createWindow,
+        destroyWindow, raiseWindow and externalMove change the layout like other programs or the user would, and
+        every change is sent to the event callback right away.
+    """
+    has_events = True
+
+    def __init__(self, rects=None, foreground=None):
+        self.rects = dict(rects or {1: (100, 100, 900, 700)})
+        self.stacking = sorted(self.rects)
+        self.foreground = foreground if foreground is not None else self.stacking[-1]
+        self.calls = {'foregroundWindow': 0, 'windowAt': 0, 'stackingOrder': 0, 'windowRect': 0, 'moveWindow': 0}
+        self.change_callback = None
+        self.event_callback = None
+
+    def foregroundWindow(self):
+        self.calls['foregroundWindow'] += 1
+        return self.foreground
+
+    def windowAt(self, x, y):
+        self.calls['windowAt'] += 1
+        for hwnd in reversed(self.stacking):
+            left, top, right, bottom = self.rects[hwnd]
+            if left <= x < right and top <= y < bottom:
+                return hwnd
+        return None
+
+    def stackingOrder(self):
+        self.calls['stackingOrder'] += 1
+        return list(self.stacking)
+
+    def windowRect(self, hwnd):
+        self.calls['windowRect'] += 1
+        return self.rects[hwnd]
+
+    def moveWindow(self, hwnd, x, y, width, height):
+        self.calls['moveWindow'] += 1
+        self.rects[hwnd] = (x, y, x + width, y + height)
+        self.sendEvent(WINDOW_MOVED, hwnd, self.rects[hwnd])
+
+    def setChangeCallback(self, callback):
+        self.change_callback = callback
+
+    def setEventCallback(self, callback):
+        self.event_callback = callback
+
+    def sendEvent(self, kind, hwnd, rect=None):
+        if self.event_callback is not None:
+            self.event_callback(WindowEvent(kind, hwnd, rect))
+
+    def createWindow(self, hwnd, rect):
+        """
+            Opens a new window on top of the others and gives it the focus.
+        """
+        self.rects[hwnd] = tuple(rect)
+        self.stacking.append(hwnd)
+        self.foreground = hwnd
+        self.sendEvent(WINDOW_ADDED, hwnd, self.rects[hwnd])
+
+    def destroyWindow(self, hwnd):
+        """
+            Closes a window. The focus goes to the window on top.
+        """
+        del self.rects[hwnd]
+        self.stacking.remove(hwnd)
+        if self.foreground == hwnd:
+            self.foreground = self.stacking[-1] if self.stacking else None
+        self.sendEvent(WINDOW_REMOVED, hwnd)
+
+    def raiseWindow(self, hwnd):
+        """
+            Puts a window on top of the others and gives it the focus, like clicking on it.
+        """
+        self.stacking.remove(hwnd)
+        self.stacking.append(hwnd)
+        self.foreground = hwnd
+        self.sendEvent(WINDOW_RAISED, hwnd)
+
+    def externalMove(self, hwnd, rect):
+        """
+            Moves a window as if another program or the user did it, and sends the change notification.
+        """
+        if hwnd not in self.stacking:
+            self.createWindow(hwnd, rect)
+        self.rects[hwnd] = tuple(rect)
+        if self.change_callback is not None:
+            self.change_callback(hwnd)
+        self.sendEvent(WINDOW_MOVED, hwnd, self.rects[hwnd])
+
+
+def defaultBackend():
+    """
+        Returns the backend for the platform this runs on: win32gui if it can be imported, otherwise X11 if there is a
+        DISPLAY.
+    """
+    try:
+        return Win32Backend()
+    except ImportError:
+        if not os.environ.get('DISPLAY'):
+            raise RuntimeError("No window backend for platform %s without an X11 DISPLAY" % sys.platform)
+    return X11Backend()
+
+
+class WindowGeometryCache(object):
+    """
+        Cache of window rectangles keyed by window handle.
+    """
+
+    def __init__(self, backend, ttl=1.0, clock=time.time):
+        """
+            input:
+                backend - WindowBackend used to read and move windows
+                ttl - Seconds after which a cached rectangle is read from the window system again. None never expires
+                clock - Function returning the time in seconds
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = {}  # hwnd -> (rect, time it was read from the window system)
+        self.hits = 0
+        self.misses = 0
+        backend.setChangeCallback(self.invalidate)
+
+    def rect(self, hwnd):
+        """
+            Returns the (left, top, right, bottom) rectangle of a window. The pending events of the backend are read
+            first, so external changes it reports invalidate the entry before it is used.
+        """
+        self.backend.pollEvents()
+        entry = self.entries.get(hwnd)
+        if entry is not None and (self.ttl is None or self.clock() - entry[1] < self.ttl):
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        rect = tuple(self.backend.windowRect(hwnd))
+        self.entries[hwnd] = (rect, self.clock())
+        return rect
+
+    def moveWindow(self, hwnd, x, y, width, height):
+        """
+            Moves a window and updates the cached rectangle without asking the window system. The time the entry was
+            read is kept, so the TTL still bounds how long an external change can go unnoticed.
+        """
+        self.backend.moveWindow(hwnd, x, y, width, height)
+        entry = self.entries.get(hwnd)
+        read_time = entry[1] if entry is not None else self.clock()
+        self.entries[hwnd] = ((x, y, x + width, y + height), read_time)
+
+    def invalidate(self, hwnd=None):
+        """
+            Forgets the rectangle of a window, or of all windows if hwnd is None. Used as the change notification
+            callback of the backend.
+        """
+        if hwnd is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(hwnd, None)
@@ -0,0 +1,179 @@
+"""
+Description:
+    A spatial index of the top level windows, to find the window under the gaze without touching the input.
+    grabObject used to click at the pointer position with mouse.press/release and then ask for the foreground window,
+    which injects input into whatever is under the pointer and waits for the window system to process the click.
+    WindowIndex keeps the rectangles of the windows in a uniform grid of screen cells, each listing the windows that
+    overlap it from the top to the bottom of the stack, so a hit test only looks at the windows in one cell and stops
+    at the first one that contains the point. The index is built from the stacking order of a window_backend backend
+    and kept up to date from its WindowEvents. Backends without events, like win32gui, are read again when the index is
+    older than refresh_interval, which enumerates every window. On the grab path the hit test of such a backend, e.g.
+    WindowFromPoint, is cheaper than that, so the index is only worth it for backends with has_events.
+    An example of how to use it:
+            window_layout = WindowIndex(windows)   # window_backend backend
+            hwnd = window_layout.windowAt(*gaze_array.mean())
+"""
+
+import time
+
+import window_backend
+
+
+class WindowIndex(object):
+    """
+        Uniform grid of window rectangles with their stacking order.
+    """
+
+    def __init__(self, backend=None, cell_size=256, refresh_interval=None, clock=time.time):
+        """
+            input:
+                backend - Optional window_backend backend the index is built from and receives events from. Without
+                          a backend the windows are added with addWindow
+                cell_size - Width and height of the grid cells in pixels
+                refresh_interval - Seconds after which the whole layout is read from the backend again, for backends
+                                   without events. None only reads it again after a WINDOWS_RESTACKED event
+                clock - Function returning the time in seconds
+        """
+        self.backend = backend
+        self.cell_size = int(cell_size)
+        self.refresh_interval = refresh_interval
+        self.clock = clock
+        self.clear()
+        if backend is not None:
+            backend.setEventCallback(self.handleEvent)
+            self.rebuild()
+
+    def __len__(self):
+        return len(self.rects)
+
+    def __contains__(self, hwnd):
+        return hwnd in self.rects
+
+    def clear(self):
+        """
+            Removes all windows.
+        """
+        self.rects = {}  # hwnd -> (left, top, right, bottom)
+        self.depth = {}  # hwnd -> position in the stacking order, higher is closer to the top
+        self.cells = {}  # (column, row) -> list of the hwnds overlapping the cell, the top most first
+        self.top = 0
+        self.dirty = False
+        self.built = self.clock()
+
+    def cellRange(self, rect):
+        """
+            Returns the (column, row) of all cells a rectangle overlaps.
+        """
+        size = self.cell_size
+        left, top, right, bottom = rect
+        columns = range(int(left // size), int((right - 1) // size) + 1)
+        rows = range(int(top // size), int((bottom - 1) // size) + 1)
+        return [(column, row) for column in columns for row in rows]
+
+    def addWindow(self, hwnd, rect):
+        """
+            Adds a window on top of the others, or moves and raises a window that is already in the index.
+        """
+        self.removeWindow(hwnd)
+        self.top += 1
+        self.insert(hwnd, tuple(rect), self.top)
+
+    def insert(self, hwnd, rect, depth):
+        """
+            Puts a window that is not in the index into the cells it overlaps, at its place in the stacking order.
+        """
+        self.rects[hwnd] = rect
+        self.depth[hwnd] = depth
+        cells = self.cells
+        depths = self.depth
+        for cell in self.cellRange(rect):
+            members = cells.get(cell)
+            if members is None:
+                cells[cell] = [hwnd]
+                continue
+            position = 0
+            while position < len(members) and depths[members[position]] > depth:
+                position += 1
+            members.insert(position, hwnd)
+
+    def removeWindow(self, hwnd):
+        rect = self.rects.pop(hwnd, None)
+        if rect is None:
+            return
+        del self.depth[hwnd]
+        cells = self.cells
+        for cell in self.cellRange(rect):
+            members = cells[cell]
+            members.remove(hwnd)
+            if not members:
+                del cells[cell]
+
+    def moveWindow(self, hwnd, rect):
+        """
+            Changes the rectangle of a window and keeps its place in the stacking order.
+        """
+        depth = self.depth.get(hwnd)
+        if depth is None:
+            self.addWindow(hwnd, rect)
+            return
+        self.removeWindow(hwnd)
+        self.insert(hwnd, tuple(rect), depth)
+
+    def raiseWindow(self, hwnd):
+        self.addWindow(hwnd, self.rects[hwnd])
+
+    def rebuild(self):
+        """
+            Reads the whole layout from the backend.
+        """
+        backend = self.backend
+        self.clear()
+        for hwnd in backend.stackingOrder():
+            self.addWindow(hwnd, backend.windowRect(hwnd))
+
+    def handleEvent(self, event):
+        """
+            Updates the index from a window_backend.WindowEvent. Used as the event callback of the backend.
+        """
+        kind = event.kind
+        # Windows the index does not know are not in the stacking order, e.g. menus and tooltips, so their moves
+        # and raises are ignored
+        if kind == window_backend.WINDOW_MOVED:
+            if event.hwnd in self.rects:
+                self.moveWindow(event.hwnd, event.rect)
+        elif kind == window_backend.WINDOW_ADDED:
+            self.addWindow(event.hwnd, event.rect)
+        elif kind == window_backend.WINDOW_REMOVED:
+            self.removeWindow(event.hwnd)
+        elif kind == window_backend.WINDOW_RAISED:
+            if event.hwnd in self.rects:
+                self.raiseWindow(event.hwnd)
+        else:
+            self.dirty = True
+
+    def refresh(self):
+        """
+            Reads the pending events of the backend, and the whole layout if it is stale.
+        """
+        backend = self.backend
+        if backend is None:
+            return
+        backend.pollEvents()
+        if self.dirty or (self.refresh_interval is not None and self.clock() - self.built >= self.refresh_interval):
+            self.rebuild()
+
+    def windowAt(self, x, y):
+        """
+            Returns the handle of the top most window containing the screen position, or None.
+        """
+        self.refresh()
+        size = self.cell_size
+        members = self.cells.get((int(x // size), int(y // size)))
+        if not members:
+            return None
+        rects = self.rects
+        for hwnd in members:
+            left, top, right, bottom = rects[hwnd]
+            if left <= x < right and top <= y < bottom:
+                return hwnd
+        return None